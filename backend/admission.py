@@ -0,0 +1,167 @@
+"""
+In-process admission control for the scoring endpoints.
+
+Each request first spends a token from its client's bucket (429 when
+empty). It then needs one of `max_concurrent` slots; when none is free it
+waits in a queue of at most `max_queue` requests for up to `queue_timeout`
+seconds (503 when the queue is full or the wait times out). Rejections
+carry Retry-After and are answered before any scoring work, so a burst
+costs the server almost nothing beyond the admitted requests.
+
+State is per process: with several gunicorn workers each enforces its own
+limits, so the effective totals are multiplied by WEB_CONCURRENCY.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0"))
+RATE_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+# Token buckets kept in memory; the least recently seen clients are evicted
+MAX_CLIENTS = int(os.getenv("RATE_LIMIT_CLIENTS", "10000"))
+# Proxies in front of the app that append to X-Forwarded-For (Render: 1);
+# 0 ignores the header and keys on the socket peer
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+ADMITTED_PATHS = ("/score",)
+
+
+class TokenBuckets:
+    """Per-client token buckets in an LRU of (tokens, last refill time)."""
+
+    def __init__(self, rate_per_second: float, burst: float, max_clients: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, client: str, now: float) -> float:
+        """Spend one token; returns 0 on success, else seconds until one is available."""
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT, rate_per_minute: float = RATE_PER_MINUTE,
+                 burst: float = RATE_BURST, max_clients: int = MAX_CLIENTS):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.buckets = TokenBuckets(rate_per_minute / 60, burst, max_clients)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters: Dict[str, int] = {
+            "admitted": 0, "queued": 0, "shed_rate_limited": 0, "shed_queue_full": 0, "shed_timeout": 0
+        }
+
+    async def acquire(self, client: str) -> Optional[Tuple[int, float]]:
+        """Wait for a slot; returns None when admitted, else (status, retry_after)."""
+        wait = self.buckets.take(client, time.monotonic())
+        if wait:
+            self.counters["shed_rate_limited"] += 1
+            return 429, wait
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                self.counters["shed_queue_full"] += 1
+                return 503, self.queue_timeout
+            self.waiting += 1
+            self.counters["queued"] += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["shed_timeout"] += 1
+                return 503, self.queue_timeout
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        return None
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    def metrics(self) -> Dict[str, float]:
+        return dict(
+            self.counters,
+            in_flight=self.in_flight,
+            waiting=self.waiting,
+            tracked_clients=len(self.buckets),
+            max_concurrent=self.max_concurrent,
+            max_queue=self.max_queue,
+        )
+
+
+def client_key(scope, trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """
+    The address the outermost trusted proxy saw. Clients can put anything
+    in X-Forwarded-For, so entries are counted from the right, where each
+    trusted proxy appends the peer it received the request from.
+    """
+    if trusted_hops > 0:
+        forwarded = [
+            entry.strip()
+            for name, value in scope.get("headers", ())
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+        ]
+        if len(forwarded) >= trusted_hops and forwarded[-trusted_hops]:
+            return forwarded[-trusted_hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to ADMITTED_PATHS."""
+
+    def __init__(self, app, controller: AdmissionController, paths: Tuple[str, ...] = ADMITTED_PATHS):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.controller.acquire(client_key(scope))
+        if rejection is not None:
+            status, retry_after = rejection
+            detail = "Too many requests" if status == 429 else "Server busy, please retry"
+            response = JSONResponse({"detail": detail}, status_code=status,
+                                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
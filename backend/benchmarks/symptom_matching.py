@@ -0,0 +1,126 @@
+"""
+Symptom triage matching time as the free-text answer grows.
+
+    python -m backend.benchmarks.symptom_matching --lengths 200 1000 5000 --repeat 2000
+
+Texts are built from everyday filler words with vocabulary phrases and
+misspellings mixed in. "cold" clears the spelling-correction cache before
+every run (each unknown word is corrected from scratch), "warm" keeps it,
+as a long-running worker does. "regex" is the naive alternative for
+reference: one case-insensitive search per vocabulary phrase, with no
+misspelling tolerance or negation. CASES are checked before timing, so
+a faster matcher that finds different terms fails loudly.
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from backend.symptom_triage import MATCHER, SYMPTOM_TERMS, MAX_TEXT_LENGTH, triage_symptom
+
+FILLER = (
+    "i noticed something last week when showering and have been worried since my mother "
+    "was diagnosed years ago so wanted to check what this could mean it comes and goes "
+    "sometimes worse at night the doctor is hard to reach where i live"
+).split()
+PHRASES = [phrase for spec in SYMPTOM_TERMS.values() for phrase in spec["phrases"]]
+
+# (text, expected terms in order)
+CASES = [
+    ("breast lump", ["lump"]),
+    ("hard lump in my left breast", ["hard_lump"]),
+    ("bloody nippel dischrage", ["bloody_discharge"]),
+    ("no lump but my nipple is invertd", ["nipple_inversion"]),
+    ("I don't have any pain. Skin dimpeling near the nipple", ["skin_dimpling"]),
+    ("it's painfull and sore", ["breast_pain"]),
+    # Red-flag words apart from the symptom they describe
+    ("nipple discharge with blood", ["bloody_discharge"]),
+    ("discharge from my nippel, bleeding", ["nipple_discharge"]),
+    ("bleeding from my nipple", ["bloody_discharge"]),
+    ("an open sore on my breast", ["nipple_skin_change"]),
+    ("ulcer on my nipple", ["nipple_skin_change"]),
+    ("hard painful lump", ["hard_lump"]),
+    ("lump that is hard", ["hard_lump"]),
+    ("a lump that is not hard", ["lump"]),
+    ("clear discharge, the lump is soft", ["nipple_discharge", "lump"]),
+    # Everyday words that are one edit away from a symptom word
+    ("I want to know my risk", []),
+    ("I use a breast pump", []),
+    ("I have more questions", []),
+    ("pain when I pass urine", []),
+    ("feeling a knot in my stomach", []),
+    ("the paint smell gives me a headache", []),
+    # Bleeding and sores away from the breast
+    ("I had a blood test last week", []),
+    ("I'm bleeding from my gums", []),
+    ("mouth ulcer", []),
+    ("an open sore on my lip", []),
+]
+
+
+def check() -> None:
+    for text, expected in CASES:
+        terms = triage_symptom(text)["terms"]
+        if terms != expected:
+            raise AssertionError(f"{text!r}: expected {expected}, matched {terms}")
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def make_text(length: int, rng: random.Random) -> str:
+    words: List[str] = []
+    while sum(len(word) + 1 for word in words) < length:
+        if rng.random() < 0.1:
+            words.extend(_misspell(word, rng) if rng.random() < 0.3 else word
+                         for word in rng.choice(PHRASES).split())
+            words[-1] += rng.choice([",", ".", ""])
+        else:
+            words.append(rng.choice(FILLER))
+    return " ".join(words)[:length]
+
+
+def _time(function: Callable[[str], object], texts: List[str], repeat: int) -> List[float]:
+    timings = []
+    for i in range(repeat):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        function(text)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return sorted(timings)
+
+
+def run(length: int, repeat: int, seed: int) -> Tuple[float, float, float, float]:
+    rng = random.Random(seed)
+    texts = [make_text(length, rng) for _ in range(64)]
+    patterns = [re.compile(r"\b" + re.escape(phrase) + r"\b", re.IGNORECASE) for phrase in PHRASES]
+
+    def cold(text: str) -> None:
+        MATCHER._corrections.clear()
+        MATCHER.match(text)
+
+    cold_timings = _time(cold, texts, repeat)
+    warm_timings = _time(MATCHER.match, texts, repeat)
+    regex_timings = _time(lambda text: [pattern.search(text) for pattern in patterns], texts, repeat)
+    return (statistics.median(cold_timings), statistics.median(warm_timings),
+            warm_timings[int(len(warm_timings) * 0.99) - 1], statistics.median(regex_timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 1000, MAX_TEXT_LENGTH])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check()
+    print(f"{'chars':>8} {'cold p50 us':>12} {'warm p50 us':>12} {'warm p99 us':>12} {'regex p50 us':>13}")
+    for length in args.lengths:
+        cold, warm, warm_p99, regex = run(length, args.repeat, args.seed)
+        print(f"{length:>8} {cold:>12.1f} {warm:>12.1f} {warm_p99:>12.1f} {regex:>13.1f}")
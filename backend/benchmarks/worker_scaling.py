@@ -0,0 +1,100 @@
+"""
+Requests per second for /score as the number of uvicorn workers grows.
+
+    python -m backend.benchmarks.worker_scaling --workers 1 2 4 --clients 8 --duration 10
+
+Run from the repository root after building the scoring snapshot
+(python -m backend.etl.build_baseline) so every worker maps the same
+file. Each worker count starts a fresh gunicorn server, the same launch
+mode backend/start.sh uses; load comes from separate client processes
+using keep-alive connections.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+SAMPLE_FORM = {
+    "symptom": "breast lump", "age": 45, "gender": "Female", "location": "Nepal",
+    "access_healthcare": "Yes", "age_menarche": 12, "age_thelarche": 12,
+    "menopause": "No", "age_menopause": None, "pregnancy": "Yes", "pregnancy_age": 28,
+    "breastfeeding": "Yes", "pcos": "No", "hormonal_use": "No", "relatives_with_cancer": 1,
+    "brca_known": "No", "ethnicity": "White", "had_mammo": "Yes", "breast_density": "No",
+    "benign_lumps": "No", "smoking": "No", "alcohol": "No", "exercise": "3–5x/week",
+    "anxiety_level": "Manageable",
+}
+
+
+def _client(port: int, duration: float) -> List[float]:
+    body = json.dumps(SAMPLE_FORM).encode()  # bytes: headers and body go out in one send()
+    headers = {"Content-Type": "application/json"}
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        conn.request("POST", "/score", body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - started)
+    conn.close()
+    return latencies
+
+
+def _wait_until_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def run(workers: int, clients: int, duration: float, port: int) -> Tuple[float, float, float]:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-k", "uvicorn.workers.UvicornWorker",
+         "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+         "backend.main:app"],
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))),
+    )
+    try:
+        _wait_until_ready(port)
+        _client(port, 1.0)  # warm up every worker's caches
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(_client, [port] * clients, [duration] * clients))
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(latency for result in results for latency in result)
+    if not latencies:
+        return 0.0, 0.0, 0.0
+    rps = len(latencies) / duration
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    return rps, p50, p95
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=10100)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for count in args.workers:
+        rps, p50, p95 = run(count, args.clients, args.duration, args.port)
+        print(f"{count:>8} {rps:>10.1f} {p50:>8.2f} {p95:>8.2f}")
@@ -1,50 +1,459 @@
+import argparse
+import json
+import os
 import sqlite3
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .sketch import QuantileSketch
 
 DB_NAME = "submissions.db"
+ARCHIVE_DIR = "backend/data/archive"
+
+# Submissions live in one table per UTC month (risk_submissions_YYYY_MM);
+# risk_submissions is a read-only view over the months still in SQLite.
+VIEW_NAME = "risk_submissions"
+PARTITION_PREFIX = "risk_submissions_"
+# Months kept in SQLite by archive_partitions, including the current one
+KEEP_MONTHS = 3
+SUBMISSION_COLUMNS = (
+    "id", "timestamp", "age", "gender", "symptom", "location", "relatives_with_cancer",
+    "brca_known", "anxiety_level", "risk_estimate", "full_data", "risk_percentage", "model"
+)
+PARTITION_SCHEMA = '''
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    age INTEGER,
+    gender TEXT,
+    symptom TEXT,
+    location TEXT,
+    relatives_with_cancer INTEGER,
+    brca_known TEXT,
+    anxiety_level TEXT,
+    risk_estimate TEXT,
+    full_data TEXT,
+    risk_percentage REAL,
+    model TEXT
+'''
+
+# risk_submissions columns counted in submission_rollups (all time, plus
+# one count per UTC day) and submission_daily_rollups (per UTC day)
+ROLLUP_DIMENSIONS = ("risk_estimate", "gender", "location")
+# risk_sketch scope holding every submission; daily scopes are "day:YYYY-MM-DD"
+ALL_SCOPE = "all"
+STATS_QUANTILES = (0.5, 0.9, 0.99)
+# Stored responses for Idempotency-Key replays are pruned after this long
+IDEMPOTENCY_TTL_HOURS = 24
+# etl_jobs statuses; at most one job is active at a time
+ACTIVE_JOB_STATUSES = ("queued", "running")
+ETL_JOB_COLUMNS = (
+    "id", "status", "stage", "created_at", "started_at", "finished_at",
+    "config", "progress", "error", "pid", "cancel_requested"
+)
+
+# Partitions this process has already created
+_known_partitions = set()
+
+
+def partition_table(month: str) -> str:
+    """"2026-10" -> "risk_submissions_2026_10"."""
+    return PARTITION_PREFIX + month.replace("-", "_")
+
+
+def _live_partitions(conn) -> List[Tuple[str, str]]:
+    return conn.execute(
+        "SELECT month, table_name FROM submission_partitions WHERE archive_path IS NULL ORDER BY month"
+    ).fetchall()
+
+
+def _refresh_view(conn) -> None:
+    selects = [f"SELECT * FROM {table}" for _, table in _live_partitions(conn)]
+    conn.execute(f"DROP VIEW IF EXISTS {VIEW_NAME}")
+    conn.execute(f"CREATE VIEW {VIEW_NAME} AS {' UNION ALL '.join(selects)}")
+
+
+def _ensure_partition(conn, month: str) -> str:
+    table = partition_table(month)
+    if month in _known_partitions:
+        return table
+    created = conn.execute(
+        "INSERT OR IGNORE INTO submission_partitions (month, table_name) VALUES (?, ?)", (month, table)
+    ).rowcount
+    if created:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({PARTITION_SCHEMA})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_timestamp ON {table} (timestamp)")
+        # Continue the id sequence across partitions, so ids stay unique
+        last_id = conn.execute(f'''
+            SELECT MAX(COALESCE((SELECT MAX(seq) FROM sqlite_sequence WHERE name LIKE '{PARTITION_PREFIX}%'), 0),
+                       COALESCE((SELECT MAX(max_id) FROM submission_partitions), 0))
+        ''').fetchone()[0]
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, last_id))
+        _refresh_view(conn)
+    elif conn.execute("SELECT archive_path FROM submission_partitions WHERE month = ?", (month,)).fetchone()[0]:
+        raise ValueError(f"Partition {month} is archived and read-only")
+    _known_partitions.add(month)
+    return table
+
+
+def _migrate_legacy_table(conn) -> None:
+    """Move rows of the old single risk_submissions table into monthly partitions."""
+    kind = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (VIEW_NAME,)).fetchone()
+    if not kind or kind[0] != "table":
+        return
+    conn.execute(f"ALTER TABLE {VIEW_NAME} RENAME TO risk_submissions_legacy")
+    legacy = {row[1] for row in conn.execute("PRAGMA table_info(risk_submissions_legacy)")}
+    columns = ", ".join(SUBMISSION_COLUMNS)
+    values = ", ".join(col if col in legacy else "NULL" for col in SUBMISSION_COLUMNS)
+    months = [row[0] for row in conn.execute(
+        "SELECT DISTINCT substr(timestamp, 1, 7) FROM risk_submissions_legacy ORDER BY 1")]
+    for month in months:
+        table = _ensure_partition(conn, month or "0000-00")
+        conn.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {values} FROM risk_submissions_legacy "
+            f"WHERE substr(timestamp, 1, 7) IS ?", (month,)
+        )
+    conn.execute("DROP TABLE risk_submissions_legacy")
+
+
+def _migrate_partition_columns(conn) -> None:
+    """Add columns introduced after a live partition was created (model)."""
+    changed = False
+    for _, table in _live_partitions(conn):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "model" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN model TEXT")
+            changed = True
+    if changed:
+        _refresh_view(conn)
+
+
+def _update_max_ids(conn) -> None:
+    for month, table in _live_partitions(conn):
+        conn.execute(
+            f"UPDATE submission_partitions SET max_id = (SELECT MAX(id) FROM {table}) WHERE month = ?", (month,)
+        )
+
 
 def init_db():
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS risk_submissions (
+            CREATE TABLE IF NOT EXISTS submission_partitions (
+                month TEXT PRIMARY KEY,
+                table_name TEXT,
+                archive_path TEXT,
+                row_count INTEGER,
+                max_id INTEGER
+            )
+        ''')
+        _migrate_partition_columns(conn)
+        _migrate_legacy_table(conn)
+        _ensure_partition(conn, datetime.utcnow().strftime("%Y-%m"))
+
+        # Aggregates maintained on every write, so /stats never scans submissions
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS submission_rollups (
+                dimension TEXT,
+                value TEXT,
+                count INTEGER,
+                PRIMARY KEY (dimension, value)
+            )
+        ''')
+        # The same counts per day, for /stats?since=; days before this table
+        # existed are only filled in by --rebuild-stats
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS submission_daily_rollups (
+                day TEXT,
+                dimension TEXT,
+                value TEXT,
+                count INTEGER,
+                PRIMARY KEY (day, dimension, value)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS risk_sketch (
+                scope TEXT,
+                bucket INTEGER,
+                count INTEGER,
+                PRIMARY KEY (scope, bucket)
+            )
+        ''')
+        # Observed range per risk_sketch scope; quantiles are clamped to it
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS risk_range (
+                scope TEXT PRIMARY KEY,
+                min_value REAL,
+                max_value REAL
+            )
+        ''')
+
+        # Responses of keyed /score requests; the primary key makes a
+        # replayed key fail the insert instead of writing a second submission
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                request_hash TEXT,
+                created_at TEXT,
+                response TEXT,
+                submission_id INTEGER
+            )
+        ''')
+        if "submission_id" not in {row[1] for row in cursor.execute("PRAGMA table_info(idempotency_keys)")}:
+            cursor.execute("ALTER TABLE idempotency_keys ADD COLUMN submission_id INTEGER")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created_at)")
+        _prune_idempotency_keys(cursor, datetime.utcnow())
+
+        # Background ETL runs (see etl_jobs.py); progress is JSON per stage
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS etl_jobs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                age INTEGER,
-                gender TEXT,
-                symptom TEXT,
-                location TEXT,
-                relatives_with_cancer INTEGER,
-                brca_known TEXT,
-                anxiety_level TEXT,
-                risk_estimate TEXT,
-                full_data TEXT
+                status TEXT,
+                stage TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                finished_at TEXT,
+                config TEXT,
+                progress TEXT,
+                error TEXT,
+                pid INTEGER,
+                cancel_requested INTEGER DEFAULT 0
             )
         ''')
         conn.commit()
-        
+
+
+def _month_range(start: Optional[date], end: Optional[date]) -> Tuple[str, str]:
+    return (start.strftime("%Y-%m") if start else "0000-00",
+            end.strftime("%Y-%m") if end else "9999-99")
+
+
+def _archived_rows(path: str, start: Optional[date], end: Optional[date]) -> List[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required to read archived submissions")
+    filters = []
+    if start:
+        filters.append(("timestamp", ">=", start.isoformat()))
+    if end:
+        filters.append(("timestamp", "<", (end + timedelta(days=1)).isoformat()))
+    return pq.read_table(path, filters=filters or None).to_pylist()
+
+
+def get_submissions(start: Optional[date] = None, end: Optional[date] = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Submissions between `start` and `end` (inclusive dates), newest first.
+
+    Only the monthly partitions overlapping the range are read; archived
+    months come from their Parquet files with the range pushed down. With
+    a limit, months are read newest first until it is reached.
+    """
+    first_month, last_month = _month_range(start, end)
+    conditions, params = [], []
+    if start:
+        conditions.append("timestamp >= ?")
+        params.append(start.isoformat())
+    if end:
+        conditions.append("timestamp < ?")
+        params.append((end + timedelta(days=1)).isoformat())
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    order = f" ORDER BY timestamp DESC LIMIT {int(limit)}" if limit else ""
+
+    rows: List[Dict[str, Any]] = []
+    with sqlite3.connect(DB_NAME) as conn:
+        partitions = conn.execute(
+            "SELECT table_name, archive_path FROM submission_partitions WHERE month BETWEEN ? AND ? "
+            "ORDER BY month DESC",
+            (first_month, last_month)
+        ).fetchall()
+        for table, archive_path in partitions:
+            if limit and len(rows) >= limit:
+                break
+            if archive_path:
+                rows.extend(_archived_rows(archive_path, start, end))
+                continue
+            cursor = conn.execute(f"SELECT * FROM {table}{where}{order}", params)
+            columns = [desc[0] for desc in cursor.description]
+            rows.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+
+    rows.sort(key=lambda row: row["timestamp"] or "", reverse=True)
+    return rows[:limit] if limit else rows
+
+
 def get_all_submissions():
+    return get_submissions()
+
+
+def _add_rollups(cursor, rollups: Counter, daily: Counter, buckets: Counter,
+                 ranges: Dict[str, Tuple[float, float]]) -> None:
+    cursor.executemany('''
+        INSERT INTO submission_rollups (dimension, value, count) VALUES (?, ?, ?)
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count
+    ''', [(dimension, value, count) for (dimension, value), count in rollups.items()])
+    cursor.executemany('''
+        INSERT INTO submission_daily_rollups (day, dimension, value, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (day, dimension, value) DO UPDATE SET count = count + excluded.count
+    ''', [(day, dimension, value, count) for (day, dimension, value), count in daily.items()])
+    cursor.executemany('''
+        INSERT INTO risk_sketch (scope, bucket, count) VALUES (?, ?, ?)
+        ON CONFLICT (scope, bucket) DO UPDATE SET count = count + excluded.count
+    ''', [(scope, bucket, count) for (scope, bucket), count in buckets.items()])
+    cursor.executemany('''
+        INSERT INTO risk_range (scope, min_value, max_value) VALUES (?, ?, ?)
+        ON CONFLICT (scope) DO UPDATE SET min_value = MIN(min_value, excluded.min_value),
+                                          max_value = MAX(max_value, excluded.max_value)
+    ''', [(scope, low, high) for scope, (low, high) in ranges.items()])
+
+
+def _count_submission(rollups: Counter, daily: Counter, buckets: Counter,
+                      ranges: Dict[str, Tuple[float, float]], sketch: QuantileSketch,
+                      timestamp: str, values: Dict[str, Any], risk_percentage: Optional[float]) -> None:
+    day = (timestamp or "")[:10]
+    for dimension in ROLLUP_DIMENSIONS:
+        rollups[(dimension, str(values.get(dimension)))] += 1
+        daily[(day, dimension, str(values.get(dimension)))] += 1
+    rollups[("day", day)] += 1
+    if risk_percentage is not None:
+        bucket = sketch.key(risk_percentage)
+        for scope in (ALL_SCOPE, f"day:{day}"):
+            buckets[(scope, bucket)] += 1
+            low, high = ranges.get(scope, (risk_percentage, risk_percentage))
+            ranges[scope] = (min(low, risk_percentage), max(high, risk_percentage))
+
+
+def _prune_idempotency_keys(cursor, now: datetime) -> None:
+    cutoff = (now - timedelta(hours=IDEMPOTENCY_TTL_HOURS)).isoformat()
+    cursor.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (cutoff,))
+
+
+def get_stored_responses(submission_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Responses still stored under an Idempotency-Key, by submission id."""
+    responses = {}
     with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM risk_submissions ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
+        for start in range(0, len(submission_ids), 500):
+            ids = submission_ids[start:start + 500]
+            for submission_id, response in conn.execute(
+                    f"SELECT submission_id, response FROM idempotency_keys "
+                    f"WHERE submission_id IN ({', '.join('?' * len(ids))})", ids):
+                responses[submission_id] = json.loads(response)
+    return responses
+
+
+def get_idempotent_response(key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(request hash, stored response) for an Idempotency-Key, if it was seen."""
+    with sqlite3.connect(DB_NAME) as conn:
+        row = conn.execute(
+            "SELECT request_hash, response FROM idempotency_keys WHERE key = ?", (key,)
+        ).fetchone()
+    return None if row is None else (row[0], json.loads(row[1]))
+
+
+def _etl_job(row) -> Dict[str, Any]:
+    job = dict(zip(ETL_JOB_COLUMNS, row))
+    job["config"] = json.loads(job["config"]) if job["config"] else {}
+    job["progress"] = json.loads(job["progress"]) if job["progress"] else {}
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def create_etl_job(config: Dict[str, Any]) -> Optional[int]:
+    """Record a queued ETL job; returns its id, or None if a job is already active."""
+    placeholders = ", ".join("?" for _ in ACTIVE_JOB_STATUSES)
+    with sqlite3.connect(DB_NAME, isolation_level=None) as conn:
+        # IMMEDIATE takes the write lock first, so two workers cannot both start a job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            active = conn.execute(
+                f"SELECT id FROM etl_jobs WHERE status IN ({placeholders})", ACTIVE_JOB_STATUSES
+            ).fetchone()
+            if active:
+                return None
+            cursor = conn.execute(
+                "INSERT INTO etl_jobs (status, created_at, config) VALUES ('queued', ?, ?)",
+                (datetime.utcnow().isoformat(), json.dumps(config))
+            )
+            return cursor.lastrowid
+        finally:
+            conn.execute("COMMIT")
+
 
-        # Return as list of dicts
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in rows]
+def update_etl_job(job_id: int, **fields) -> None:
+    unknown = set(fields) - set(ETL_JOB_COLUMNS[1:])
+    if unknown:
+        raise ValueError(f"Unknown etl_jobs columns: {sorted(unknown)}")
+    values = [json.dumps(value) if name in ("config", "progress") else value for name, value in fields.items()]
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.execute(f"UPDATE etl_jobs SET {assignments} WHERE id = ?", values + [job_id])
+        conn.commit()
+
+
+def get_etl_job(job_id: int) -> Optional[Dict[str, Any]]:
+    with sqlite3.connect(DB_NAME) as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(ETL_JOB_COLUMNS)} FROM etl_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    return None if row is None else _etl_job(row)
+
+
+def list_etl_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+    with sqlite3.connect(DB_NAME) as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(ETL_JOB_COLUMNS)} FROM etl_jobs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [_etl_job(row) for row in rows]
 
 
-def save_submission(data, risk_estimate):
+def request_etl_cancel(job_id: int) -> bool:
+    """Flag an active job for cancellation; False if it is not active."""
+    placeholders = ", ".join("?" for _ in ACTIVE_JOB_STATUSES)
+    with sqlite3.connect(DB_NAME) as conn:
+        updated = conn.execute(
+            f"UPDATE etl_jobs SET cancel_requested = 1 WHERE id = ? AND status IN ({placeholders})",
+            (job_id,) + ACTIVE_JOB_STATUSES
+        ).rowcount
+        conn.commit()
+    return bool(updated)
+
+
+def save_submission(data, risk_estimate, risk_percentage=None, idempotency_key=None,
+                    request_hash=None, response=None, model=None):
+    """
+    Store a scored submission and update the aggregates.
+
+    With an idempotency_key, the response is stored under the key in the
+    same transaction. If the key already exists (e.g. another worker got
+    the same retry), nothing is written and the stored
+    (request hash, response) is returned instead; otherwise returns None.
+    """
+    now = datetime.utcnow()
+    timestamp = now.isoformat()
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO risk_submissions (
+        if idempotency_key is not None:
+            try:
+                cursor.execute(
+                    "INSERT INTO idempotency_keys (key, request_hash, created_at, response) VALUES (?, ?, ?, ?)",
+                    (idempotency_key, request_hash, timestamp, json.dumps(response))
+                )
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return get_idempotent_response(idempotency_key)
+            # Expired keys go on insert, so the table stays bounded by the TTL
+            _prune_idempotency_keys(cursor, now)
+        table = _ensure_partition(conn, now.strftime("%Y-%m"))
+        cursor.execute(f'''
+            INSERT INTO {table} (
                 timestamp, age, gender, symptom, location,
                 relatives_with_cancer, brca_known, anxiety_level,
-                risk_estimate, full_data
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                risk_estimate, full_data, risk_percentage, model
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            datetime.utcnow().isoformat(),
+            timestamp,
             data.get("age"),
             data.get("gender"),
             data.get("symptom"),
@@ -53,7 +462,203 @@ def save_submission(data, risk_estimate):
             data.get("brca_known"),
             data.get("anxiety_level"),
             risk_estimate,
-            str(data)
+            str(data),
+            risk_percentage,
+            model
         ))
+        if idempotency_key is not None:
+            cursor.execute("UPDATE idempotency_keys SET submission_id = ? WHERE key = ?",
+                           (cursor.lastrowid, idempotency_key))
+
+        # Same transaction, so the aggregates always match the table
+        rollups, daily, buckets, ranges = Counter(), Counter(), Counter(), {}
+        _count_submission(rollups, daily, buckets, ranges, QuantileSketch(), timestamp,
+                          dict(data, risk_estimate=risk_estimate), risk_percentage)
+        _add_rollups(cursor, rollups, daily, buckets, ranges)
+        conn.commit()
+    return None
+
+
+def archive_partitions(keep_months: int = KEEP_MONTHS, archive_dir: str = ARCHIVE_DIR) -> List[str]:
+    """
+    Move monthly partitions older than the newest `keep_months` months to
+    zstd-compressed Parquet files and drop them from SQLite.
+
+    Each file is fully written and its row count checked before the table
+    is dropped. The database is vacuumed afterwards so it shrinks.
+
+    Returns:
+        List[str]: Months archived
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    today = date.today().replace(day=1)
+    cutoff = today
+    for _ in range(max(keep_months, 1) - 1):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+    cutoff_month = cutoff.strftime("%Y-%m")
+
+    archived = []
+    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(DB_NAME) as conn:
+        _update_max_ids(conn)
+        for month, table in _live_partitions(conn):
+            if month >= cutoff_month:
+                continue
+            path = os.path.join(archive_dir, f"{table}.parquet")
+            tmp_path = path + ".tmp"
+            cursor = conn.execute(f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM {table} ORDER BY timestamp")
+            schema = pa.schema([
+                ("id", pa.int64()), ("timestamp", pa.string()), ("age", pa.int64()),
+                ("gender", pa.string()), ("symptom", pa.string()), ("location", pa.string()),
+                ("relatives_with_cancer", pa.int64()), ("brca_known", pa.string()),
+                ("anxiety_level", pa.string()), ("risk_estimate", pa.string()),
+                ("full_data", pa.string()), ("risk_percentage", pa.float64()),
+                ("model", pa.string()),
+            ])
+            written = 0
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                while True:
+                    batch = cursor.fetchmany(10_000)
+                    if not batch:
+                        break
+                    writer.write_table(pa.Table.from_pylist(
+                        [dict(zip(SUBMISSION_COLUMNS, row)) for row in batch], schema=schema))
+                    written += len(batch)
+            if pq.ParquetFile(tmp_path).metadata.num_rows != written:
+                raise RuntimeError(f"Archive of {month} is incomplete; partition kept")
+            os.replace(tmp_path, path)
+
+            conn.execute(
+                "UPDATE submission_partitions SET archive_path = ?, row_count = ? WHERE month = ?",
+                (path, written, month)
+            )
+            conn.execute(f"DROP TABLE {table}")
+            _refresh_view(conn)
+            conn.commit()
+            _known_partitions.discard(month)
+            archived.append(month)
+
+    if archived:
+        with sqlite3.connect(DB_NAME) as conn:
+            conn.execute("VACUUM")
+    return archived
+
+
+def _submission_rows(columns: Tuple[str, ...], chunk_size: int) -> Iterator[List[tuple]]:
+    """Chunks of `columns` over every submission, archived ones included."""
+    with sqlite3.connect(DB_NAME) as conn:
+        partitions = conn.execute(
+            "SELECT table_name, archive_path FROM submission_partitions ORDER BY month"
+        ).fetchall()
+        for table, archive_path in partitions:
+            if archive_path:
+                import pyarrow.parquet as pq
+                for batch in pq.ParquetFile(archive_path).iter_batches(chunk_size, columns=list(columns)):
+                    yield list(zip(*(batch.column(name).to_pylist() for name in columns)))
+                continue
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+
+def get_stats(since: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Submission counts and risk_percentage quantiles from the maintained
+    aggregates; the cost depends on the number of distinct values, not on
+    the number of submissions.
+
+    Args:
+        since: Optional first day; counts come from the daily rollups and
+            quantiles merge the daily sketches from that day on, instead of
+            the all-time aggregates
+    """
+    with sqlite3.connect(DB_NAME) as conn:
+        counts: Dict[str, Dict[str, int]] = {}
+        if since:
+            rows = conn.execute('''
+                SELECT dimension, value, count FROM submission_rollups WHERE dimension = 'day' AND value >= ?
+                UNION ALL
+                SELECT dimension, value, SUM(count) FROM submission_daily_rollups WHERE day >= ?
+                GROUP BY dimension, value
+                ORDER BY dimension, value
+            ''', (since.isoformat(), since.isoformat()))
+        else:
+            rows = conn.execute("SELECT dimension, value, count FROM submission_rollups ORDER BY dimension, value")
+        for dimension, value, count in rows:
+            counts.setdefault(dimension, {})[value] = count
+
+        if since:
+            first_day = (f"day:{since.isoformat()}",)
+            buckets = conn.execute(
+                "SELECT bucket, SUM(count) FROM risk_sketch WHERE scope LIKE 'day:%' AND scope >= ? GROUP BY bucket",
+                first_day
+            ).fetchall()
+            low, high = conn.execute(
+                "SELECT MIN(min_value), MAX(max_value) FROM risk_range WHERE scope LIKE 'day:%' AND scope >= ?",
+                first_day
+            ).fetchone()
+        else:
+            buckets = conn.execute("SELECT bucket, count FROM risk_sketch WHERE scope = ?", (ALL_SCOPE,)).fetchall()
+            low, high = conn.execute(
+                "SELECT min_value, max_value FROM risk_range WHERE scope = ?", (ALL_SCOPE,)
+            ).fetchone() or (None, None)
+
+    sketch = QuantileSketch.from_buckets(buckets, min_value=low, max_value=high)
+    quantiles = {f"p{round(q * 100)}": sketch.quantile(q) for q in STATS_QUANTILES}
+    return {
+        "total": sum(counts.get("day", {}).values()),
+        "counts": counts,
+        "risk_percentage": dict(count=sketch.count, **{
+            name: None if value is None else round(value, 2) for name, value in quantiles.items()
+        }),
+    }
+
+
+def rebuild_stats(chunk_size: int = 10_000) -> int:
+    """
+    Recompute the rollups and risk_sketch from every submission,
+    live and archived.
+
+    Returns:
+        int: Number of submissions counted
+    """
+    rollups, daily, buckets, ranges = Counter(), Counter(), Counter(), {}
+    sketch = QuantileSketch()
+    total = 0
+    columns = ("timestamp", "risk_estimate", "gender", "location", "risk_percentage")
+    for rows in _submission_rows(columns, chunk_size):
+        for timestamp, risk_estimate, gender, location, risk_percentage in rows:
+            values = {"risk_estimate": risk_estimate, "gender": gender, "location": location}
+            _count_submission(rollups, daily, buckets, ranges, sketch, timestamp, values, risk_percentage)
+        total += len(rows)
+
+    with sqlite3.connect(DB_NAME) as conn:
+        conn.execute("DELETE FROM submission_rollups")
+        conn.execute("DELETE FROM submission_daily_rollups")
+        conn.execute("DELETE FROM risk_sketch")
+        conn.execute("DELETE FROM risk_range")
+        _add_rollups(conn.cursor(), rollups, daily, buckets, ranges)
         conn.commit()
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submission database maintenance")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="Recompute the /stats aggregates from all submissions")
+    parser.add_argument("--archive", action="store_true",
+                        help="Move old monthly partitions to Parquet")
+    parser.add_argument("--keep-months", type=int, default=KEEP_MONTHS)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
 
+    init_db()
+    if args.archive:
+        print(f"Archived months: {archive_partitions(args.keep_months, args.archive_dir) or 'none'}")
+    if args.rebuild_stats:
+        print(f"Rebuilt stats from {rebuild_stats()} submissions")
@@ -1,14 +1,80 @@
 import sqlite3
 import pandas as pd
+import numpy as np
 import os
+from typing import Callable, Optional
+from backend.scoring_core import DENSE_AGE_MAX, AVERAGE_KEY
+from backend.snapshot import SNAPSHOT_PATH
+from backend.etl.build_snapshot import build_scoring_snapshot
+from backend.etl.utils import age_group_midpoints
 
 DB_PATH = "backend/data/processed/breast_cancer_risk.db"
 
-def build_risk_baseline():
-    conn = sqlite3.connect("backend/data/processed/breast_cancer_risk.db")
 
-    # Load the risk_factors table
-    df = pd.read_sql_query("SELECT age, ethnicity, cases FROM risk_factors", conn)
+def _interpolate(x: np.ndarray, values: np.ndarray, ages: np.ndarray) -> np.ndarray:
+    """Interpolate each row of `values` (rows x len(x)) onto `ages`."""
+    if len(x) == 1:
+        return np.repeat(values, len(ages), axis=1)
+
+    # Shared interpolation weights; ages outside the data take the edge value
+    hi = np.clip(np.searchsorted(x, ages), 1, len(x) - 1)
+    lo = hi - 1
+    w = np.clip((ages - x[lo]) / (x[hi] - x[lo]), 0, 1)
+    dense = values[:, lo] * (1 - w) + values[:, hi] * w
+
+    # Rows missing some age groups interpolate over what they have
+    for i in np.flatnonzero(np.isnan(values).any(axis=1)):
+        valid = ~np.isnan(values[i])
+        dense[i] = np.interp(ages, x[valid], values[i, valid]) if valid.any() else np.nan
+    return dense
+
+
+def build_dense_baseline(baseline: pd.DataFrame) -> pd.DataFrame:
+    """
+    Interpolate the per-group risk rates to one rate per year of age.
+
+    Args:
+        baseline: risk_baseline rows (age, ethnicity, risk_rate, total_records)
+
+    Returns:
+        pd.DataFrame: (ethnicity, age, risk_rate, total_records) for ages
+        0..DENSE_AGE_MAX, including the cross-ethnicity mean under AVERAGE_KEY
+    """
+    groups = baseline.assign(midpoint=age_group_midpoints(baseline["age"])).dropna(subset=["midpoint"])
+    rates = groups.pivot_table(index="ethnicity", columns="midpoint", values="risk_rate", aggfunc="mean")
+    records = groups.pivot_table(index="ethnicity", columns="midpoint", values="total_records", aggfunc="sum")
+    records = records.reindex(index=rates.index, columns=rates.columns)
+    x = rates.columns.to_numpy(dtype=float)
+    ages = np.arange(DENSE_AGE_MAX + 1, dtype=float)
+
+    dense_rates = _interpolate(x, rates.to_numpy(dtype=float), ages)
+    # Group size behind each interpolated rate, used for sampling uncertainty
+    dense_records = _interpolate(x, records.to_numpy(dtype=float), ages)
+
+    ethnicities = list(rates.index) + [AVERAGE_KEY]
+    dense_rates = np.vstack([dense_rates, np.nanmean(dense_rates, axis=0)])
+    dense_records = np.vstack([dense_records, np.nansum(dense_records, axis=0)])
+
+    return pd.DataFrame({
+        "ethnicity": np.repeat(ethnicities, len(ages)),
+        "age": np.tile(ages.astype(int), len(ethnicities)),
+        "risk_rate": dense_rates.ravel(),
+        "total_records": dense_records.ravel(),
+    }).dropna(subset=["risk_rate"])
+
+
+def build_risk_baseline(db_path: str = DB_PATH, snapshot_path: str = SNAPSHOT_PATH,
+                        progress: Optional[Callable[[str], None]] = None):
+    # progress, if given, is called between steps; an exception it raises stops the build
+    conn = sqlite3.connect(db_path)
+
+    # Load the risk_factors table; compacted rows stand for `records` source rows
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(risk_factors)")}
+    records = "COALESCE(records, 1)" if "records" in columns else "1"
+    df = pd.read_sql_query(f"SELECT age, ethnicity, cases, {records} AS records FROM risk_factors", conn)
+
+    if progress:
+        progress("baseline")
 
     # Drop rows with missing values
     df = df.dropna(subset=["age", "ethnicity", "cases"])
@@ -18,7 +84,7 @@ def build_risk_baseline():
         df.groupby(["age", "ethnicity"])
         .agg(
             total_cases=("cases", "sum"),
-            total_records=("cases", "count")
+            total_records=("records", "sum")
         )
         .reset_index()
     )
@@ -29,10 +95,18 @@ def build_risk_baseline():
     # Save to SQLite table
     baseline.to_sql("risk_baseline", conn, if_exists="replace", index=False)
 
+    # One row per year of age so scoring can index instead of searching
+    dense = build_dense_baseline(baseline)
+    dense.to_sql("risk_baseline_dense", conn, if_exists="replace", index=False)
+
     print("Risk baseline table created successfully.")
 
     conn.close()
+    if progress:
+        progress("snapshot")
+
+    # Memory-mapped copy the API workers share
+    build_scoring_snapshot(db_path, snapshot_path)
 
 if __name__ == "__main__":
     build_risk_baseline()
-
@@ -0,0 +1,57 @@
+import sqlite3
+import logging
+
+import numpy as np
+
+from backend.scoring_core import DENSE_AGE_MAX, CHART_AGE_MIN, CHART_AGE_MAX
+from backend.snapshot import SNAPSHOT_PATH, write_snapshot
+from backend.etl.population_scores import N_AGE_BANDS, score_distributions
+from backend.etl.location_baseline import INCIDENCE_DIR, location_tables
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "backend/data/processed/breast_cancer_risk.db"
+
+
+def build_scoring_snapshot(db_path: str = DB_PATH, snapshot_path: str = SNAPSHOT_PATH,
+                           incidence_dir: str = INCIDENCE_DIR) -> None:
+    """
+    Pack the dense baseline curves into the memory-mapped scoring snapshot.
+
+    Arrays:
+        baseline: float64 (ethnicity x age) risk rates, ages 0..DENSE_AGE_MAX
+        records: float64 (ethnicity x age) group sizes behind each rate
+        percentile_*: population score distributions, see population_scores
+        location_*: location adjustment of the baseline, see location_baseline
+    """
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT ethnicity, age, risk_rate, total_records FROM risk_baseline_dense"
+        ).fetchall()
+    if not rows:
+        raise ValueError("risk_baseline_dense is empty; run build_baseline first")
+
+    ethnicities = sorted({row[0] for row in rows})
+    index = {ethnicity: i for i, ethnicity in enumerate(ethnicities)}
+    baseline = np.full((len(ethnicities), DENSE_AGE_MAX + 1), np.nan)
+    records = np.zeros((len(ethnicities), DENSE_AGE_MAX + 1))
+    for ethnicity, age, rate, total_records in rows:
+        baseline[index[ethnicity], age] = rate
+        records[index[ethnicity], age] = total_records or 0
+
+    arrays = {"baseline": baseline, "records": records}
+    arrays.update(score_distributions(db_path, baseline, ethnicities))
+    location_arrays, location_meta = location_tables(ethnicities, incidence_dir)
+    arrays.update(location_arrays)
+
+    write_snapshot(snapshot_path, arrays, dict({
+        "ethnicities": ethnicities,
+        "age_bands": N_AGE_BANDS,
+        "dense_age_max": DENSE_AGE_MAX,
+        "chart_ages": [CHART_AGE_MIN, CHART_AGE_MAX],
+    }, **location_meta))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_scoring_snapshot()
@@ -0,0 +1,92 @@
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+import logging
+from backend.etl.transform import MODEL_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_COLUMN = 'cases'
+# Number of source rows merged into each compacted row
+RECORDS_COLUMN = 'records'
+
+
+class RecordCompactor:
+    """
+    Collapse rows with identical covariates into one row per combination.
+
+    The BCSC files are count-weighted tables, so rows that agree on every
+    covariate only differ in their count. Chunks are hash-aggregated
+    (unsorted groupby, NA kept as its own value) into a running frame
+    carrying the summed weight and the number of source rows in
+    RECORDS_COLUMN, so memory grows with the number of distinct
+    combinations rather than with the input. RiskForm placeholder columns
+    that are entirely NA are dropped at the end.
+    """
+
+    def __init__(self, weight_column: str = WEIGHT_COLUMN):
+        self.weight_column = weight_column
+        self.rows_in = 0
+        self._compacted: Optional[pd.DataFrame] = None
+
+    def _aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        keys = [col for col in df.columns if col not in (self.weight_column, RECORDS_COLUMN)]
+        return (
+            df.groupby(keys, dropna=False, sort=False)[[self.weight_column, RECORDS_COLUMN]]
+            .sum()
+            .reset_index()
+        )
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Fold a transformed chunk into the running compacted frame."""
+        self.rows_in += len(chunk)
+        partial = self._aggregate(chunk.assign(**{RECORDS_COLUMN: 1}))
+        if self._compacted is None:
+            self._compacted = partial
+        else:
+            self._compacted = self._aggregate(pd.concat([self._compacted, partial], ignore_index=True))
+
+    def result(self) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, Any]]: Compacted data and a report with
+            row counts, the compression ratio and the dropped columns
+        """
+        compacted = self._compacted if self._compacted is not None else pd.DataFrame()
+        # A column is all-NA in the compacted rows exactly when it was in the input
+        placeholders = [
+            col for col in compacted.columns
+            if col not in (self.weight_column, RECORDS_COLUMN) and col not in MODEL_COLUMNS
+            and compacted[col].isna().all()
+        ]
+        if placeholders:
+            # NA was a single group in those columns, so no rows merge
+            compacted = compacted.drop(columns=placeholders)
+
+        report = {
+            'rows_in': self.rows_in,
+            'rows_out': len(compacted),
+            'compression_ratio': round(self.rows_in / len(compacted), 3) if len(compacted) else None,
+            'dropped_columns': sorted(placeholders),
+        }
+        logger.info(
+            f"Compacted {report['rows_in']} rows into {report['rows_out']} "
+            f"(ratio {report['compression_ratio']}), dropped {len(placeholders)} all-NA columns"
+        )
+        return compacted, report
+
+
+def compact_records(df: pd.DataFrame, weight_column: str = WEIGHT_COLUMN) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Compact a whole transformed DataFrame in one go (see RecordCompactor).
+
+    Args:
+        df: Transformed DataFrame
+        weight_column: Count column to sum
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, Any]]: Compacted data and a report with
+        row counts, the compression ratio and the dropped columns
+    """
+    compactor = RecordCompactor(weight_column)
+    compactor.add(df)
+    return compactor.result()
@@ -0,0 +1,69 @@
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from backend.scoring_core import SNAPSHOT_VERSION, DENSE_AGE_MAX
+from backend.etl.location_baseline import INCIDENCE_DIR, location_tables
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "backend/data/processed/breast_cancer_risk.db"
+SNAPSHOT_PATH = "frontend/data/baseline_snapshot.json"
+
+
+def export_baseline_snapshot(db_path: str = DB_PATH, snapshot_path: str = SNAPSHOT_PATH,
+                             incidence_dir: str = INCIDENCE_DIR) -> dict:
+    """
+    Export the dense baseline curves (risk_baseline_dense) to the JSON snapshot used for local scoring.
+
+    The location adjustment is exported too, in the layout of the scoring
+    snapshot (see location_baseline), so local scores match /score.
+
+    Args:
+        db_path: SQLite database containing risk_baseline_dense
+        snapshot_path: Destination JSON file
+        incidence_dir: Directory with the incidence tables
+
+    Returns:
+        dict: The snapshot that was written
+    """
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT ethnicity, age, risk_rate FROM risk_baseline_dense ORDER BY ethnicity, age"
+        ).fetchall()
+
+    ethnicities = {}
+    for ethnicity, age, rate in rows:
+        curve = ethnicities.setdefault(ethnicity, [None] * (DENSE_AGE_MAX + 1))
+        curve[age] = float(rate)
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "generated_at": datetime.utcnow().isoformat(),
+        "ethnicities": ethnicities,
+    }
+    location_ethnicities = sorted(ethnicities)
+    location_arrays, location_meta = location_tables(location_ethnicities, incidence_dir)
+    if location_arrays:
+        snapshot.update({
+            "location_ethnicities": location_ethnicities,
+            "location_curves": location_arrays["location_curves"].tolist(),
+            "location_index": location_arrays["location_index"].tolist(),
+            "location_level": location_arrays["location_level"].tolist(),
+        }, **location_meta)
+
+    path = Path(snapshot_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(path)
+
+    logger.info(f"Wrote baseline snapshot with {len(rows)} rows to {path}")
+    return snapshot
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    export_baseline_snapshot()
@@ -1,8 +1,16 @@
 import pandas as pd
+import numpy as np
 import os
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
 import logging
 
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 100_000
+# A stratum keeps up to this many times its current proportional share
+# while streaming, so later shifts in the stratum weights can still be met
+RESERVOIR_SLACK = 2.0
+
 def extract_csv_data(filepaths: List[str]) -> pd.DataFrame:
     """
     Extract and concatenate multiple CSV files with identical structure.
@@ -42,6 +50,132 @@ def extract_csv_data(filepaths: List[str]) -> pd.DataFrame:
         raise RuntimeError(f"Unexpected error during extraction: {e}")
 
 
+def iter_csv_chunks(filepaths: List[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Read multiple CSV files with identical structure chunk by chunk.
+
+    Args:
+        filepaths: List of paths to CSV files
+        chunk_size: Rows read per chunk
+
+    Yields:
+        Tuple[str, pd.DataFrame]: Source file and one chunk of its rows
+
+    Raises:
+        RuntimeError: If extraction fails for any file
+    """
+    try:
+        for filepath in filepaths:
+            if not os.path.exists(filepath):
+                raise FileNotFoundError(f"Data file not found: {filepath}")
+
+            for chunk in pd.read_csv(filepath, chunksize=chunk_size):
+                yield filepath, chunk
+
+    except pd.errors.EmptyDataError:
+        raise ValueError("One or more CSV files appear to be empty")
+    except pd.errors.ParserError:
+        raise ValueError("Failed to parse CSV file - may be malformed")
+    except Exception as e:
+        raise RuntimeError(f"Unexpected error during extraction: {e}")
+
+
+def _allocate(sample_size: int, stratum_weights: pd.Series) -> pd.Series:
+    """Split sample_size across strata in proportion to weight (largest remainder)."""
+    share = sample_size * stratum_weights / stratum_weights.sum()
+    allocation = np.floor(share).astype(int)
+    remainder = sample_size - allocation.sum()
+    if remainder > 0:
+        allocation[(share - allocation).nlargest(int(remainder)).index] += 1
+    return allocation
+
+
+def _trim_reservoir(kept: pd.DataFrame, caps: pd.Series) -> pd.DataFrame:
+    """Keep the highest-key rows of each stratum, up to its cap."""
+    kept = kept.sort_values(["_stratum", "_key"], ascending=[True, False], kind="stable")
+    rank = kept.groupby("_stratum", sort=False).cumcount().to_numpy()
+    return kept[rank < kept["_stratum"].map(caps).fillna(0).to_numpy()]
+
+
+def extract_csv_sample(filepaths: List[str], sample_size: int,
+                       strata: Optional[Sequence[str]] = None,
+                       weight_column: Optional[str] = None,
+                       seed: Optional[int] = None,
+                       chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Draw a sample while reading the CSV files, without loading them whole.
+
+    Each stratum keeps the rows with the highest random keys, a uniform
+    reservoir sample. Strata receive sample_size in proportion to their
+    total weight. Rows are drawn uniformly within a stratum rather than by
+    weight because every drawn row keeps its own weight (cases): a
+    weight-proportional draw would count the weight twice and inflate
+    per-stratum rates such as sum(cases) / records. Memory stays around
+    RESERVOIR_SLACK * sample_size rows plus one chunk.
+
+    Args:
+        filepaths: CSV files with identical structure
+        sample_size: Number of rows to return (fewer if the input is smaller)
+        strata: Columns whose value combinations are sampled separately
+        weight_column: Column with row weights (e.g. 'count') used to
+            allocate the strata. None allocates them by row count.
+        seed: Seed for a reproducible sample
+        chunk_size: Rows read per chunk
+
+    Returns:
+        pd.DataFrame: The sampled rows
+
+    Raises:
+        RuntimeError: If extraction fails for any file
+    """
+    rng = np.random.default_rng(seed)
+    strata = list(strata or [])
+    kept = None
+    stratum_weights = pd.Series(dtype=float)
+
+    try:
+        for filepath in filepaths:
+            if not os.path.exists(filepath):
+                raise FileNotFoundError(f"Data file not found: {filepath}")
+
+            for chunk in pd.read_csv(filepath, chunksize=chunk_size):
+                missing = set(strata + ([weight_column] if weight_column else [])) - set(chunk.columns)
+                if missing:
+                    raise ValueError(f"Sampling columns missing from {filepath}: {missing}")
+
+                if weight_column:
+                    weights = pd.to_numeric(chunk[weight_column], errors="coerce").fillna(0).to_numpy(dtype=float)
+                else:
+                    weights = np.ones(len(chunk))
+                draws = rng.random(len(chunk))
+                stratum = pd.Series("", index=chunk.index)
+                for column in strata:
+                    stratum = stratum + "|" + chunk[column].astype(str)
+
+                chunk = chunk.assign(_stratum=stratum, _key=draws)
+                stratum_weights = stratum_weights.add(
+                    pd.Series(weights, index=chunk.index).groupby(stratum).sum(), fill_value=0
+                )
+                kept = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+
+                share = sample_size * stratum_weights / stratum_weights.sum()
+                kept = _trim_reservoir(kept, np.ceil(share * RESERVOIR_SLACK).astype(int) + 1)
+
+        if kept is None or kept.empty:
+            raise ValueError("No rows to sample")
+
+        sample = _trim_reservoir(kept, _allocate(sample_size, stratum_weights))
+        logger.info(f"Sampled {len(sample)} rows from {len(stratum_weights)} strata")
+        return sample.drop(columns=["_stratum", "_key"]).reset_index(drop=True)
+
+    except pd.errors.EmptyDataError:
+        raise ValueError("One or more CSV files appear to be empty")
+    except pd.errors.ParserError:
+        raise ValueError("Failed to parse CSV file - may be malformed")
+    except Exception as e:
+        raise RuntimeError(f"Unexpected error during extraction: {e}")
+
+
 def validate_extracted_data(df: pd.DataFrame) -> bool:
     """
     Validate that extracted data contains required columns.
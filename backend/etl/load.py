@@ -1,13 +1,42 @@
 import sqlite3
 import os
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 import logging
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows inserted between progress callbacks
+LOAD_BATCH = 50_000
+
+# Declared types of the risk_factors columns; others are inferred from the dtype
+RISK_FACTOR_TYPES = {
+    'age': 'INTEGER',
+    'gender': 'TEXT',
+    'ethnicity': 'TEXT',
+    'age_menarche': 'INTEGER',
+    'menopause': 'TEXT',
+    'age_menopause': 'INTEGER',
+    'pregnancy': 'TEXT',
+    'pregnancy_age': 'INTEGER',
+    'breastfeeding': 'TEXT',
+    'hormonal_use': 'TEXT',
+    'relatives_with_cancer': 'INTEGER',
+    'brca_known': 'TEXT',
+    'breast_density': 'TEXT',
+    'cases': 'INTEGER',
+}
+
+def column_type(series: pd.Series) -> str:
+    """Infer SQLite type from pandas dtype (basic heuristic)."""
+    if pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
+
 def add_missing_columns(conn: sqlite3.Connection, table_name: str, df: pd.DataFrame) -> None:
     """
     Check and add missing columns in SQLite table based on DataFrame columns.
@@ -17,25 +46,21 @@ def add_missing_columns(conn: sqlite3.Connection, table_name: str, df: pd.DataFr
 
     for col in df.columns:
         if col not in existing_columns:
-            # Infer SQLite type from pandas dtype (basic heuristic)
-            if pd.api.types.is_integer_dtype(df[col]):
-                col_type = 'INTEGER'
-            elif pd.api.types.is_float_dtype(df[col]):
-                col_type = 'REAL'
-            else:
-                col_type = 'TEXT'
-
+            col_type = column_type(df[col])
             sql = f'ALTER TABLE {table_name} ADD COLUMN {col} {col_type};'
             conn.execute(sql)
             logger.info(f"Added missing column '{col}' with type '{col_type}' to {table_name}")
 
-def load_to_sqlite(df: pd.DataFrame, db_path: str = "breast_cancer_data.db") -> None:
+def load_to_sqlite(df: pd.DataFrame, db_path: str = "breast_cancer_data.db",
+                   progress: Optional[Callable[[str, int, Optional[int]], None]] = None) -> None:
     """
     Load transformed data into SQLite database with proper schema.
     
     Args:
         df: Transformed DataFrame
         db_path: Path to SQLite database file
+        progress: Optional callback, called after every LOAD_BATCH rows;
+            an exception it raises rolls the load back
         
     Raises:
         RuntimeError: If database operations fail
@@ -45,26 +70,15 @@ def load_to_sqlite(df: pd.DataFrame, db_path: str = "breast_cancer_data.db") ->
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         with sqlite3.connect(db_path) as conn:
-            # Create tables matching our data model
-            conn.execute('''
+            # Create the table from the frame, so columns compaction dropped don't exist
+            columns = ', '.join(
+                f'{col} {RISK_FACTOR_TYPES.get(col) or column_type(df[col])}' for col in df.columns
+            )
+            conn.execute(f'''
                 CREATE TABLE IF NOT EXISTS risk_factors (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-                    age INTEGER,
-                    gender TEXT,
-                    ethnicity TEXT,
-                    age_menarche INTEGER,
-                    menopause TEXT,
-                    age_menopause INTEGER,
-                    pregnancy TEXT,
-                    pregnancy_age INTEGER,
-                    breastfeeding TEXT,
-                    hormonal_use TEXT,
-                    relatives_with_cancer INTEGER,
-                    brca_known TEXT,
-                    breast_density TEXT,
-                    cases INTEGER,
-                    raw_data TEXT
+                    {columns}
                 )
             ''')
             
@@ -84,18 +98,21 @@ def load_to_sqlite(df: pd.DataFrame, db_path: str = "breast_cancer_data.db") ->
             add_missing_columns(conn, 'risk_factors', df)
 
             # Insert data
-            df.to_sql(
-                'risk_factors',
-                conn,
-                if_exists='append',
-                index=False,
-                dtype={
-                    'age': 'INTEGER',
-                    'age_menarche': 'INTEGER',
-                    'relatives_with_cancer': 'INTEGER',
-                    'cases': 'INTEGER'
-                }
-            )
+            for start in range(0, len(df), LOAD_BATCH):
+                df.iloc[start:start + LOAD_BATCH].to_sql(
+                    'risk_factors',
+                    conn,
+                    if_exists='append',
+                    index=False,
+                    dtype={
+                        'age': 'INTEGER',
+                        'age_menarche': 'INTEGER',
+                        'relatives_with_cancer': 'INTEGER',
+                        'cases': 'INTEGER'
+                    }
+                )
+                if progress:
+                    progress('load', min(start + LOAD_BATCH, len(df)), len(df))
             
         logger.info(f"Successfully loaded {len(df)} records to {db_path}")
         
@@ -105,6 +122,26 @@ def load_to_sqlite(df: pd.DataFrame, db_path: str = "breast_cancer_data.db") ->
         raise RuntimeError(f"Unexpected error during load: {e}")
 
 
+def load_quarantine(df: pd.DataFrame, db_path: str, table_name: str = "risk_factors_quarantine") -> None:
+    """
+    Append rejected raw rows (with their reason, source file and run id)
+    to the quarantine table, creating or widening it as needed.
+    """
+    try:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with sqlite3.connect(db_path) as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+            ).fetchone()
+            if exists:
+                add_missing_columns(conn, table_name, df)
+            df.to_sql(table_name, conn, if_exists='append', index=False)
+
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Database operation failed: {e}")
+
+
 def create_analysis_tables(conn: sqlite3.Connection) -> None:
     """
     Create additional tables for analysis results.
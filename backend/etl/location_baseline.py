@@ -0,0 +1,177 @@
+"""
+Location adjustment of the BCSC baseline from national incidence tables.
+
+BCSC rates describe a US screening population, so other locations are
+scaled by the ratio of their age-specific incidence to the US incidence
+at the same age (and ethnicity, where both tables have it). Input lives
+in INCIDENCE_DIR:
+
+    *.csv (every file except REGIONS_FILE):
+        location    ISO 3166-1 country code (alpha-3, alpha-2 or numeric)
+                    or a UN M49 region code such as 034 (Southern Asia)
+        ethnicity   optional, as in the form's ethnicity options; blank
+                    means all ethnicities
+        age_start, age_end, rate
+                    rate in any unit shared by all files, e.g. GLOBOCAN
+                    cases per 100,000 person-years
+    REGIONS_FILE:
+        region, country
+                    M49 region membership, most specific region first
+
+For every country and ethnicity the first available curve in
+LOCATION_LEVELS is chosen at build time, so scoring does a single lookup.
+Curves are deduplicated: the snapshot stores `location_curves` (ratio per
+year of age), `location_index` (country x ethnicity -> curve row, -1 for
+the plain BCSC baseline) and `location_level`, plus a meta map from
+lower-cased country name, alpha-2 and alpha-3 code to the country row.
+"""
+import logging
+import os
+from glob import glob
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pycountry
+
+from backend.scoring_core import DENSE_AGE_MAX, AVERAGE_KEY
+
+logger = logging.getLogger(__name__)
+
+INCIDENCE_DIR = "backend/data/raw/incidence"
+REGIONS_FILE = "region_members.csv"
+# Country whose incidence matches the BCSC cohort
+REFERENCE_LOCATION = "USA"
+LOCATION_LEVELS = ("country_ethnicity", "country", "region_ethnicity", "region", "bcsc")
+BCSC_CURVE = -1
+
+
+def location_key(code: Any) -> Optional[str]:
+    """Country code -> ISO alpha-3; M49 region code -> "M49:xxx"; None if unknown."""
+    code = str(code).strip()
+    if code.isdigit():
+        country = pycountry.countries.get(numeric=code.zfill(3))
+        return country.alpha_3 if country else f"M49:{code.zfill(3)}"
+    country = pycountry.countries.get(alpha_3=code.upper()) or pycountry.countries.get(alpha_2=code.upper())
+    return country.alpha_3 if country else None
+
+
+def load_incidence(incidence_dir: str = INCIDENCE_DIR) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+    """
+    Read the incidence tables and region membership.
+
+    Returns:
+        Tuple of (location, ethnicity, age_start, age_end, rate) rows, with
+        ethnicity None for all-ethnicity rates, and country -> regions
+    """
+    frames = []
+    for path in sorted(glob(os.path.join(incidence_dir, "*.csv"))):
+        if os.path.basename(path) == REGIONS_FILE:
+            continue
+        frame = pd.read_csv(path, dtype={"location": str, "ethnicity": str})
+        missing = {"location", "age_start", "age_end", "rate"} - set(frame.columns)
+        if missing:
+            raise ValueError(f"Incidence table {path} lacks {sorted(missing)}")
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["location", "ethnicity", "age_start", "age_end", "rate"]), {}
+
+    incidence = pd.concat(frames, ignore_index=True)
+    if "ethnicity" not in incidence.columns:
+        incidence["ethnicity"] = None
+    incidence["ethnicity"] = incidence["ethnicity"].where(incidence["ethnicity"].notna(), None)
+    incidence["location"] = incidence["location"].map(location_key)
+    unknown = incidence["location"].isna()
+    if unknown.any():
+        logger.warning(f"Skipping {int(unknown.sum())} incidence rows with unknown location codes")
+    incidence = incidence[~unknown & (incidence["rate"] >= 0)]
+
+    regions: Dict[str, List[str]] = {}
+    regions_path = os.path.join(incidence_dir, REGIONS_FILE)
+    if os.path.exists(regions_path):
+        members = pd.read_csv(regions_path, dtype=str)
+        for region, country in zip(members["region"], members["country"]):
+            country, region = location_key(country), location_key(region)
+            if country and region:
+                regions.setdefault(country, []).append(region)
+    return incidence[["location", "ethnicity", "age_start", "age_end", "rate"]], regions
+
+
+def incidence_curves(incidence: pd.DataFrame) -> Dict[Tuple[str, Optional[str]], np.ndarray]:
+    """(location, ethnicity or None) -> rate per year of age 0..DENSE_AGE_MAX."""
+    ages = np.arange(DENSE_AGE_MAX + 1)
+    curves = {}
+    incidence = incidence.assign(midpoint=(incidence["age_start"] + incidence["age_end"] + 1) / 2)
+    for (location, ethnicity), group in incidence.groupby(["location", "ethnicity"], dropna=False, sort=False):
+        group = group.groupby("midpoint")["rate"].mean()
+        # Ages outside the table take the nearest group's rate
+        curves[(location, None if pd.isna(ethnicity) else ethnicity)] = np.interp(
+            ages, group.index.to_numpy(dtype=float), group.to_numpy(dtype=float))
+    return curves
+
+
+def location_tables(ethnicities: List[str],
+                    incidence_dir: str = INCIDENCE_DIR) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Arrays and meta for the snapshot; both empty without incidence data.
+
+    Args:
+        ethnicities: Snapshot baseline rows, in order
+        incidence_dir: Directory with the incidence tables
+    """
+    incidence, regions = load_incidence(incidence_dir)
+    curves = incidence_curves(incidence)
+    reference = curves.get((REFERENCE_LOCATION, None))
+    if reference is None:
+        if curves:
+            logger.warning(f"No all-ethnicity incidence for {REFERENCE_LOCATION}; location baselines skipped")
+        return {}, {}
+
+    ratios: List[np.ndarray] = []
+    rows: Dict[Tuple[str, Optional[str]], int] = {}
+
+    def curve_row(location: str, ethnicity: Optional[str]) -> Optional[int]:
+        key = (location, ethnicity)
+        if key not in curves:
+            return None
+        if key not in rows:
+            denominator = curves.get((REFERENCE_LOCATION, ethnicity), reference)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(denominator > 0, curves[key] / denominator, 1.0)
+            rows[key] = len(ratios)
+            ratios.append(ratio)
+        return rows[key]
+
+    countries = sorted(pycountry.countries, key=lambda country: country.alpha_3)
+    index = np.full((len(countries), len(ethnicities)), BCSC_CURVE, dtype=np.int32)
+    level = np.full(index.shape, LOCATION_LEVELS.index("bcsc"), dtype=np.int8)
+    aliases = {}
+    for i, country in enumerate(countries):
+        for alias in (country.alpha_3, country.alpha_2, country.name):
+            aliases[alias.lower()] = i
+        if country.alpha_3 == REFERENCE_LOCATION:
+            continue  # BCSC already is the US baseline
+        candidates = [(country.alpha_3, "country")] + [(region, "region") for region in regions.get(country.alpha_3, [])]
+        for j, ethnicity in enumerate(ethnicities):
+            own = None if ethnicity == AVERAGE_KEY else ethnicity
+            lookups = []
+            for location, kind in candidates:
+                if own is not None:
+                    lookups.append((location, own, f"{kind}_ethnicity"))
+                lookups.append((location, None, kind))
+            for location, key, name in lookups:
+                row = curve_row(location, key)
+                if row is not None:
+                    index[i, j], level[i, j] = row, LOCATION_LEVELS.index(name)
+                    break
+
+    if not ratios:
+        return {}, {}
+    covered = int((index != BCSC_CURVE).any(axis=1).sum())
+    logger.info(f"Location baselines: {len(ratios)} curves covering {covered} of {len(countries)} countries")
+    arrays = {
+        "location_curves": np.vstack(ratios),
+        "location_index": index,
+        "location_level": level,
+    }
+    return arrays, {"locations": aliases, "location_levels": list(LOCATION_LEVELS)}
@@ -1,11 +1,15 @@
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator, Tuple
+from datetime import datetime
+import pandas as pd
 import logging
 import os
 import sys
-from backend.etl.extract import extract_csv_data, validate_extracted_data
-from backend.etl.transform import clean_and_transform, validate_transformed_data
-from backend.etl.load import load_to_sqlite
+from backend.etl.extract import CHUNK_SIZE, iter_csv_chunks, extract_csv_sample, validate_extracted_data
+from backend.etl.transform import clean_and_transform
+from backend.etl.quality import QualityReport, coerce_codes
+from backend.etl.compact import RecordCompactor
+from backend.etl.load import load_to_sqlite, load_quarantine
 
 # Configure logging
 logging.basicConfig(
@@ -14,6 +18,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+QUALITY_REPORT = 'backend/data/processed/quality_report.json'
+
+DEFAULT_CONFIG = {
+    'raw_data_dir': 'backend/data/raw',
+    'db_path': 'backend/data/processed/breast_cancer_risk.db',
+    'sample_size': 0,  # 0 for all records
+    'sample_strata': ['race_eth', 'age_group_5_years'],
+    'sample_weight': 'count',  # Allocates the strata; None allocates them by row count
+    'sample_seed': 42,
+    'compact': True,  # Collapse identical covariate rows before loading
+    'chunk_size': CHUNK_SIZE,
+    'quality_report': QUALITY_REPORT
+}
+
+# Called as progress(stage, rows done, total rows or None) while the pipeline runs
+Progress = Callable[[str, int, Optional[int]], None]
+
 def get_data_files(raw_data_dir: str) -> List[str]:
     """Get list of data files to process"""
     return [
@@ -21,9 +42,52 @@ def get_data_files(raw_data_dir: str) -> List[str]:
         for i in range(3)  # For files 0, 1, and 2
     ]
 
-def run_etl_pipeline(config: Dict[str, Any]) -> None:
+def extract_and_transform(chunks: Iterable[Tuple[str, pd.DataFrame]], report: QualityReport,
+                          db_path: str, run_id: str,
+                          progress: Optional[Progress] = None) -> Iterator[pd.DataFrame]:
+    """
+    Check and transform raw chunks in one pass, quarantining rejected rows.
+
+    Args:
+        chunks: (source file, raw rows) pairs
+        report: Quality report accumulating the checks
+        db_path: Database receiving the quarantine table
+        run_id: Identifier stored with quarantined rows
+        progress: Optional callback, called after every chunk
+
+    Yields:
+        pd.DataFrame: Transformed rows of each chunk that passed every check
+    """
+    for source, chunk in chunks:
+        validate_extracted_data(chunk)
+
+        reasons = report.check_raw(chunk)
+        passed = reasons == ""
+        transformed = clean_and_transform(coerce_codes(chunk[passed]))
+        reasons[passed] = report.check_transformed(transformed)
+        passed = reasons == ""
+        report.record(reasons, source)
+
+        if not passed.all():
+            load_quarantine(
+                chunk[~passed].assign(reason=reasons[~passed], source_file=source, run_id=run_id),
+                db_path
+            )
+        accepted = transformed[passed[transformed.index]]
+        if progress:
+            progress('extract', report.rows, None)
+        if len(accepted):
+            yield accepted
+
+
+def run_etl_pipeline(config: Dict[str, Any], progress: Optional[Progress] = None) -> None:
     """
     Run complete ETL pipeline with multiple input files of identical structure.
+
+    Chunks are compacted (or, with compact off, loaded) as they are
+    extracted, so memory does not grow with the input. progress, if given,
+    is called per extracted chunk and at every stage boundary; an exception
+    it raises stops the pipeline.
     """
     try:
         logger.info("Starting ETL pipeline for multiple CSV files")
@@ -32,28 +96,57 @@ def run_etl_pipeline(config: Dict[str, Any]) -> None:
         data_files = get_data_files(config['raw_data_dir'])
         logger.info(f"Processing files: {', '.join(data_files)}")
         
-        # Extract from all files
-        logger.info("Extracting and combining data")
-        raw_data = extract_csv_data(data_files)
-        validate_extracted_data(raw_data)
-        
-        # Optionally sample data for testing
+        # Extract, check and transform chunk by chunk, optionally sampling while reading
         if config.get('sample_size', 0) > 0:
-            raw_data = raw_data.sample(
-                min(config['sample_size'], len(raw_data))
-            )
-            logger.info(f"Sampled {len(raw_data)} records")
-        
-        # Transform
-        logger.info("Transforming data")
-        transformed_data = clean_and_transform(raw_data)
-        validate_transformed_data(transformed_data)
-        
-        # Load
-        logger.info(f"Loading data to {config['db_path']}")
-        load_to_sqlite(transformed_data, config['db_path'])
-        
-        logger.info(f"ETL pipeline completed successfully. Processed {len(transformed_data)} records.")
+            logger.info(f"Extracting a sample of {config['sample_size']} records")
+            chunks = [('sample', extract_csv_sample(
+                data_files,
+                config['sample_size'],
+                strata=config.get('sample_strata'),
+                weight_column=config.get('sample_weight'),
+                seed=config.get('sample_seed')
+            ))]
+        else:
+            logger.info("Extracting and transforming data")
+            chunks = iter_csv_chunks(data_files, config.get('chunk_size', CHUNK_SIZE))
+
+        run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        report = QualityReport()
+        compactor = RecordCompactor() if config.get('compact', True) else None
+        if compactor is None:
+            logger.info(f"Loading data to {config['db_path']} as it is extracted")
+        # Only one chunk plus the running compacted rows are held in memory
+        rows = 0
+        for accepted in extract_and_transform(chunks, report, config['db_path'], run_id, progress):
+            rows += len(accepted)
+            if compactor is not None:
+                compactor.add(accepted)
+            else:
+                load_to_sqlite(accepted, config['db_path'])
+
+        report_path = config.get('quality_report', QUALITY_REPORT)
+        report.write(report_path, run_id)
+        logger.info(
+            f"Quality report written to {report_path}: {report.rejected} of {report.rows} "
+            f"rows quarantined"
+        )
+        if rows == 0:
+            raise ValueError("No rows passed the quality checks")
+
+        # Load the repeated covariate combinations as count-weighted rows
+        if compactor is not None:
+            if progress:
+                progress('compact', 0, rows)
+            transformed_data, compaction = compactor.result()
+            logger.info(f"Compaction report: {compaction}")
+
+            logger.info(f"Loading data to {config['db_path']}")
+            if progress:
+                progress('load', 0, len(transformed_data))
+            load_to_sqlite(transformed_data, config['db_path'], progress)
+            rows = len(transformed_data)
+
+        logger.info(f"ETL pipeline completed successfully. Processed {rows} records.")
         
     except Exception as e:
         logger.error(f"ETL pipeline failed: {e}")
@@ -61,11 +154,7 @@ def run_etl_pipeline(config: Dict[str, Any]) -> None:
 
 
 if __name__ == "__main__":
-    config = {
-        'raw_data_dir': 'backend/data/raw',
-        'db_path': 'backend/data/processed/breast_cancer_risk.db',
-        'sample_size': 0  # 0 for all records
-    }
+    config = dict(DEFAULT_CONFIG)
     
     # Ensure output directory exists
     Path(config['db_path']).parent.mkdir(parents=True, exist_ok=True)
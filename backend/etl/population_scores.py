@@ -0,0 +1,112 @@
+"""
+Population risk distributions for percentile lookups.
+
+Every risk_factors record is scored with the rule multipliers in one
+vectorized pass per chunk. Records are then collapsed, per (ethnicity, age
+band), to their distinct scores with the cumulative share of the record
+weight, so scoring can place a user with a binary search. Every record is
+also counted under AVERAGE_KEY.
+"""
+import sqlite3
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring_batch import batch_adjustment_factors, combined_multiplier
+from backend.scoring_core import DEFAULT_BASELINE, DENSE_AGE_MAX, AVERAGE_KEY, NEUTRAL_ANSWERS
+from backend.etl.utils import AGE_GROUP_BOUNDS, age_group_midpoints
+
+CHUNK_SIZE = 500_000
+# BCSC age bands; band b holds age_group_code b + 1
+N_AGE_BANDS = len(AGE_GROUP_BOUNDS)
+
+# BCSC codes -> a representative answer in years
+MENARCHE_YEARS = {0: 14, 1: 12, 2: 11}
+FIRST_BIRTH_YEARS = {0: 18, 1: 22, 2: 27, 3: 32}
+NULLIPAROUS_CODE = 4
+
+
+def population_forms(chunk: pd.DataFrame, ages: np.ndarray) -> Dict[str, np.ndarray]:
+    """risk_factors rows -> the column batch batch_adjustment_factors expects."""
+    n = len(chunk)
+    first_birth = pd.to_numeric(chunk["pregnancy_age"], errors="coerce")
+    batch = {field: np.full(n, answer, dtype=object) for field, answer in NEUTRAL_ANSWERS.items()}
+    batch.update(
+        age=ages,
+        relatives_with_cancer=pd.to_numeric(chunk["relatives_with_cancer"], errors="coerce").fillna(0).to_numpy(),
+        age_menarche=pd.to_numeric(chunk["age_menarche"], errors="coerce").map(MENARCHE_YEARS).fillna(13).to_numpy(),
+        menopause=chunk["menopause"].fillna("Not sure").to_numpy(dtype=object),
+        age_menopause=np.full(n, np.nan),
+        hormonal_use=chunk["hormonal_use"].fillna("Not sure").to_numpy(dtype=object),
+        breast_density=chunk["breast_density"].fillna("Don't know").to_numpy(dtype=object),
+        pregnancy=np.where(first_birth == NULLIPAROUS_CODE, "No",
+                           np.where(first_birth.isin(list(FIRST_BIRTH_YEARS)), "Yes", "Prefer not to say")).astype(object),
+        pregnancy_age=first_birth.map(FIRST_BIRTH_YEARS).to_numpy(dtype=float),
+    )
+    return batch
+
+
+def score_distributions(db_path: str, baseline: np.ndarray, ethnicities: List[str],
+                        chunk_size: int = CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Score the weighted population and build the percentile arrays.
+
+    Args:
+        db_path: Database with risk_factors
+        baseline: (ethnicity x age) dense baseline, rows ordered as `ethnicities`
+        ethnicities: Snapshot ethnicity order, including AVERAGE_KEY
+
+    Returns:
+        percentile_scores: risk percentages, sorted within each group
+        percentile_cumweight: cumulative weight share (0..1] at each score
+        percentile_offsets: group g occupies [offsets[g], offsets[g + 1]),
+            with g = ethnicity row * N_AGE_BANDS + age band - 1
+    """
+    index = {ethnicity: i for i, ethnicity in enumerate(ethnicities)}
+    average_row = index[AVERAGE_KEY]
+    query = ("SELECT age, ethnicity, age_menarche, pregnancy_age, breast_density, hormonal_use, "
+             "menopause, relatives_with_cancer, cases FROM risk_factors WHERE cases > 0 AND age IS NOT NULL")
+
+    partials = []
+    with sqlite3.connect(db_path) as conn:
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            stored_ages = pd.to_numeric(chunk["age"], errors="coerce")
+            midpoints = age_group_midpoints(stored_ages)
+            known = midpoints.notna().to_numpy()
+            chunk, midpoints = chunk[known], midpoints[known].to_numpy()
+            # transform.py stores age = code * 5 + 17
+            bands = ((stored_ages[known].to_numpy() - 17) // 5).astype(int) - 1
+            ages = np.clip(np.round(midpoints), 0, DENSE_AGE_MAX).astype(int)
+            rows = chunk["ethnicity"].map(index).fillna(average_row).to_numpy(dtype=int)
+            own_group = rows != average_row
+
+            rates = baseline[rows, ages]
+            rates = np.where(np.isnan(rates), DEFAULT_BASELINE, rates)
+            multiplier = combined_multiplier(batch_adjustment_factors(population_forms(chunk, midpoints)))
+            scores = np.round(np.clip(rates * multiplier * 100, 0, 100), 6)
+
+            weights = chunk["cases"].to_numpy(dtype=float)
+            frame = pd.DataFrame({
+                "group": np.concatenate([rows[own_group] * N_AGE_BANDS + bands[own_group],
+                                         average_row * N_AGE_BANDS + bands]),
+                "score": np.concatenate([scores[own_group], scores]),
+                "weight": np.concatenate([weights[own_group], weights]),
+            })
+            # Distinct (group, score) pairs are few, so partial results stay small
+            partials.append(frame.groupby(["group", "score"])["weight"].sum())
+
+    if partials:
+        merged = pd.concat(partials).groupby(level=["group", "score"]).sum().reset_index()
+    else:
+        merged = pd.DataFrame({"group": [], "score": [], "weight": []})
+    groups = merged["group"].to_numpy(dtype=np.int64)
+    cumulative = merged.groupby("group")["weight"].cumsum().to_numpy(dtype=float)
+    totals = merged.groupby("group")["weight"].transform("sum").to_numpy(dtype=float)
+
+    n_groups = len(ethnicities) * N_AGE_BANDS
+    return {
+        "percentile_scores": merged["score"].to_numpy(dtype=float),
+        "percentile_cumweight": cumulative / np.where(totals > 0, totals, 1),
+        "percentile_offsets": np.searchsorted(groups, np.arange(n_groups + 1)).astype(np.int64),
+    }
@@ -0,0 +1,158 @@
+"""
+Data-quality checks that run on each chunk of the ETL pass.
+
+Raw BCSC chunks are checked against the codebook domains before transform,
+and transformed rows against the form options afterwards. Every column gets
+null counts, out-of-domain counts and a value histogram. Failing rows get
+a reason string such as `domain:race_eth;null:count` and are quarantined by
+the pipeline instead of aborting the run. QualityReport accumulates all of
+this across chunks and writes it as JSON.
+"""
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.etl.transform import OPTION_DOMAINS
+
+# BCSC risk factor codebook; 9 is "unknown" and therefore valid
+RAW_DOMAINS = {
+    'age_group_5_years': set(range(1, 14)),
+    'race_eth': {1, 2, 3, 4, 5, 6, 9},
+    'first_degree_hx': {0, 1, 9},
+    'age_menarche': {0, 1, 2, 9},
+    'age_first_birth': {0, 1, 2, 3, 4, 9},
+    'BIRADS_breast_density': {1, 2, 3, 4, 9},
+    'current_hrt': {0, 1, 9},
+    'menopaus': {1, 2, 3, 9},
+    'bmi_group': {1, 2, 3, 4, 9},
+    'biophx': {0, 1, 9},
+    'breast_cancer_history': {0, 1, 9},
+}
+COUNT_COLUMN = 'count'
+# Rows with a null in these columns are rejected
+REQUIRED_COLUMNS = (set(RAW_DOMAINS) - {'biophx', 'breast_cancer_history'}) | {COUNT_COLUMN}
+
+COUNT_BINS = [0, 1, 10, 100, 1000, 10000, np.inf]
+COUNT_LABELS = ['0', '1-9', '10-99', '100-999', '1000-9999', '10000+']
+# Distinct values tracked per histogram; the rest are pooled under OTHER
+HISTOGRAM_LIMIT = 50
+OTHER = '__other__'
+
+
+def _label(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def coerce_codes(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return numeric code and count columns for rows that passed check_raw.
+    A single malformed value makes read_csv parse a whole column as text.
+    """
+    columns = [col for col in chunk.columns if col in RAW_DOMAINS or col == COUNT_COLUMN]
+    return chunk.assign(**{col: pd.to_numeric(chunk[col]) for col in columns})
+
+
+class QualityReport:
+    def __init__(self):
+        self.rows = 0
+        self.rejected = 0
+        self.reasons: Counter = Counter()
+        self.sources: Dict[str, Dict[str, int]] = {}
+        self.columns: Dict[str, Dict[str, Any]] = {}
+
+    def _column(self, name: str) -> Dict[str, Any]:
+        return self.columns.setdefault(name, {'nulls': 0, 'out_of_domain': 0, 'histogram': Counter()})
+
+    def _histogram(self, stats: Dict[str, Any], counts: pd.Series) -> None:
+        histogram = stats['histogram']
+        for value, count in counts.items():
+            key = _label(value)
+            if key not in histogram and len(histogram) >= HISTOGRAM_LIMIT:
+                key = OTHER
+            histogram[key] += int(count)
+
+    def check_raw(self, chunk: pd.DataFrame) -> pd.Series:
+        """
+        Profile a raw chunk and flag rows that violate the codebook.
+
+        Args:
+            chunk: Raw rows as read from CSV
+
+        Returns:
+            pd.Series: Rejection reasons per row, "" for rows that pass
+        """
+        reasons = pd.Series("", index=chunk.index)
+        for col in chunk.columns:
+            stats = self._column(col)
+            values = chunk[col]
+            nulls = values.isna()
+            stats['nulls'] += int(nulls.sum())
+
+            if col == COUNT_COLUMN:
+                counts = pd.to_numeric(values, errors='coerce')
+                invalid = ~nulls & (counts.isna() | (counts < 0) | (counts % 1 != 0))
+                binned = pd.cut(counts[~invalid], COUNT_BINS, right=False, labels=COUNT_LABELS)
+                self._histogram(stats, binned.value_counts(sort=False))
+            else:
+                if col in RAW_DOMAINS:
+                    codes = pd.to_numeric(values, errors='coerce')
+                    invalid = ~nulls & ~codes.isin(RAW_DOMAINS[col])
+                else:
+                    invalid = pd.Series(False, index=chunk.index)
+                self._histogram(stats, values.value_counts())
+
+            stats['out_of_domain'] += int(invalid.sum())
+            reasons[invalid] += f"domain:{col};"
+            if col in REQUIRED_COLUMNS:
+                reasons[nulls] += f"null:{col};"
+        return reasons.str.rstrip(";")
+
+    def check_transformed(self, df: pd.DataFrame) -> pd.Series:
+        """Flag transformed rows whose mapped fields fall outside the form options."""
+        reasons = pd.Series("", index=df.index)
+        for field, allowed_values in OPTION_DOMAINS.items():
+            if field in df.columns:
+                invalid = ~df[field].isin(allowed_values) & df[field].notna()
+                reasons[invalid] += f"option:{field};"
+        return reasons.str.rstrip(";")
+
+    def record(self, reasons: pd.Series, source: str) -> None:
+        """Count one chunk's rows and rejections (reasons from the checks above)."""
+        rejected = reasons[reasons != ""]
+        self.rows += len(reasons)
+        self.rejected += len(rejected)
+        for reason, count in rejected.str.split(";").explode().value_counts().items():
+            self.reasons[reason] += int(count)
+        totals = self.sources.setdefault(source, {'rows': 0, 'rejected': 0})
+        totals['rows'] += len(reasons)
+        totals['rejected'] += len(rejected)
+
+    def to_dict(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            'run_id': run_id,
+            'generated_at': datetime.utcnow().isoformat(),
+            'rows_read': self.rows,
+            'rows_accepted': self.rows - self.rejected,
+            'rows_rejected': self.rejected,
+            'rejection_rate': round(self.rejected / self.rows, 6) if self.rows else None,
+            'rejection_reasons': dict(self.reasons.most_common()),
+            'sources': self.sources,
+            'columns': {
+                name: dict(stats, histogram=dict(stats['histogram']))
+                for name, stats in self.columns.items()
+            },
+        }
+
+    def write(self, path: str, run_id: Optional[str] = None) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(run_id), f, indent=2)
@@ -0,0 +1,210 @@
+"""
+Fit the data-driven factor model (see backend/factor_model.py).
+
+risk_factors rows are count-weighted covariate patterns, so training first
+collapses them chunk by chunk into unique (pattern, outcome) weights; the
+fit then works on the distinct patterns only and its cost does not grow
+with the number of records.
+
+The design matrix is one-hot with exactly one active column per feature,
+so it is stored as an (n_patterns x n_features) array of column indices
+instead of a dense matrix; X @ beta is a gather and X.T @ v a bincount.
+
+    python -m backend.etl.train_factor_model --version v1
+"""
+import argparse
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.factor_model import FEATURE_LEVELS, MISSING, MODEL_DIR
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "backend/data/processed/breast_cancer_risk.db"
+OUTCOME = "breast_cancer_history"
+CHUNK_SIZE = 500_000
+
+# Model feature -> risk_factors column
+FEATURE_COLUMNS = {
+    "age_group": "age",
+    "ethnicity": "ethnicity",
+    "menarche": "age_menarche",
+    "first_birth": "pregnancy_age",
+    "breast_density": "breast_density",
+    "hormonal_use": "hormonal_use",
+    "menopause": "menopause",
+    "bmi_group": "bmi_group",
+    "relatives": "relatives_with_cancer",
+}
+NUMERIC_FEATURES = {"age_group", "menarche", "first_birth", "relatives"}
+
+
+def encode_records(df: pd.DataFrame) -> pd.DataFrame:
+    """risk_factors columns -> level index per feature (missing/unknown -> MISSING level)."""
+    codes = {}
+    for feature, column in FEATURE_COLUMNS.items():
+        values = df[column]
+        if feature == "age_group":
+            values = (pd.to_numeric(values, errors="coerce") - 17) / 5
+        if feature in NUMERIC_FEATURES:
+            values = pd.to_numeric(values, errors="coerce").round().astype("Int64").astype(str)
+        levels = FEATURE_LEVELS[feature]
+        index = pd.Categorical(values, categories=levels).codes.astype(np.int64)
+        codes[feature] = np.where(index < 0, levels.index(MISSING), index)
+    return pd.DataFrame(codes)
+
+
+def aggregate_patterns(db_path: str = DB_PATH, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Collapse risk_factors into one row per covariate pattern with the summed
+    record weight of positive (`positive`) and negative (`negative`) outcomes.
+    """
+    columns = ", ".join(sorted(set(FEATURE_COLUMNS.values()) | {OUTCOME, "cases"}))
+    features = list(FEATURE_COLUMNS)
+    partials = []
+    with sqlite3.connect(db_path) as conn:
+        available = {row[1] for row in conn.execute("PRAGMA table_info(risk_factors)")}
+        missing = (set(FEATURE_COLUMNS.values()) | {OUTCOME, "cases"}) - available
+        if missing:
+            raise ValueError(f"risk_factors lacks {sorted(missing)}; rerun the ETL pipeline")
+
+        query = f"SELECT {columns} FROM risk_factors WHERE {OUTCOME} IS NOT NULL AND cases > 0"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            encoded = encode_records(chunk)
+            outcome = pd.to_numeric(chunk[OUTCOME], errors="coerce").to_numpy()
+            weight = pd.to_numeric(chunk["cases"], errors="coerce").fillna(0).to_numpy(dtype=float)
+            encoded["positive"] = np.where(outcome == 1, weight, 0.0)
+            encoded["negative"] = np.where(outcome == 0, weight, 0.0)
+            partials.append(encoded.groupby(features, sort=False)[["positive", "negative"]].sum())
+
+    if not partials:
+        raise ValueError("No labelled risk_factors rows to train on")
+    patterns = pd.concat(partials).groupby(level=features, sort=False).sum().reset_index()
+    return patterns[(patterns["positive"] + patterns["negative"]) > 0]
+
+
+def design_columns() -> Tuple[List[Tuple[str, str]], Dict[str, np.ndarray]]:
+    """
+    Column 0 is the intercept, then one column per non-reference level.
+
+    Returns:
+        (column labels, feature -> level index -> column), where reference
+        levels map to a trailing sink column that is dropped after each
+        bincount.
+    """
+    labels = [("intercept", "")]
+    lookup = {}
+    for feature, levels in FEATURE_LEVELS.items():
+        lookup[feature] = np.empty(len(levels), dtype=np.int64)
+        lookup[feature][0] = -1
+        for i, level in enumerate(levels[1:], start=1):
+            lookup[feature][i] = len(labels)
+            labels.append((feature, level))
+    sink = len(labels)
+    for feature in lookup:
+        lookup[feature][0] = sink
+    return labels, lookup
+
+
+def fit_logistic(idx: np.ndarray, positive: np.ndarray, total: np.ndarray, n_columns: int,
+                 l2: float = 1e-2, max_iter: int = 50, tol: float = 1e-8) -> Tuple[np.ndarray, float]:
+    """
+    Binomial logistic regression by Newton's method on the index design.
+
+    Args:
+        idx: (n_patterns x k) active column per pattern; column n_columns is the sink
+        positive: Summed weight of positive outcomes per pattern
+        total: Summed weight of all outcomes per pattern
+        n_columns: Number of real design columns
+        l2: Ridge penalty on everything but the intercept; keeps sparse
+            levels finite
+
+    Returns:
+        (coefficients, weighted log-likelihood)
+    """
+    width = n_columns + 1
+    penalty = np.full(n_columns, l2)
+    penalty[0] = 0.0
+    # Pair codes for the X.T W X bincount, computed once
+    pairs = (idx[:, :, None] * width + idx[:, None, :]).reshape(len(idx), -1)
+    beta = np.zeros(n_columns)
+    beta[0] = np.log((positive.sum() + 0.5) / (total.sum() - positive.sum() + 0.5))
+
+    for iteration in range(max_iter):
+        eta = np.append(beta, 0.0)[idx].sum(axis=1)
+        p = 1.0 / (1.0 + np.exp(-eta))
+        residual = positive - total * p
+        gradient = np.bincount(idx.ravel(), np.repeat(residual, idx.shape[1]), width)[:n_columns]
+        gradient -= penalty * beta
+        weights = np.repeat(total * p * (1 - p), pairs.shape[1])
+        hessian = np.bincount(pairs.ravel(), weights, width * width).reshape(width, width)
+        hessian = hessian[:n_columns, :n_columns] + np.diag(penalty)
+        step = np.linalg.solve(hessian + 1e-12 * np.eye(n_columns), gradient)
+        beta += step
+        if np.max(np.abs(step)) < tol:
+            break
+    logger.info(f"Converged after {iteration + 1} Newton steps")
+
+    eta = np.append(beta, 0.0)[idx].sum(axis=1)
+    log_likelihood = float(np.sum(positive * eta - total * np.logaddexp(0, eta)))
+    return beta, log_likelihood
+
+
+def train_factor_model(version: str, db_path: str = DB_PATH, model_dir: str = MODEL_DIR,
+                       l2: float = 1e-2) -> Dict[str, Any]:
+    """
+    Fit the model on risk_factors and write `<model_dir>/<version>.json`.
+
+    Returns:
+        dict: The exported artifact
+    """
+    patterns = aggregate_patterns(db_path)
+    labels, lookup = design_columns()
+    idx = np.column_stack([np.zeros(len(patterns), dtype=np.int64)] +
+                          [lookup[feature][patterns[feature].to_numpy()] for feature in FEATURE_LEVELS])
+    positive = patterns["positive"].to_numpy(dtype=float)
+    total = positive + patterns["negative"].to_numpy(dtype=float)
+    beta, log_likelihood = fit_logistic(idx, positive, total, len(labels), l2=l2)
+
+    coefficients = {feature: {levels[0]: 0.0} for feature, levels in FEATURE_LEVELS.items()}
+    for (feature, level), value in zip(labels[1:], beta[1:]):
+        coefficients[feature][level] = round(float(value), 6)
+    artifact = {
+        "version": version,
+        "kind": "logistic",
+        "outcome": OUTCOME,
+        "trained_at": datetime.utcnow().isoformat(),
+        "n_patterns": int(len(patterns)),
+        "total_weight": float(total.sum()),
+        "l2": l2,
+        "log_likelihood": round(log_likelihood, 3),
+        "intercept": round(float(beta[0]), 6),
+        "coefficients": coefficients,
+    }
+
+    path = Path(model_dir) / f"{version}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(artifact, indent=1), encoding="utf-8")
+    tmp_path.replace(path)
+    logger.info(f"Wrote factor model {version} ({len(patterns)} patterns, "
+                f"weight {total.sum():.0f}) to {path}")
+    return artifact
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fit the data-driven factor model")
+    parser.add_argument("--version", default=datetime.utcnow().strftime("v%Y%m%d"))
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", default=MODEL_DIR)
+    parser.add_argument("--l2", type=float, default=1e-2)
+    args = parser.parse_args()
+    train_factor_model(args.version, args.db, args.out, args.l2)
@@ -1,10 +1,24 @@
 import pandas as pd
 from typing import Dict, Any
 from backend.models import RiskForm  # Import your Pydantic model for reference
+from backend.form_options import (
+    ETHNICITIES, BREAST_DENSITY_OPTIONS, MENOPAUSE_OPTIONS, HORMONAL_USE_OPTIONS
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Raw columns kept next to the RiskForm fields for train_factor_model
+MODEL_COLUMNS = ['bmi_group', 'breast_cancer_history']
+
+# Allowed values of the mapped categorical fields (nulls are allowed too)
+OPTION_DOMAINS = {
+    'ethnicity': ETHNICITIES,
+    'breast_density': BREAST_DENSITY_OPTIONS,
+    'menopause': MENOPAUSE_OPTIONS,
+    'hormonal_use': HORMONAL_USE_OPTIONS
+}
+
 def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean and transform raw data to match application data model.
@@ -37,8 +51,8 @@ def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
             9: "Don't know"
         },
         'current_hrt': {
-            1: "No",
-            2: "Yes",
+            0: "No",
+            1: "Yes",
             9: "Not sure"
         },
         'menopaus': {
@@ -91,7 +105,8 @@ def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
             df[field] = pd.NA
 
     # Ensure only relevant fields are kept
-    return df[list(risk_form_fields) + ['cases']]
+    extra = [col for col in MODEL_COLUMNS if col in df.columns]
+    return df[list(risk_form_fields) + ['cases'] + extra]
 
 
 def validate_transformed_data(df: pd.DataFrame) -> bool:
@@ -113,17 +128,7 @@ def validate_transformed_data(df: pd.DataFrame) -> bool:
     if missing:
         raise ValueError(f"Transformed data missing required fields: {missing}")
 
-    validations = {
-        'ethnicity': [
-            "White", "Black", "Hispanic", "Asian or Pacific Islander",
-            "Native American", "Other"
-        ],
-        'breast_density': ["No", "Yes", "Don't know"],
-        'menopause': ["No", "Yes", "Not sure"],
-        'hormonal_use': ["No", "Yes", "Not sure"]
-    }
-
-    for field, allowed_values in validations.items():
+    for field, allowed_values in OPTION_DOMAINS.items():
         if field in df.columns:
             # Only check non-null entries
             invalid = ~df[field].isin(allowed_values) & df[field].notna()
@@ -1,5 +1,22 @@
 import os
 
+import pandas as pd
+
+# BCSC age_group_5_years code -> first and last age of the group.
+# transform.py stores the code as age = code * 5 + 17.
+AGE_GROUP_BOUNDS = {
+    1: (18, 29), 2: (30, 34), 3: (35, 39), 4: (40, 44), 5: (45, 49),
+    6: (50, 54), 7: (55, 59), 8: (60, 64), 9: (65, 69), 10: (70, 74),
+    11: (75, 79), 12: (80, 84), 13: (85, 89)
+}
+
+
+def age_group_midpoints(ages: pd.Series) -> pd.Series:
+    """Midpoint (in years) of the 5-year group each stored age stands for."""
+    midpoints = {code * 5 + 17: (lo + hi + 1) / 2 for code, (lo, hi) in AGE_GROUP_BOUNDS.items()}
+    return ages.map(midpoints)
+
+
 def get_data_path(filename: str) -> str:
     """
     Generate full path to a data file within the project.
@@ -0,0 +1,218 @@
+"""
+Background ETL jobs started from the API.
+
+A job runs the pipeline, build_baseline and the scoring snapshot in a
+separate, lower-priority process, so the serving workers keep their CPU
+and never share an interpreter (or GIL) with the rebuild. Everything is
+written to job-specific temporary files and renamed over the live
+database, quality report and snapshot only after every stage succeeded;
+workers keep serving the old memory-mapped snapshot meanwhile and pick up
+the new one through scoring.refresh_if_rebuilt().
+
+Progress goes to the etl_jobs table (see database.py): the current stage,
+and per stage the rows processed, elapsed seconds and rows per second.
+Cancellation is cooperative: the job polls its cancel_requested flag
+on every progress callback (each extracted chunk, load batch and
+baseline step), then removes its temporary files.
+
+The endpoints are disabled unless ETL_JOB_TOKEN is set, and then require
+it in the X-ETL-Token header.
+"""
+import hmac
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from .database import (
+    create_etl_job, update_etl_job, get_etl_job, list_etl_jobs, ACTIVE_JOB_STATUSES
+)
+
+logger = logging.getLogger(__name__)
+
+ETL_JOB_TOKEN = os.getenv("ETL_JOB_TOKEN", "")
+# Added to the job process's nice value, so scoring requests win the CPU
+ETL_JOB_NICENESS = int(os.getenv("ETL_JOB_NICENESS", "10"))
+# Minimum seconds between progress writes
+PROGRESS_INTERVAL = 1.0
+# Pipeline settings a job request may override, with their types
+CONFIG_OVERRIDES = {"sample_size": int, "sample_seed": int, "compact": bool, "chunk_size": int}
+# A queued job whose process has not reported within this many seconds is dead
+QUEUED_TIMEOUT = 60
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def token_valid(token: Optional[str]) -> bool:
+    return bool(ETL_JOB_TOKEN) and token is not None and hmac.compare_digest(token, ETL_JOB_TOKEN)
+
+
+class JobProgress:
+    """Pipeline progress callback that records stages in etl_jobs."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._next_write = 0.0
+        self.cancelled = False
+
+    def _finish_stage(self, now: float) -> None:
+        if self.stage is not None:
+            self.stages[self.stage]["done"] = True
+            self.stages[self.stage]["seconds"] = round(now - self._stage_started, 3)
+
+    def __call__(self, stage: str, rows: int = 0, total: Optional[int] = None) -> None:
+        now = time.monotonic()
+        if stage != self.stage:
+            self._finish_stage(now)
+            self.stage, self._stage_started, self._next_write = stage, now, 0.0
+        elapsed = now - self._stage_started
+        self.stages[stage] = {
+            "rows": rows,
+            "total": total,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if rows and elapsed > 0 else None,
+            "done": False,
+        }
+        if now >= self._next_write:
+            self._next_write = now + PROGRESS_INTERVAL
+            self.write()
+        # Checked on every call: a cancel shouldn't wait for the next write
+        job = get_etl_job(self.job_id)
+        if job is not None and job["cancel_requested"]:
+            self.cancelled = True
+            raise JobCancelled(f"ETL job {self.job_id} was cancelled")
+
+    def write(self, **fields) -> None:
+        update_etl_job(self.job_id, stage=self.stage, progress={"stages": self.stages}, **fields)
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self._finish_stage(time.monotonic())
+        self.write(status=status, error=error, finished_at=datetime.utcnow().isoformat())
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        for candidate in (path, path + ".tmp"):
+            if os.path.exists(candidate):
+                os.remove(candidate)
+
+
+def _run_job(job_id: int, overrides: Dict[str, Any]) -> None:
+    """Job process entry point."""
+    # Imported here so the API process never loads the ETL stack
+    from .etl.pipeline import DEFAULT_CONFIG, run_etl_pipeline
+    from .etl.build_baseline import build_risk_baseline
+    from .snapshot import SNAPSHOT_PATH
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        os.nice(ETL_JOB_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+    config = dict(DEFAULT_CONFIG, **overrides)
+    db_path, report_path = config["db_path"], config["quality_report"]
+    tmp_db = f"{db_path}.job{job_id}"
+    tmp_report = f"{report_path}.job{job_id}"
+    tmp_snapshot = f"{SNAPSHOT_PATH}.job{job_id}"
+    progress = JobProgress(job_id)
+    update_etl_job(job_id, status="running", started_at=datetime.utcnow().isoformat(),
+                   pid=os.getpid(), config=config)
+    try:
+        _remove(tmp_db, tmp_report, tmp_snapshot)
+        run_etl_pipeline(dict(config, db_path=tmp_db, quality_report=tmp_report), progress)
+        build_risk_baseline(tmp_db, tmp_snapshot, progress)
+        progress("swap")
+
+        # The snapshot is what workers score from, so it is swapped last
+        os.replace(tmp_db, db_path)
+        os.replace(tmp_report, report_path)
+        os.replace(tmp_snapshot, SNAPSHOT_PATH)
+        progress.finish("succeeded")
+    except Exception as e:
+        _remove(tmp_db, tmp_report, tmp_snapshot)
+        if progress.cancelled:
+            progress.finish("cancelled")
+        else:
+            logger.exception(f"ETL job {job_id} failed")
+            progress.finish("failed", str(e))
+
+
+def _reap(process: multiprocessing.Process, job_id: int) -> None:
+    """Wait for a job process; record it as failed if it died without a final status."""
+    process.join()
+    job = get_etl_job(job_id)
+    if job is not None and job["status"] in ACTIVE_JOB_STATUSES:
+        update_etl_job(job_id, status="failed", finished_at=datetime.utcnow().isoformat(),
+                       error=f"Job process exited with code {process.exitcode}")
+
+
+def validate_overrides(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Known, non-None overrides, checked before they reach the job process.
+
+    Raises:
+        ValueError: If a value has the wrong type or is out of range
+    """
+    valid = {}
+    for key, value in overrides.items():
+        if key not in CONFIG_OVERRIDES or value is None:
+            continue
+        expected = CONFIG_OVERRIDES[key]
+        # bool is an int subclass, so compare types exactly
+        if type(value) is not expected:
+            raise ValueError(f"{key} must be {expected.__name__}, got {type(value).__name__}")
+        if key == "sample_size" and value < 0 or key == "chunk_size" and value < 1:
+            raise ValueError(f"{key} is out of range: {value}")
+        valid[key] = value
+    return valid
+
+
+def start_etl_job(overrides: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Start a job process; returns the job, or None if another job is active.
+
+    Raises:
+        ValueError: If the overrides are invalid (see validate_overrides)
+    """
+    overrides = validate_overrides(overrides)
+    job_id = create_etl_job(overrides)
+    if job_id is None:
+        return None
+
+    # spawn, not fork: the server process has threads and open sockets
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_job, args=(job_id, overrides), name=f"etl-job-{job_id}"
+    )
+    process.start()
+    threading.Thread(target=_reap, args=(process, job_id), daemon=True).start()
+    logger.info(f"Started ETL job {job_id} (pid {process.pid})")
+    return get_etl_job(job_id)
+
+
+def recover_interrupted_jobs() -> None:
+    """Mark jobs whose process no longer exists (e.g. after a restart) as failed."""
+    stale_queued = (datetime.utcnow() - timedelta(seconds=QUEUED_TIMEOUT)).isoformat()
+    for job in list_etl_jobs():
+        if job["status"] not in ACTIVE_JOB_STATUSES:
+            continue
+        if job["status"] == "queued" and job["created_at"] > stale_queued:
+            continue  # Its process may still be starting
+        alive = False
+        if job["pid"]:
+            try:
+                os.kill(job["pid"], 0)
+                alive = True
+            except OSError:
+                pass
+        if not alive:
+            update_etl_job(job["id"], status="failed", finished_at=datetime.utcnow().isoformat(),
+                           error="Interrupted: job process is gone")
@@ -0,0 +1,166 @@
+"""
+Data-fitted alternative to the hand-set MULTIPLIERS.
+
+backend/etl/train_factor_model.py fits a count-weighted logistic model on
+risk_factors and exports its coefficients as a small JSON artifact. This
+module loads an artifact once per process and turns a form into factor
+values with a single gather and dot product.
+
+The model's odds ratios (relative to each feature's reference level)
+replace the hand-set multipliers of the answers it covers; rules the data
+says nothing about (BRCA, PCOS, lifestyle, ...) still apply. Age,
+ethnicity and BMI are adjustment covariates only: the baseline already
+accounts for age and ethnicity, and the form does not ask for BMI.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from backend.form_options import FIELD_OPTIONS
+
+MODEL_DIR = "backend/data/processed/factor_models"
+# Version name that selects the hand-set MULTIPLIERS
+RULES_MODEL = "rules"
+MISSING = "missing"
+
+# Feature -> levels; the first level is the reference (odds ratio 1)
+FEATURE_LEVELS: Dict[str, Tuple[str, ...]] = {
+    "age_group": tuple(str(code) for code in range(1, 14)) + (MISSING,),
+    "ethnicity": FIELD_OPTIONS["ethnicity"] + (MISSING,),
+    "menarche": ("0", "1", "2", MISSING),
+    "first_birth": ("0", "1", "2", "3", "4", MISSING),
+    "breast_density": ("No", "Yes", MISSING),
+    "hormonal_use": ("No", "Yes", MISSING),
+    "menopause": ("No", "Yes", "Not sure", MISSING),
+    "bmi_group": ("<18.5", "18.5–24.9", "25–29.9", "30+", MISSING),
+    "relatives": ("0", "1", MISSING),
+}
+
+# Feature -> factor group it contributes to in /score
+FEATURE_GROUPS: Dict[str, str] = {
+    "relatives": "genetic",
+    "menarche": "hormonal",
+    "first_birth": "hormonal",
+    "hormonal_use": "hormonal",
+    "menopause": "hormonal",
+    "breast_density": "breast_health",
+}
+
+# MULTIPLIERS entries superseded by the fitted features
+REPLACED_MULTIPLIERS = (
+    'relatives_two_plus', 'relatives_one', 'early_menarche', 'late_menopause',
+    'premenopausal_over_55', 'hormonal_use', 'late_first_pregnancy', 'nulliparous',
+    'dense_breasts',
+)
+
+
+class UnknownModelError(Exception):
+    pass
+
+
+def age_group_code(age: int) -> int:
+    """BCSC age_group_5_years code (1 = 18-29, 2 = 30-34, ..., 13 = 85+)."""
+    if age < 30:
+        return 1
+    return min(13, (int(age) - 30) // 5 + 2)
+
+
+def menarche_code(age_menarche: int) -> int:
+    """BCSC age_menarche code: 0 = 14 or older, 1 = 12-13, 2 = under 12."""
+    if age_menarche >= 14:
+        return 0
+    return 1 if age_menarche >= 12 else 2
+
+
+def first_birth_code(pregnancy: str, pregnancy_age: Optional[int]) -> Optional[int]:
+    """BCSC age_first_birth code: 0 = under 20, ..., 3 = 30+, 4 = no births."""
+    if pregnancy == "No":
+        return 4
+    if pregnancy != "Yes" or pregnancy_age is None:
+        return None
+    if pregnancy_age < 20:
+        return 0
+    return min(3, (int(pregnancy_age) - 20) // 5 + 1)
+
+
+def _level(feature: str, value: Any) -> str:
+    value = MISSING if value is None else str(value)
+    return value if value in FEATURE_LEVELS[feature] else MISSING
+
+
+def encode_form(user_data: Dict[str, Any]) -> Dict[str, str]:
+    """RiskForm answers -> model feature levels."""
+    return {
+        "age_group": _level("age_group", age_group_code(user_data["age"])),
+        "ethnicity": _level("ethnicity", user_data.get("ethnicity")),
+        "menarche": _level("menarche", menarche_code(user_data["age_menarche"])),
+        "first_birth": _level("first_birth", first_birth_code(user_data["pregnancy"],
+                                                              user_data.get("pregnancy_age"))),
+        "breast_density": _level("breast_density", user_data.get("breast_density")),
+        "hormonal_use": _level("hormonal_use", user_data.get("hormonal_use")),
+        "menopause": _level("menopause", user_data.get("menopause")),
+        "bmi_group": MISSING,
+        "relatives": _level("relatives", min(int(user_data["relatives_with_cancer"]), 1)),
+    }
+
+
+class FactorModel:
+    """A loaded artifact, flattened to one coefficient vector."""
+
+    def __init__(self, artifact: Dict[str, Any]):
+        self.version: str = artifact["version"]
+        self.meta = {k: v for k, v in artifact.items() if k != "coefficients"}
+        self.columns: Dict[Tuple[str, str], int] = {}
+        coef: List[float] = []
+        for feature, levels in artifact["coefficients"].items():
+            for level, value in levels.items():
+                self.columns[(feature, level)] = len(coef)
+                coef.append(value)
+        self.coef = np.array(coef)
+
+        # group x column mask, so all group log-odds come out of one product
+        self.groups = sorted(set(FEATURE_GROUPS.values()))
+        self.group_mask = np.zeros((len(self.groups), len(coef)))
+        for (feature, _), column in self.columns.items():
+            if feature in FEATURE_GROUPS:
+                self.group_mask[self.groups.index(FEATURE_GROUPS[feature]), column] = 1.0
+
+    def factors(self, user_data: Dict[str, Any]) -> Dict[str, float]:
+        """Odds ratio of each covered factor group versus the reference levels."""
+        columns = [self.columns[item] for item in encode_form(user_data).items() if item in self.columns]
+        log_odds = self.group_mask[:, columns] @ self.coef[columns]
+        return {group: float(value) for group, value in zip(self.groups, np.exp(log_odds))}
+
+
+def list_model_versions(model_dir: str = MODEL_DIR) -> List[str]:
+    return sorted(path.stem for path in Path(model_dir).glob("*.json"))
+
+
+_loaded: Dict[Tuple[str, str], FactorModel] = {}
+
+
+def load_factor_model(version: str, model_dir: str = MODEL_DIR) -> Optional[FactorModel]:
+    """
+    Load a model artifact once per process, or None if it does not exist.
+    Misses are not cached, so a model trained after startup is found.
+    """
+    key = (version, model_dir)
+    if key not in _loaded:
+        path = Path(model_dir) / f"{version}.json"
+        if path.parent != Path(model_dir) or not path.is_file():
+            return None
+        _loaded[key] = FactorModel(json.loads(path.read_text(encoding="utf-8")))
+    return _loaded[key]
+
+
+def get_factor_model(version: str, model_dir: str = MODEL_DIR) -> FactorModel:
+    """
+    Raises:
+        UnknownModelError: If the model version does not exist
+    """
+    factor_model = load_factor_model(version, model_dir)
+    if factor_model is None:
+        raise UnknownModelError(f"Unknown model version: {version}")
+    return factor_model
@@ -0,0 +1,57 @@
+"""
+Allowed answers for the enumerated RiskForm fields.
+
+This module has no third-party imports so the Streamlit frontend can use
+the same definitions as the backend scoring and ETL validation code.
+"""
+from typing import Dict, Tuple
+
+GENDERS = ("Female", "Male", "Other")
+ACCESS_HEALTHCARE_OPTIONS = ("Yes", "No", "I don't know")
+MENOPAUSE_OPTIONS = ("No", "Yes", "Not sure")
+PREGNANCY_OPTIONS = ("No", "Yes", "Prefer not to say")
+BREASTFEEDING_OPTIONS = ("No", "Yes", "Prefer not to say")
+PCOS_OPTIONS = ("No", "Yes", "Not sure")
+HORMONAL_USE_OPTIONS = ("No", "Yes", "Not sure")
+BRCA_OPTIONS = ("No", "Yes", "Not tested / Not sure")
+ETHNICITIES = (
+    "White", "Black", "Hispanic", "Asian or Pacific Islander",
+    "Native American", "Other"
+)
+MAMMO_OPTIONS = ("No", "Yes")
+BREAST_DENSITY_OPTIONS = ("No", "Yes", "Don't know")
+BENIGN_LUMP_OPTIONS = ("No", "Yes")
+SMOKING_OPTIONS = ("No", "Yes")
+ALCOHOL_OPTIONS = ("No", "Yes")
+EXERCISE_OPTIONS = ("Rarely", "1–2x/week", "3–5x/week", "Daily")
+ANXIETY_LEVELS = ("Mild", "Manageable", "High", "Debilitating")
+
+# RiskForm field -> allowed values, in the order the form shows them
+FIELD_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "gender": GENDERS,
+    "access_healthcare": ACCESS_HEALTHCARE_OPTIONS,
+    "menopause": MENOPAUSE_OPTIONS,
+    "pregnancy": PREGNANCY_OPTIONS,
+    "breastfeeding": BREASTFEEDING_OPTIONS,
+    "pcos": PCOS_OPTIONS,
+    "hormonal_use": HORMONAL_USE_OPTIONS,
+    "brca_known": BRCA_OPTIONS,
+    "ethnicity": ETHNICITIES,
+    "had_mammo": MAMMO_OPTIONS,
+    "breast_density": BREAST_DENSITY_OPTIONS,
+    "benign_lumps": BENIGN_LUMP_OPTIONS,
+    "smoking": SMOKING_OPTIONS,
+    "alcohol": ALCOHOL_OPTIONS,
+    "exercise": EXERCISE_OPTIONS,
+    "anxiety_level": ANXIETY_LEVELS,
+}
+
+# Slider / number input bounds as (min, max, default)
+AGE_RANGE = (10, 100, 22)
+MENARCHE_AGE_RANGE = (4, 20, 12)
+THELARCHE_AGE_RANGE = (4, 20, 12)
+MENOPAUSE_AGE_RANGE = (35, 60, 48)
+PREGNANCY_AGE_RANGE = (13, 50, 24)
+RELATIVES_RANGE = (0, 10, 0)
+
+DEFAULT_LOCATION = "Nepal"
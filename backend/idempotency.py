@@ -0,0 +1,51 @@
+"""
+Idempotency-Key handling for /score.
+
+The frontend sends one key per form submission, so Streamlit reruns,
+double clicks and client retries of the same submission replay the first
+response instead of scoring and storing it again. Recent keys are served
+from a bounded in-memory LRU; older keys, and keys first seen by another
+worker, come from the idempotency_keys table (see database.py), whose
+primary key guarantees a single stored submission per key.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(payload: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """Fingerprint of a request, to reject a key reused for different input."""
+    body = json.dumps({"payload": payload, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class RecentResponses:
+    """
+    LRU of key -> (request hash, response), bounded to `max_size` entries.
+    /score runs in the threadpool, so access is locked.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (fingerprint, response)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -1,11 +1,29 @@
-from fastapi import FastAPI
-from .models import RiskForm
-from .scoring import calculate_risk_score
-from .database import init_db, get_all_submissions, save_submission
+from datetime import date
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from .models import RiskForm, EtlJobRequest
+from .scoring import calculate_risk_score, calculate_whatif, calculate_risk_trajectory, calculate_risk_interval
+from .factor_model import RULES_MODEL, UnknownModelError, list_model_versions
+from .admission import AdmissionController, AdmissionMiddleware
+from .profiling import ProfilingMiddleware, profiling_enabled
+from .idempotency import MAX_KEY_LENGTH, RecentResponses, request_hash
+from .database import (
+    init_db, get_submissions, save_submission, get_stats, get_idempotent_response,
+    get_etl_job, list_etl_jobs, request_etl_cancel
+)
+from .etl_jobs import start_etl_job, recover_interrupted_jobs, token_valid
 
 
 app = FastAPI()
+if profiling_enabled():
+    # Innermost, so profiles cover the handler rather than the admission queue
+    app.add_middleware(ProfilingMiddleware)
+admission = AdmissionController()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+recent_responses = RecentResponses()
 init_db()
+recover_interrupted_jobs()
 
 
 @app.get("/")
@@ -13,19 +31,113 @@ def root():
     return {"message": "Risk scoring backend is live."}
     
 @app.get("/submissions")
-def list_submissions():
-    return get_all_submissions()
+def list_submissions(start: Optional[date] = None, end: Optional[date] = None):
+    return get_submissions(start, end)
+
+
+def _replay(key: str, fingerprint: str, stored) -> dict:
+    stored_fingerprint, response = stored
+    if stored_fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    recent_responses.put(key, stored_fingerprint, response)
+    return response
 
 
 @app.post("/score")
-def score_risk(data: RiskForm):
+def score_risk(data: RiskForm, include_trajectory: bool = False,
+               include_interval: bool = False, seed: Optional[int] = None,
+               model: str = RULES_MODEL,
+               idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH)):
+    user_data = data.dict()
+    if idempotency_key:
+        fingerprint = request_hash(user_data, {
+            "include_trajectory": include_trajectory, "include_interval": include_interval,
+            "seed": seed, "model": model
+        })
+        stored = recent_responses.get(idempotency_key) or get_idempotent_response(idempotency_key)
+        if stored is not None:
+            return _replay(idempotency_key, fingerprint, stored)
+
+    try:
+        result = calculate_risk_score(user_data, model)
+        if include_trajectory:
+            result["trajectory"] = calculate_risk_trajectory(user_data, model)
+        if include_interval:
+            result["risk_interval"] = calculate_risk_interval(user_data, seed=seed, model=model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if not idempotency_key:
+        save_submission(user_data, result["risk_estimate"], result["risk_percentage"], model=model)
+        return result
+    # A concurrent request with the same key may have stored first
+    stored = save_submission(user_data, result["risk_estimate"], result["risk_percentage"],
+                             idempotency_key, fingerprint, result, model)
+    if stored is not None:
+        return _replay(idempotency_key, fingerprint, stored)
+    recent_responses.put(idempotency_key, fingerprint, result)
+    return result
+
+
+@app.get("/stats")
+def submission_stats(since: Optional[date] = None):
+    return get_stats(since)
+
+
+@app.get("/metrics/admission")
+def admission_metrics():
+    return admission.metrics()
+
+
+@app.get("/models")
+def list_models():
+    return {"default": RULES_MODEL, "versions": [RULES_MODEL] + list_model_versions()}
+
+
+@app.post("/score/whatif")
+def score_whatif(data: RiskForm, model: str = RULES_MODEL):
+    try:
+        return calculate_whatif(data.dict(), model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _require_etl_token(token: Optional[str]) -> None:
+    if not token_valid(token):
+        raise HTTPException(status_code=403, detail="ETL jobs are disabled or the token is invalid")
+
+
+@app.post("/etl/jobs", status_code=202)
+def start_etl(request: Optional[EtlJobRequest] = None,
+              x_etl_token: Optional[str] = Header(None)):
+    _require_etl_token(x_etl_token)
+    try:
+        job = start_etl_job(request.dict() if request else {})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=409, detail="An ETL job is already running")
+    return job
+
+
+@app.get("/etl/jobs")
+def etl_jobs(limit: int = 20, x_etl_token: Optional[str] = Header(None)):
+    _require_etl_token(x_etl_token)
+    return list_etl_jobs(limit)
+
+
+@app.get("/etl/jobs/{job_id}")
+def etl_job(job_id: int, x_etl_token: Optional[str] = Header(None)):
+    _require_etl_token(x_etl_token)
+    job = get_etl_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ETL job")
+    return job
 
-    result = calculate_risk_score(data.dict())
 
-    # Make sure this returns something like:
-    return {
-        "risk_estimate": result["risk_estimate"],
-        "contextual_reasons": result["contextual_reasons"],
-        "chart_data": result["chart_data"],
-        "user_summary": result["user_summary"]
-    }
+@app.post("/etl/jobs/{job_id}/cancel", status_code=202)
+def cancel_etl_job(job_id: int, x_etl_token: Optional[str] = Header(None)):
+    _require_etl_token(x_etl_token)
+    if not request_etl_cancel(job_id):
+        raise HTTPException(status_code=409, detail="ETL job is not running")
+    return get_etl_job(job_id)
@@ -26,3 +26,11 @@ class RiskForm(BaseModel):
     alcohol: str
     exercise: str
     anxiety_level: str
+
+
+class EtlJobRequest(BaseModel):
+    # Overrides of the pipeline defaults; None keeps the default
+    sample_size: Optional[int] = None
+    sample_seed: Optional[int] = None
+    compact: Optional[bool] = None
+    chunk_size: Optional[int] = None
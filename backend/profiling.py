@@ -0,0 +1,162 @@
+"""
+Opt-in per-request sampling profiler.
+
+Enabled only when PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set; otherwise
+the middleware is never installed and requests pay nothing. A request is
+profiled when it sends `X-Profile-Token: <PROFILE_TOKEN>` or wins the
+PROFILE_SAMPLE_RATE draw.
+
+While a profiled request runs, a background thread snapshots
+sys._current_frames() every PROFILE_INTERVAL_MS and counts the stacks of
+the event loop thread and of any thread executing backend code (sync
+routes run in the threadpool). Stacks are written in folded format
+(`frame;frame;frame count`), which flamegraph.pl and speedscope read,
+next to a JSON file with the route, timing and input shape. Under
+concurrent load, other requests running backend code can show up in the
+same profile.
+"""
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_HEADER = b"x-profile-token"
+
+BACKEND_DIR = str(Path(__file__).resolve().parent)
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, loop_thread: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack: List[str] = []
+                in_backend = thread_id == self.loop_thread
+                while frame is not None:
+                    in_backend = in_backend or frame.f_code.co_filename.startswith(BACKEND_DIR)
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if in_backend:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _input_shape(body: bytes) -> Any:
+    """Field names and value types of a JSON body, never the values themselves."""
+    if not body:
+        return None
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return {"bytes": len(body)}
+    if isinstance(payload, dict):
+        return {key: type(value).__name__ for key, value in payload.items()}
+    if isinstance(payload, list):
+        return {"list": len(payload)}
+    return type(payload).__name__
+
+
+def _should_profile(scope) -> bool:
+    if PROFILE_TOKEN:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER and hmac.compare_digest(value, PROFILE_TOKEN.encode()):
+                return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _write_profile(sampler: StackSampler, meta: Dict[str, Any], profile_dir: str) -> Optional[Path]:
+    directory = Path(profile_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    route = meta["path"].strip("/").replace("/", "_") or "root"
+    stem = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{meta['method']}_{route}"
+    folded = directory / f"{stem}.folded"
+    folded.write_text("".join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common()))
+    (directory / f"{stem}.json").write_text(json.dumps(dict(meta, samples=sampler.samples), indent=1))
+    return folded
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling selected requests with a StackSampler."""
+
+    def __init__(self, app, profile_dir: str = PROFILE_DIR, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        status = {}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            sampler.stop()
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_params": sorted({pair.split("=")[0] for pair in
+                                        scope.get("query_string", b"").decode("latin-1").split("&") if pair}),
+                "input_shape": _input_shape(bytes(body)),
+                "status": status.get("code"),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            try:
+                path = _write_profile(sampler, meta, self.profile_dir)
+                logger.info(f"Profiled {meta['method']} {meta['path']} in {meta['duration_ms']} ms -> {path}")
+            except OSError as e:
+                logger.warning(f"Could not write profile: {e}")
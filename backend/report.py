@@ -0,0 +1,433 @@
+"""
+PDF report generation for risk assessments.
+
+The writer only uses the standard library: pages are drawn with PDF
+vector operators and the built-in Helvetica fonts, so the frontend can
+import it and no headless browser is needed to export charts. Everything
+that does not depend on a particular response (page furniture, gauge
+bands, chart frames, population curves) is rendered once and reused.
+"""
+import argparse
+import ast
+import logging
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, in points
+MARGIN = 40
+
+# Same bands as the Plotly gauge in frontend/components/risk_summary.py
+GAUGE_STEPS = [
+    (0, 5, (0.0, 0.5, 0.0)),
+    (5, 12, (0.56, 0.93, 0.56)),
+    (12, 20, (1.0, 1.0, 0.0)),
+    (20, 30, (1.0, 0.65, 0.0)),
+    (30, 100, (1.0, 0.0, 0.0)),
+]
+GAUGE_CENTER = (160, 560)
+GAUGE_RADIUS = 90
+
+FACTOR_BOX = (MARGIN, 360, 532, 110)  # x, y, width, height
+CHART_BOX = (MARGIN + 30, 420, 500, 250)  # on page 2
+
+DISCLAIMER = (
+    "Disclaimer: This is a data-backed estimate, not a diagnosis. "
+    "Always consult medical professionals."
+)
+
+
+# -------------------------------------------------------------------
+# Drawing primitives (each returns PDF content-stream operators)
+# -------------------------------------------------------------------
+def _num(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _color(rgb: Tuple[float, float, float], stroke: bool = False) -> str:
+    return f"{' '.join(_num(c) for c in rgb)} {'RG' if stroke else 'rg'}"
+
+
+def _escape(text: str) -> str:
+    encoded = text.encode("cp1252", errors="replace").decode("latin-1")
+    return encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text(x: float, y: float, text: str, size: float = 10, bold: bool = False) -> str:
+    font = "F2" if bold else "F1"
+    return f"BT /{font} {_num(size)} Tf {_num(x)} {_num(y)} Td ({_escape(text)}) Tj ET"
+
+
+def _rect(x: float, y: float, w: float, h: float, rgb: Tuple[float, float, float]) -> str:
+    return f"{_color(rgb)} {_num(x)} {_num(y)} {_num(w)} {_num(h)} re f"
+
+
+def _polyline(points: List[Tuple[float, float]]) -> str:
+    if not points:
+        return ""
+    ops = [f"{_num(points[0][0])} {_num(points[0][1])} m"]
+    ops.extend(f"{_num(x)} {_num(y)} l" for x, y in points[1:])
+    return " ".join(ops) + " S"
+
+
+def _arc(cx: float, cy: float, r: float, start: float, end: float) -> str:
+    """Arc path from `start` to `end` degrees (clockwise when start > end)."""
+    segments = max(1, math.ceil(abs(end - start) / 90))
+    step = math.radians(end - start) / segments
+    k = 4 / 3 * math.tan(step / 4)
+    a = math.radians(start)
+    ops = [f"{_num(cx + r * math.cos(a))} {_num(cy + r * math.sin(a))} m"]
+    for _ in range(segments):
+        b = a + step
+        c1 = (cx + r * (math.cos(a) - k * math.sin(a)), cy + r * (math.sin(a) + k * math.cos(a)))
+        c2 = (cx + r * (math.cos(b) + k * math.sin(b)), cy + r * (math.sin(b) - k * math.cos(b)))
+        end_pt = (cx + r * math.cos(b), cy + r * math.sin(b))
+        ops.append(" ".join(_num(v) for v in (*c1, *c2, *end_pt)) + " c")
+        a = b
+    return " ".join(ops) + " S"
+
+
+def _circle(cx: float, cy: float, r: float, rgb: Tuple[float, float, float]) -> str:
+    k = 0.5523 * r
+    return (
+        f"{_color(rgb)} {_num(cx + r)} {_num(cy)} m "
+        f"{_num(cx + r)} {_num(cy + k)} {_num(cx + k)} {_num(cy + r)} {_num(cx)} {_num(cy + r)} c "
+        f"{_num(cx - k)} {_num(cy + r)} {_num(cx - r)} {_num(cy + k)} {_num(cx - r)} {_num(cy)} c "
+        f"{_num(cx - r)} {_num(cy - k)} {_num(cx - k)} {_num(cy - r)} {_num(cx)} {_num(cy - r)} c "
+        f"{_num(cx + k)} {_num(cy - r)} {_num(cx + r)} {_num(cy - k)} {_num(cx + r)} {_num(cy)} c f"
+    )
+
+
+def _wrap(text: str, size: float, width: float) -> List[str]:
+    # Helvetica averages roughly half an em per character
+    max_chars = max(10, int(width / (size * 0.5)))
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if len(candidate) > max_chars and current:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _gauge_angle(percent: float) -> float:
+    return 180 - 180 * min(100, max(0, percent)) / 100
+
+
+# -------------------------------------------------------------------
+# Static assets, rendered once per process
+# -------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def _page_one_template() -> bytes:
+    cx, cy = GAUGE_CENTER
+    x, y, w, h = FACTOR_BOX
+    ops = [
+        _rect(0, PAGE_HEIGHT - 60, PAGE_WIDTH, 60, (0.12, 0.27, 0.52)),
+        "1 1 1 rg",
+        _text(MARGIN, PAGE_HEIGHT - 38, "Personalized Breast Cancer Risk Assessment", 18, bold=True),
+        "0 0 0 rg",
+        _text(MARGIN, 680, "Estimated risk", 13, bold=True),
+        "18 w",
+    ]
+    for low, high, rgb in GAUGE_STEPS:
+        ops.append(_color(rgb, stroke=True))
+        ops.append(_arc(cx, cy, GAUGE_RADIUS, _gauge_angle(low), _gauge_angle(high)))
+    ops += [
+        "0 0 0 RG 0.5 w",
+        _text(cx - GAUGE_RADIUS - 12, cy - 14, "0%", 8),
+        _text(cx + GAUGE_RADIUS - 8, cy - 14, "100%", 8),
+        _text(MARGIN, y + h + 20, "Risk factor multipliers", 13, bold=True),
+        f"0.6 0.6 0.6 RG {_num(x + 110)} {_num(y)} m {_num(x + 110)} {_num(y + h)} l S",
+        _text(MARGIN, 300, "Recommendations", 13, bold=True),
+        _text(MARGIN, 40, DISCLAIMER, 8),
+    ]
+    return zlib.compress("\n".join(ops).encode("latin-1"))
+
+
+@lru_cache(maxsize=1)
+def _page_two_template() -> bytes:
+    x, y, w, h = CHART_BOX
+    ops = [
+        _rect(0, PAGE_HEIGHT - 60, PAGE_WIDTH, 60, (0.12, 0.27, 0.52)),
+        "1 1 1 rg",
+        _text(MARGIN, PAGE_HEIGHT - 38, "Your Risk Compared to Population", 18, bold=True),
+        "0 0 0 rg 0 0 0 RG 0.75 w",
+        f"{_num(x)} {_num(y)} m {_num(x + w)} {_num(y)} l S",
+        f"{_num(x)} {_num(y)} m {_num(x)} {_num(y + h)} l S",
+        _text(x + w / 2 - 10, y - 28, "Age", 9),
+        _text(MARGIN - 20, y + h + 10, "Risk %", 9),
+        "0 0 1 RG 1.5 w",
+        f"{_num(x + 10)} {_num(y - 50)} m {_num(x + 40)} {_num(y - 50)} l S",
+        _text(x + 45, y - 53, "Average risk by ethnicity", 8),
+        "0 0.5 0 RG [3 2] 0 d",
+        f"{_num(x + 190)} {_num(y - 50)} m {_num(x + 220)} {_num(y - 50)} l S",
+        "[] 0 d",
+        _text(x + 225, y - 53, "Overall average risk", 8),
+        _circle(x + 360, y - 50, 4, (1, 0, 0)),
+        "0 0 0 rg",
+        _text(x + 370, y - 53, "Your risk", 8),
+        _text(MARGIN, 330, "Why this result?", 13, bold=True),
+        _text(MARGIN, 40, DISCLAIMER, 8),
+    ]
+    return zlib.compress("\n".join(ops).encode("latin-1"))
+
+
+def _chart_scale(age_groups: Tuple, rates: Tuple) -> Tuple[float, float, float]:
+    x_min = min(age_groups) if age_groups else 0
+    x_max = max(age_groups) if age_groups else 100
+    if x_max == x_min:
+        x_max = x_min + 1
+    y_max = max([r * 100 for r in rates] or [1]) * 1.1 or 1
+    return x_min, x_max, y_max
+
+
+def _to_chart(age: float, percent: float, scale: Tuple[float, float, float]) -> Tuple[float, float]:
+    x, y, w, h = CHART_BOX
+    x_min, x_max, y_max = scale
+    px = x + w * (min(max(age, x_min), x_max) - x_min) / (x_max - x_min)
+    py = y + h * min(max(percent, 0), y_max) / y_max
+    return px, py
+
+
+@lru_cache(maxsize=64)
+def _population_curves(age_groups: Tuple, ethnicity_rates: Tuple, average_rates: Tuple) -> bytes:
+    """Axis ticks and population curves for one ethnicity's chart data."""
+    x, y, w, h = CHART_BOX
+    scale = _chart_scale(age_groups, ethnicity_rates + average_rates)
+    x_min, x_max, y_max = scale
+    ops = ["0 0 0 rg"]
+    for i in range(6):
+        age = x_min + (x_max - x_min) * i / 5
+        ops.append(_text(x + w * i / 5 - 6, y - 14, f"{age:.0f}", 8))
+        ops.append(_text(x - 30, y + h * i / 5 - 3, f"{y_max * i / 5:.1f}", 8))
+    ops.append("0 0 1 RG 1.5 w")
+    ops.append(_polyline([
+        _to_chart(a, r * 100, scale) for a, r in zip(age_groups, ethnicity_rates)
+    ]))
+    ops.append("0 0.5 0 RG [3 2] 0 d")
+    ops.append(_polyline([
+        _to_chart(a, r * 100, scale) for a, r in zip(age_groups, average_rates)
+    ]))
+    ops.append("[] 0 d")
+    return "\n".join(ops).encode("latin-1")
+
+
+# -------------------------------------------------------------------
+# Per-response content
+# -------------------------------------------------------------------
+def _factor_color(multiplier: float) -> Tuple[float, float, float]:
+    if multiplier < 1:
+        return (0.2, 0.65, 0.3)
+    if multiplier < 1.5:
+        return (0.95, 0.75, 0.1)
+    return (0.85, 0.2, 0.15)
+
+
+def _page_one(response: Dict[str, Any]) -> bytes:
+    cx, cy = GAUGE_CENTER
+    risk_percent = float(response.get("risk_percentage", 0) or 0)
+    angle = math.radians(_gauge_angle(risk_percent))
+    needle = (cx + (GAUGE_RADIUS - 5) * math.cos(angle), cy + (GAUGE_RADIUS - 5) * math.sin(angle))
+    ops = [
+        "0.1 0.1 0.45 RG 3 w",
+        f"{_num(cx)} {_num(cy)} m {_num(needle[0])} {_num(needle[1])} l S",
+        _circle(cx, cy, 5, (0.1, 0.1, 0.45)),
+        "0 0 0 rg",
+        _text(cx - 28, cy - 35, f"{risk_percent:.1f}%", 20, bold=True),
+        _text(320, 620, f"Risk level: {response.get('risk_estimate', 'Unknown')}", 14, bold=True),
+        _text(320, 598, f"Risk: {risk_percent:.1f}%", 12),
+    ]
+    if response.get("timestamp"):
+        ops.append(_text(320, 578, f"Generated: {response['timestamp']}", 9))
+    summary = response.get("user_summary") or {}
+    details = ", ".join(
+        f"{label}: {summary[key]}"
+        for key, label in (("age", "Age"), ("ethnicity", "Ethnicity"), ("location", "Location"))
+        if summary.get(key) not in (None, "")
+    )
+    if details:
+        ops.append(_text(320, 558, details, 9))
+
+    # Factor bars, sorted like the Plotly chart
+    x, y, w, h = FACTOR_BOX
+    factors = sorted((response.get("factor_breakdown") or {}).items(), key=lambda item: item[1])
+    if factors:
+        top = max(2.0, max(value for _, value in factors))
+        row = h / len(factors)
+        for i, (name, value) in enumerate(factors):
+            bar_y = y + i * row + row * 0.2
+            length = (w - 160) * value / top
+            ops.append(_rect(x + 110, bar_y, length, row * 0.6, _factor_color(value)))
+            ops.append("0 0 0 rg")
+            ops.append(_text(x, bar_y + row * 0.15, name.replace("_", " ").title(), 9))
+            ops.append(_text(x + 115 + length, bar_y + row * 0.15, f"x{value:.2f}", 9))
+
+    text_y = 280
+    for rec in response.get("recommendations") or ["No specific recommendations provided."]:
+        for i, line in enumerate(_wrap(rec, 10, PAGE_WIDTH - 2 * MARGIN - 15)):
+            ops.append(_text(MARGIN + (15 if i else 0), text_y, f"- {line}" if i == 0 else line, 10))
+            text_y -= 14
+        if text_y < 70:
+            break
+    return "\n".join(ops).encode("latin-1")
+
+
+def _page_two(response: Dict[str, Any]) -> bytes:
+    chart_data = response.get("chart_data") or {}
+    parts = []
+    ages = tuple(chart_data.get("age_groups") or ())
+    eth_rates = tuple(chart_data.get("ethnicity_rates") or ())
+    avg_rates = tuple(chart_data.get("average_rates") or ())
+    if ages:
+        parts.append(_population_curves(ages, eth_rates, avg_rates))
+        if "user_age" in chart_data and "user_risk" in chart_data:
+            scale = _chart_scale(ages, eth_rates + avg_rates)
+            mx, my = _to_chart(chart_data["user_age"], chart_data["user_risk"] * 100, scale)
+            parts.append(_circle(mx, my, 5, (1, 0, 0)).encode("latin-1"))
+    else:
+        parts.append(_text(CHART_BOX[0] + 150, CHART_BOX[1] + 120, "No chart data available", 11).encode("latin-1"))
+
+    ops = ["0 0 0 rg"]
+    text_y = 310
+    for reason in response.get("contextual_reasons") or []:
+        for i, line in enumerate(_wrap(reason, 10, PAGE_WIDTH - 2 * MARGIN - 15)):
+            ops.append(_text(MARGIN + (15 if i else 0), text_y, f"- {line}" if i == 0 else line, 10))
+            text_y -= 14
+        if text_y < 70:
+            break
+    parts.append("\n".join(ops).encode("latin-1"))
+    return b"\n".join(parts)
+
+
+def _pdf_document(pages: List[Tuple[bytes, bytes]]) -> bytes:
+    """
+    Serialize pages given as (compressed template stream, dynamic stream).
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for template, dynamic in pages:
+        compressed = zlib.compress(dynamic)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(template) + template + b"\nendstream")
+        template_ref = len(objects)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(compressed) + compressed + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+            b"/Contents [%d 0 R %d 0 R] >>" % (PAGE_WIDTH, PAGE_HEIGHT, template_ref, content_ref)
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_report_pdf(response: Dict[str, Any]) -> bytes:
+    """
+    Render a /score response (assessment, factor breakdown and population
+    comparison) to a two-page PDF.
+    """
+    return _pdf_document([
+        (_page_one_template(), _page_one(response)),
+        (_page_two_template(), _page_two(response)),
+    ])
+
+
+# -------------------------------------------------------------------
+# Batch generation for stored submissions
+# -------------------------------------------------------------------
+def _report_for_submission(row: Dict[str, Any], out_dir: str) -> Optional[str]:
+    """
+    The stored response when there is one; otherwise the answers are
+    re-scored with the submission's model and the stored estimate is shown,
+    even if the baseline has changed since.
+    """
+    from backend.scoring import calculate_risk_score
+    from backend.factor_model import RULES_MODEL
+
+    response = row.get("response")
+    if response is None:
+        try:
+            user_data = ast.literal_eval(row["full_data"])
+            response = calculate_risk_score(user_data, row.get("model") or RULES_MODEL)
+        except Exception as e:
+            logger.error(f"Skipping submission {row.get('id')}: {e}")
+            return None
+        if row.get("risk_percentage") is not None:
+            response["risk_percentage"] = row["risk_percentage"]
+        if row.get("risk_estimate"):
+            response["risk_estimate"] = row["risk_estimate"]
+    path = os.path.join(out_dir, f"risk_report_{row['id']}.pdf")
+    with open(path, "wb") as f:
+        f.write(render_report_pdf(response))
+    return path
+
+
+def generate_reports(submissions: List[Dict[str, Any]], out_dir: str,
+                     workers: Optional[int] = None,
+                     responses: Optional[Dict[int, Dict[str, Any]]] = None) -> List[str]:
+    """
+    Write one PDF per stored submission using a process pool.
+
+    Args:
+        submissions: Rows as returned by database.get_submissions()
+        out_dir: Directory the reports are written to
+        workers: Pool size (defaults to the CPU count)
+        responses: Stored /score responses by submission id, used as is
+
+    Returns:
+        List[str]: Paths of the reports that were written
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    responses = responses or {}
+    rows = [dict(row, response=responses.get(row["id"])) for row in submissions
+            if row.get("full_data") or row["id"] in responses]
+    if not rows:
+        return []
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(rows) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        paths = pool.map(partial(_report_for_submission, out_dir=out_dir), rows, chunksize=chunksize)
+        written = [path for path in paths if path]
+    logger.info(f"Wrote {len(written)} of {len(rows)} reports to {out_dir}")
+    return written
+
+
+if __name__ == "__main__":
+    from backend.database import get_submissions, get_stored_responses
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Generate PDF reports for stored submissions")
+    parser.add_argument("--out", default="reports", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--limit", type=int, default=0, help="Only the N most recent submissions")
+    args = parser.parse_args()
+
+    submissions = get_submissions(limit=args.limit or None)
+    responses = get_stored_responses([row["id"] for row in submissions])
+    generate_reports(submissions, args.out, args.workers, responses)
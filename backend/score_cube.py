@@ -0,0 +1,246 @@
+"""
+Precomputed lookup cube for the risk adjustment factors.
+
+Every input read by calculate_risk_adjustment_factors is an enum or a
+bounded integer, and each rule only looks at a few thresholds, so the
+factors depend on a small set of buckets (3*3*2*3*2*3*2*2*2*2*3*2*2*2 =
+124,416 combinations). The cube stores the four factor values for each
+combination; scoring memory-maps it and replaces the rule evaluation by
+an index calculation.
+
+    python -m backend.score_cube --build     # write the cube
+    python -m backend.score_cube --verify    # compare it with the scalar code
+"""
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import random
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from backend.form_options import (
+    FIELD_OPTIONS, AGE_RANGE, MENARCHE_AGE_RANGE, MENOPAUSE_AGE_RANGE,
+    PREGNANCY_AGE_RANGE, RELATIVES_RANGE
+)
+from backend.scoring_core import MULTIPLIERS, calculate_risk_adjustment_factors
+
+logger = logging.getLogger(__name__)
+
+CUBE_PATH = "backend/data/processed/score_cube.npy"
+FACTOR_NAMES = ('genetic', 'hormonal', 'lifestyle', 'breast_health')
+
+
+def _yes(field: str):
+    return lambda d: 1 if d[field] == "Yes" else 0
+
+
+def _relatives_bucket(d: Dict[str, Any]) -> int:
+    if d["relatives_with_cancer"] >= 2:
+        return 2
+    return 1 if d["relatives_with_cancer"] == 1 else 0
+
+
+def _brca_bucket(d: Dict[str, Any]) -> int:
+    if d["brca_known"] == "Yes":
+        return 1
+    return 2 if d["brca_known"] == "Not tested / Not sure" else 0
+
+
+def _menopause_bucket(d: Dict[str, Any]) -> int:
+    if d["menopause"] == "Yes" and (d.get("age_menopause") or 0) > 55:
+        return 1
+    if d["menopause"] == "No" and d["age"] > 55:
+        return 2
+    return 0
+
+
+def _pregnancy_bucket(d: Dict[str, Any]) -> int:
+    if d["pregnancy"] == "Yes" and (d.get("pregnancy_age") or 0) >= 30:
+        return 1
+    return 2 if d["pregnancy"] == "No" else 0
+
+
+def _exercise_bucket(d: Dict[str, Any]) -> int:
+    if d["exercise"] in ["Rarely", "1–2x/week"]:
+        return 1
+    return 2 if d["exercise"] == "Daily" else 0
+
+
+# (axis name, bucket function, one representative input per bucket)
+CUBE_AXES = [
+    ("relatives", _relatives_bucket,
+     [{"relatives_with_cancer": 0}, {"relatives_with_cancer": 1}, {"relatives_with_cancer": 2}]),
+    ("brca", _brca_bucket,
+     [{"brca_known": "No"}, {"brca_known": "Yes"}, {"brca_known": "Not tested / Not sure"}]),
+    ("early_menarche", lambda d: 1 if d["age_menarche"] <= 11 else 0,
+     [{"age_menarche": 12}, {"age_menarche": 11}]),
+    ("menopause", _menopause_bucket,
+     [{"menopause": "Not sure", "age_menopause": None, "age": 40},
+      {"menopause": "Yes", "age_menopause": 56, "age": 60},
+      {"menopause": "No", "age_menopause": None, "age": 56}]),
+    ("hormonal_use", _yes("hormonal_use"), [{"hormonal_use": "No"}, {"hormonal_use": "Yes"}]),
+    ("pregnancy", _pregnancy_bucket,
+     [{"pregnancy": "Prefer not to say", "pregnancy_age": None},
+      {"pregnancy": "Yes", "pregnancy_age": 30},
+      {"pregnancy": "No", "pregnancy_age": None}]),
+    ("breastfeeding", _yes("breastfeeding"), [{"breastfeeding": "No"}, {"breastfeeding": "Yes"}]),
+    ("pcos", _yes("pcos"), [{"pcos": "No"}, {"pcos": "Yes"}]),
+    ("smoking", _yes("smoking"), [{"smoking": "No"}, {"smoking": "Yes"}]),
+    ("alcohol", _yes("alcohol"), [{"alcohol": "No"}, {"alcohol": "Yes"}]),
+    ("exercise", _exercise_bucket,
+     [{"exercise": "3–5x/week"}, {"exercise": "Rarely"}, {"exercise": "Daily"}]),
+    ("breast_density", _yes("breast_density"), [{"breast_density": "No"}, {"breast_density": "Yes"}]),
+    ("benign_lumps", _yes("benign_lumps"), [{"benign_lumps": "No"}, {"benign_lumps": "Yes"}]),
+    ("had_mammo", _yes("had_mammo"), [{"had_mammo": "No"}, {"had_mammo": "Yes"}]),
+]
+CUBE_SHAPE = tuple(len(reps) for _, _, reps in CUBE_AXES) + (len(FACTOR_NAMES),)
+
+
+def _representative_factors() -> list:
+    """Factors for every axis representative, the other axes at their first one."""
+    base = {}
+    for _, _, reps in CUBE_AXES:
+        base.update(reps[0])
+    values = []
+    for _, _, reps in CUBE_AXES:
+        for rep in reps:
+            factors = calculate_risk_adjustment_factors(dict(base, **rep))
+            values.append([factors[name] for name in FACTOR_NAMES])
+    return values
+
+
+def cube_fingerprint() -> str:
+    """
+    Changes whenever the multipliers, the axis layout or the rules change.
+    Rules are covered by the source of calculate_risk_adjustment_factors and
+    the bucket functions (a moved threshold such as age_menarche <= 11) and
+    by the factors they give for the axis representatives.
+    """
+    sources = [inspect.getsource(calculate_risk_adjustment_factors)]
+    sources += [inspect.getsource(bucket) for _, bucket, _ in CUBE_AXES]
+    payload = json.dumps({
+        "multipliers": MULTIPLIERS,
+        "shape": CUBE_SHAPE,
+        "rules": hashlib.sha256("".join(sources).encode()).hexdigest(),
+        "representatives": _representative_factors(),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _meta_path(cube_path: str) -> Path:
+    return Path(cube_path).with_suffix(".json")
+
+
+def cube_index(user_data: Dict[str, Any]) -> tuple:
+    return tuple(bucket(user_data) for _, bucket, _ in CUBE_AXES)
+
+
+def build_score_cube(cube_path: str = CUBE_PATH) -> np.ndarray:
+    """
+    Evaluate the scalar factor code once per bucket combination and write
+    the result as a .npy file plus a small JSON fingerprint.
+    """
+    cube = np.empty(CUBE_SHAPE, dtype=np.float64)
+    axis_reps = [reps for _, _, reps in CUBE_AXES]
+    for index in itertools.product(*(range(len(reps)) for reps in axis_reps)):
+        user_data = {}
+        for reps, i in zip(axis_reps, index):
+            user_data.update(reps[i])
+        factors = calculate_risk_adjustment_factors(user_data)
+        cube[index] = [factors[name] for name in FACTOR_NAMES]
+
+    path = Path(cube_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.stem + ".tmp.npy")
+    np.save(tmp_path, cube)
+    tmp_path.replace(path)
+    _meta_path(cube_path).write_text(json.dumps({
+        "fingerprint": cube_fingerprint(),
+        "axes": [name for name, _, _ in CUBE_AXES],
+        "factors": list(FACTOR_NAMES),
+    }))
+    logger.info(f"Wrote score cube {CUBE_SHAPE} ({cube.nbytes // 1024} KiB) to {path}")
+    return cube
+
+
+@lru_cache(maxsize=None)
+def load_score_cube(cube_path: str = CUBE_PATH) -> Optional[np.ndarray]:
+    """Memory-map the cube, or return None if it is missing or stale."""
+    try:
+        meta = json.loads(_meta_path(cube_path).read_text())
+        cube = np.load(cube_path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.info(f"Score cube unavailable, using scalar factors: {e}")
+        return None
+    if meta.get("fingerprint") != cube_fingerprint() or cube.shape != CUBE_SHAPE:
+        logger.warning("Score cube is stale, using scalar factors; rebuild with --build")
+        return None
+    return cube
+
+
+def lookup_adjustment_factors(user_data: Dict[str, Any]) -> Dict[str, float]:
+    """Factor lookup through the cube, falling back to the scalar rules."""
+    cube = load_score_cube()
+    if cube is None:
+        return calculate_risk_adjustment_factors(user_data)
+    values = cube[cube_index(user_data)]
+    return {name: float(value) for name, value in zip(FACTOR_NAMES, values)}
+
+
+def _random_form(rng: random.Random) -> Dict[str, Any]:
+    user_data = {field: rng.choice(options) for field, options in FIELD_OPTIONS.items()}
+    user_data.update(
+        age=rng.randint(*AGE_RANGE[:2]),
+        age_menarche=rng.randint(*MENARCHE_AGE_RANGE[:2]),
+        relatives_with_cancer=rng.randint(*RELATIVES_RANGE[:2]),
+        age_menopause=rng.randint(*MENOPAUSE_AGE_RANGE[:2]) if user_data["menopause"] == "Yes" else None,
+        pregnancy_age=rng.randint(*PREGNANCY_AGE_RANGE[:2]) if user_data["pregnancy"] == "Yes" else None,
+    )
+    return user_data
+
+
+def verify_score_cube(cube_path: str = CUBE_PATH, samples: int = 100_000, seed: int = 0) -> int:
+    """
+    Compare cube lookups with the scalar code on random form inputs drawn
+    from the full input space.
+
+    Returns:
+        int: Number of mismatching samples
+    """
+    cube = load_score_cube(cube_path)
+    if cube is None:
+        raise RuntimeError(f"No valid score cube at {cube_path}")
+    rng = random.Random(seed)
+    mismatches = 0
+    for _ in range(samples):
+        user_data = _random_form(rng)
+        expected = calculate_risk_adjustment_factors(user_data)
+        actual = cube[cube_index(user_data)]
+        if any(expected[name] != value for name, value in zip(FACTOR_NAMES, actual)):
+            mismatches += 1
+            if mismatches <= 5:
+                logger.error(f"Mismatch for {user_data}: {dict(zip(FACTOR_NAMES, actual))} != {expected}")
+    logger.info(f"Verified {samples} samples: {mismatches} mismatches")
+    return mismatches
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build or verify the score lookup cube")
+    parser.add_argument("--build", action="store_true", help="Write the cube")
+    parser.add_argument("--verify", action="store_true", help="Check the cube against the scalar code")
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--path", default=CUBE_PATH)
+    args = parser.parse_args()
+
+    if args.build:
+        build_score_cube(args.path)
+    if args.verify:
+        sys.exit(1 if verify_score_cube(args.path, args.samples) else 0)
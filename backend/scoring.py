@@ -1,197 +1,387 @@
+import math
+import os
 import sqlite3
-import pandas as pd
-from typing import List, Dict, Any
+import time
 import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from backend.models import RiskForm
+from backend.scoring_core import (
+    build_risk_result,
+    dense_age_index,
+    DEFAULT_BASELINE,
+    DENSE_AGE_MAX,
+    MULTIPLIERS,
+    MULTIPLIER_LOG_SD,
+    NEUTRAL_ANSWERS,
+    AVERAGE_KEY,
+    CHART_AGE_MIN,
+    CHART_AGE_MAX,
+)
+from backend.score_cube import lookup_adjustment_factors
+from backend.snapshot import SNAPSHOT_PATH, load_snapshot
+from backend.factor_model import RULES_MODEL, REPLACED_MULTIPLIERS, get_factor_model, encode_form, age_group_code
+from backend.scoring_batch import repeat_form, batch_adjustment_factors, combined_multiplier
+from backend.form_options import FIELD_OPTIONS
+
+# Answers a person can change; /score/whatif ranks switching each of them
+MODIFIABLE_FIELDS = ("smoking", "alcohol", "exercise", "hormonal_use", "had_mammo")
+
+# Monte Carlo settings for risk_interval
+INTERVAL_DRAWS = 4000
+INTERVAL_LEVEL = 0.95
 
 # Database path
 DB_PATH = "backend/data/processed/breast_cancer_risk.db"
 
-def get_baseline_risk(age: int, ethnicity: str) -> float:
+# How often a process checks whether an ETL job replaced the scoring data
+RELOAD_CHECK_SECONDS = 5.0
+_data_stamp = None
+_next_reload_check = 0.0
+
+@lru_cache(maxsize=1)
+def load_dense_baseline() -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    """
+    (ethnicity -> row, ethnicity x age rates, ethnicity x age record counts),
+    loaded once per process.
+
+    Prefers the memory-mapped snapshot, which every worker shares; the
+    risk_baseline_dense table is only read when no snapshot is built.
+    """
+    snapshot = load_snapshot()
+    if snapshot is not None and "baseline" in snapshot:
+        index = {ethnicity: i for i, ethnicity in enumerate(snapshot.meta["ethnicities"])}
+        rates = snapshot.array("baseline")
+        records = snapshot.array("records") if "records" in snapshot else np.zeros_like(rates)
+        return index, rates, records
+
     try:
-        with sqlite3.connect("backend/data/processed/breast_cancer_risk.db") as conn:
-            query = """
-                SELECT risk_rate 
-                FROM risk_baseline
-                WHERE ethnicity = ? 
-                ORDER BY ABS(age - ?)
-                LIMIT 1
-            """
-            result = pd.read_sql_query(query, conn, params=(ethnicity, age))
-            if not result.empty:
-                return result.iloc[0]['risk_rate']
-
-            # Fallback if no exact match
-            query = "SELECT AVG(risk_rate) as avg_risk FROM risk_baseline"
-            result = pd.read_sql_query(query, conn)
-            return result.iloc[0]['avg_risk'] or 0.01
-    except Exception as e:
-        print(f"Error accessing baseline risk: {e}")
-        return 0.01
-
-def calculate_risk_adjustment_factors(user_data: Dict[str, Any]) -> Dict[str, float]:
-    factors = {
-        'genetic': 1.0,
-        'hormonal': 1.0,
-        'lifestyle': 1.0,
-        'breast_health': 1.0
+        with sqlite3.connect(DB_PATH) as conn:
+            rows = conn.execute(
+                "SELECT ethnicity, age, risk_rate, total_records FROM risk_baseline_dense"
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error loading dense baseline: {e}")
+        rows = []
+
+    ethnicities = sorted({row[0] for row in rows})
+    index = {ethnicity: i for i, ethnicity in enumerate(ethnicities)}
+    rates = np.full((len(ethnicities), DENSE_AGE_MAX + 1), np.nan)
+    records = np.zeros((len(ethnicities), DENSE_AGE_MAX + 1))
+    for ethnicity, age, rate, total_records in rows:
+        rates[index[ethnicity], age] = rate
+        records[index[ethnicity], age] = total_records or 0
+    return index, rates, records
+
+
+def _baseline_row(ethnicity: str) -> Optional[int]:
+    index = load_dense_baseline()[0]
+    return index.get(ethnicity, index.get(AVERAGE_KEY))
+
+
+def _baseline_curve(ethnicity: str) -> Optional[np.ndarray]:
+    row = _baseline_row(ethnicity)
+    return None if row is None else load_dense_baseline()[1][row]
+
+
+def get_baseline_risk(age: int, ethnicity: str) -> float:
+    curve = _baseline_curve(ethnicity)
+    if curve is None:
+        return DEFAULT_BASELINE
+    rate = curve[dense_age_index(age)]
+    return DEFAULT_BASELINE if np.isnan(rate) else float(rate)
+
+
+def _location_curve(location: Optional[str], ethnicity: str) -> Tuple[Optional[np.ndarray], str]:
+    """
+    (incidence ratio to the BCSC baseline per year of age, source level) for
+    a country name or ISO code; (None, "bcsc") when nothing applies. The
+    fallback hierarchy is resolved in the snapshot, so this is two lookups.
+    """
+    snapshot = load_snapshot()
+    if not location or snapshot is None or "location_index" not in snapshot:
+        return None, "bcsc"
+    country = snapshot.meta["locations"].get(location.strip().lower())
+    row = _baseline_row(ethnicity)
+    if country is None or row is None:
+        return None, "bcsc"
+    curve = int(snapshot.array("location_index")[country, row])
+    level = snapshot.meta["location_levels"][int(snapshot.array("location_level")[country, row])]
+    return (None if curve < 0 else snapshot.array("location_curves")[curve]), level
+
+
+def get_location_factor(age: int, ethnicity: str, location: Optional[str]) -> Tuple[float, str]:
+    """Multiplier taking the BCSC baseline to `location`, and its source level."""
+    curve, level = _location_curve(location, ethnicity)
+    return (1.0 if curve is None else float(curve[dense_age_index(age)])), level
+
+
+@lru_cache(maxsize=32)
+def _chart_curves(ethnicity: str) -> Tuple[List[int], List[float], List[float]]:
+    index, rates, _ = load_dense_baseline()
+    chart = slice(CHART_AGE_MIN, CHART_AGE_MAX + 1)
+    if ethnicity not in index:
+        return [], [], []
+    average = rates[index[AVERAGE_KEY]][chart].tolist() if AVERAGE_KEY in index else []
+    return list(range(CHART_AGE_MIN, CHART_AGE_MAX + 1)), rates[index[ethnicity]][chart].tolist(), average
+
+
+def get_age_ethnicity_comparison_data(age: int, ethnicity: str) -> Dict[str, Any]:
+    age_groups, ethnicity_rates, average_rates = _chart_curves(ethnicity)
+    return {
+        "age_groups": age_groups,
+        "ethnicity_rates": ethnicity_rates,
+        "average_rates": average_rates,
+        "user_age": age,
+        "user_risk": get_baseline_risk(age, ethnicity)
     }
 
-    # Genetic factors
-    if user_data["relatives_with_cancer"] >= 2:
-        factors['genetic'] *= 3.0
-    elif user_data["relatives_with_cancer"] == 1:
-        factors['genetic'] *= 1.8
-
-    if user_data["brca_known"] == "Yes":
-        factors['genetic'] *= 4.0
-    elif user_data["brca_known"] == "Not tested / Not sure":
-        factors['genetic'] *= 1.2
-
-    # Hormonal
-    if user_data["age_menarche"] <= 11:
-        factors['hormonal'] *= 1.3
-
-    if user_data["menopause"] == "Yes" and user_data.get("age_menopause", 0) > 55:
-        factors['hormonal'] *= 1.4
-    elif user_data["menopause"] == "No" and user_data["age"] > 55:
-        factors['hormonal'] *= 1.2
-
-    if user_data["hormonal_use"] == "Yes":
-        factors['hormonal'] *= 1.25
-
-    if user_data["pregnancy"] == "Yes" and user_data.get("pregnancy_age", 0) >= 30:
-        factors['hormonal'] *= 1.15
-    elif user_data["pregnancy"] == "No":
-        factors['hormonal'] *= 1.1
-
-    if user_data["breastfeeding"] == "Yes":
-        factors['hormonal'] *= 0.9
-
-    if user_data["pcos"] == "Yes":
-        factors['hormonal'] *= 1.2
-
-    # Lifestyle
-    if user_data["smoking"] == "Yes":
-        factors['lifestyle'] *= 1.3
-    if user_data["alcohol"] == "Yes":
-        factors['lifestyle'] *= 1.2
-
-    if user_data["exercise"] in ["Rarely", "1–2x/week"]:
-        factors['lifestyle'] *= 1.15
-    elif user_data["exercise"] == "Daily":
-        factors['lifestyle'] *= 0.9
-
-    # Breast Health
-    if user_data["breast_density"] == "Yes":
-        factors['breast_health'] *= 1.4
-    if user_data["benign_lumps"] == "Yes":
-        factors['breast_health'] *= 1.3
-    if user_data["had_mammo"] == "Yes":
-        factors['breast_health'] *= 0.8
-
-    return factors
-
-def generate_contextual_reasons(factors: Dict[str, float], baseline: float, user_data: Dict[str, Any]) -> List[str]:
-    reasons = [f"Baseline risk for your demographic: {baseline*100:.1f}%"]
-
-    if factors['genetic'] > 1.5:
-        if factors['genetic'] >= 3.0:
-            reasons.append("Strong family history significantly increases risk")
-        else:
-            reasons.append("Family history moderately increases risk")
-
-    if factors['hormonal'] >= 1.2:
-        reasons.append("Hormonal history indicates elevated lifetime exposure")
-
-    if factors['lifestyle'] >= 1.2:
-        reasons.append("Lifestyle factors (smoking/alcohol/inactivity) increase risk")
-    elif factors['lifestyle'] <= 0.9:
-        reasons.append("Healthy lifestyle choices provide some protection")
-
-    if factors['breast_health'] >= 1.3:
-        reasons.append("Breast health history (density, benign lumps) may increase risk")
-
-    if user_data.get("anxiety_level") in ["High", "Debilitating"]:
-        reasons.append("You're feeling very anxious – consider consulting a healthcare professional")
-
-    return reasons
-
-def generate_recommendations(factors: Dict[str, float], risk_level: str) -> List[str]:
-    recs = []
-    if risk_level in ["Moderate", "High", "Very High"]:
-        recs.append("Consider regular breast exams and screenings")
-        recs.append("Consult with a healthcare provider for a personalized plan")
-    if factors['lifestyle'] > 1.1:
-        recs.append("Improve lifestyle: quit smoking, reduce alcohol, and exercise")
-    if factors['hormonal'] > 1.2:
-        recs.append("Discuss hormone-related medical history with your doctor")
-    return recs
-
-def categorize_risk_level(risk_percentage: float) -> str:
-    if risk_percentage < 5:
-        return "Very Low"
-    elif 5 <= risk_percentage < 10:
-        return "Low"
-    elif 10 <= risk_percentage < 20:
-        return "Moderate"
-    elif 20 <= risk_percentage < 30:
-        return "High"
+def population_percentile(risk_percentage: float, age: int, ethnicity: str) -> Optional[float]:
+    """
+    Percentile of `risk_percentage` among the reference population of the
+    same ethnicity and BCSC age band (ties count half), found by binary
+    search in the snapshot's sorted score distributions.
+
+    Returns:
+        Percentile in 0..100, or None if the snapshot has no distributions
+    """
+    snapshot = load_snapshot()
+    if snapshot is None or "percentile_scores" not in snapshot:
+        return None
+    index = load_dense_baseline()[0]
+    offsets = snapshot.array("percentile_offsets")
+    band = age_group_code(age) - 1
+
+    for key in (ethnicity, AVERAGE_KEY):
+        if key not in index:
+            continue
+        group = index[key] * snapshot.meta["age_bands"] + band
+        lo, hi = int(offsets[group]), int(offsets[group + 1])
+        if hi > lo:
+            break
     else:
-        return "Very High"
+        return None
 
-def get_age_ethnicity_comparison_data(age: int, ethnicity: str) -> Dict[str, Any]:
-    try:
-        with sqlite3.connect(DB_PATH) as conn:
-            query = """
-                SELECT age, risk_rate 
-                FROM risk_baseline
-                WHERE ethnicity = ?
-                ORDER BY age
-            """
-            ethnic_data = pd.read_sql_query(query, conn, params=(ethnicity,))
-            
-            query_avg = """
-                SELECT age, AVG(risk_rate) as risk_rate
-                FROM risk_baseline
-                GROUP BY age
-                ORDER BY age
-            """
-            avg_data = pd.read_sql_query(query_avg, conn)
-            
-            user_risk = get_baseline_risk(age, ethnicity)
-            
-            return {
-                "age_groups": ethnic_data['age'].tolist() if not ethnic_data.empty else [],
-                "ethnicity_rates": ethnic_data['risk_rate'].tolist() if not ethnic_data.empty else [],
-                "average_rates": avg_data['risk_rate'].tolist() if not avg_data.empty else [],
-                "user_age": age,
-                "user_risk": user_risk
-            }
-    except Exception as e:
-        print(f"Error getting comparison data: {e}")
-        return {
-            "age_groups": [],
-            "ethnicity_rates": [],
-            "average_rates": [],
-            "user_age": age,
-            "user_risk": 0.0
-        }
+    scores = snapshot.array("percentile_scores")[lo:hi]
+    cumweight = snapshot.array("percentile_cumweight")[lo:hi]
+    below = np.searchsorted(scores, risk_percentage, side="left")
+    at_or_below = np.searchsorted(scores, risk_percentage, side="right")
+    share_below = cumweight[below - 1] if below else 0.0
+    share_at_or_below = cumweight[at_or_below - 1] if at_or_below else 0.0
+    return round(float(share_below + share_at_or_below) * 50, 1)
+
+
+def model_adjustment_factors(batch: Dict[str, np.ndarray], model: str = RULES_MODEL,
+                             multipliers: Mapping[str, Any] = MULTIPLIERS) -> Dict[str, np.ndarray]:
+    """
+    batch_adjustment_factors under the rule multipliers or a fitted model.
+    A fitted model drops the multipliers it replaces and multiplies in its
+    odds ratios, computed once per distinct encoding in the batch.
+
+    Raises:
+        UnknownModelError: If the model version does not exist
+    """
+    if model == RULES_MODEL:
+        return batch_adjustment_factors(batch, multipliers)
+    factor_model = get_factor_model(model)
+    rules = batch_adjustment_factors(batch, dict(multipliers, **{name: 1.0 for name in REPLACED_MULTIPLIERS}))
+
+    rows = len(next(iter(batch.values())))
+    fitted_by_encoding: Dict[Tuple, Dict[str, float]] = {}
+    fitted = []
+    for i in range(rows):
+        row = {field: values[i] for field, values in batch.items()}
+        encoding = tuple(encode_form(row).items())
+        if encoding not in fitted_by_encoding:
+            fitted_by_encoding[encoding] = factor_model.factors(row)
+        fitted.append(fitted_by_encoding[encoding])
+    return {
+        group: values * np.array([factors.get(group, 1.0) for factors in fitted])
+        for group, values in rules.items()
+    }
+
+
+def _scoring_data_stamp() -> Tuple:
+    stamps = []
+    for path in (SNAPSHOT_PATH, DB_PATH):
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_ino, stat.st_mtime_ns))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def reload_scoring_data() -> None:
+    """Drop the cached baseline so the next lookup reads the current files."""
+    load_snapshot.cache_clear()
+    load_dense_baseline.cache_clear()
+    _chart_curves.cache_clear()
+
+
+def refresh_if_rebuilt() -> None:
+    """
+    Reload the baseline if the snapshot or database file was replaced.
+
+    ETL jobs swap in new files with a rename, so every worker notices
+    within RELOAD_CHECK_SECONDS at the cost of two stat calls.
+    """
+    global _data_stamp, _next_reload_check
+    now = time.monotonic()
+    if now < _next_reload_check:
+        return
+    _next_reload_check = now + RELOAD_CHECK_SECONDS
+    stamp = _scoring_data_stamp()
+    if _data_stamp is not None and stamp != _data_stamp:
+        reload_scoring_data()
+    _data_stamp = stamp
+
+
+def calculate_risk_score(user_data: Dict[str, Any], model: str = RULES_MODEL) -> Dict[str, Any]:
+    """
+    Score a form with the hand-set multipliers, or with a fitted factor
+    model version (see backend/factor_model.py).
+
+    Raises:
+        UnknownModelError: If the model version does not exist
+    """
+    refresh_if_rebuilt()
+    bcsc_baseline = get_baseline_risk(user_data["age"], user_data["ethnicity"])
+    location_factor, baseline_source = get_location_factor(
+        user_data["age"], user_data["ethnicity"], user_data.get("location"))
+    baseline = bcsc_baseline * location_factor
+    if model == RULES_MODEL:
+        factors = lookup_adjustment_factors(user_data)
+    else:
+        factors = {group: float(values[0])
+                   for group, values in model_adjustment_factors(repeat_form(user_data, 1), model).items()}
+    chart_data = get_age_ethnicity_comparison_data(user_data["age"], user_data["ethnicity"])
+    result = build_risk_result(user_data, baseline, factors, chart_data)
+    result["model"] = model
+    result["baseline_source"] = baseline_source
+    # The reference population is BCSC, scored with the rule multipliers and
+    # NEUTRAL_ANSWERS for what BCSC doesn't record, before the location
+    # adjustment; the user is placed by the same score
+    comparable = lookup_adjustment_factors(dict(user_data, **NEUTRAL_ANSWERS))
+    risk_percentage = min(100, max(0, bcsc_baseline * math.prod(comparable.values()) * 100))
+    result["population_percentile"] = population_percentile(
+        risk_percentage, user_data["age"], user_data["ethnicity"])
+    return result
+
+
+def calculate_risk_interval(user_data: Dict[str, Any], draws: int = INTERVAL_DRAWS,
+                            level: float = INTERVAL_LEVEL, seed: Optional[int] = None,
+                            model: str = RULES_MODEL) -> Dict[str, Any]:
+    """
+    Monte Carlo interval around risk_percentage.
+
+    Each draw samples the baseline rate from a Gamma posterior of the
+    group's case count (rate * total_records cases out of total_records),
+    and every multiplier from a lognormal centred on its point value. All
+    draws go through batch_adjustment_factors in one vectorized pass.
+
+    Args:
+        user_data: RiskForm fields
+        draws: Number of Monte Carlo draws
+        level: Central coverage of the interval
+        seed: Seed for the RNG; fixed seeds give identical intervals
+        model: Factor model version; a fitted model's odds ratios are
+            taken at their point values
+    """
+    rng = np.random.default_rng(seed)
+
+    baseline = get_baseline_risk(user_data["age"], user_data["ethnicity"])
+    location_factor, _ = get_location_factor(user_data["age"], user_data["ethnicity"], user_data.get("location"))
+    row = _baseline_row(user_data["ethnicity"])
+    records = 0.0 if row is None else float(load_dense_baseline()[2][row][dense_age_index(user_data["age"])])
+    if records > 0 and baseline > 0:
+        # Jeffreys prior on the Poisson case count keeps small groups wide
+        baseline_draws = rng.gamma(baseline * records + 0.5, 1.0 / records, size=draws) * location_factor
+    else:
+        baseline_draws = np.full(draws, baseline * location_factor)
+
+    noise = rng.standard_normal((len(MULTIPLIERS), draws))
+    multipliers = {
+        name: value * np.exp(MULTIPLIER_LOG_SD.get(name, 0.0) * z)
+        for (name, value), z in zip(MULTIPLIERS.items(), noise)
+    }
+    factors = model_adjustment_factors(repeat_form(user_data, 1), model, multipliers)
+    risk = np.clip(baseline_draws * combined_multiplier(factors) * 100, 0, 100)
+
+    tail = (1 - level) / 2
+    lower, upper = np.quantile(risk, [tail, 1 - tail])
+    return {
+        "lower": round(float(lower), 1),
+        "upper": round(float(upper), 1),
+        "level": level,
+        "draws": draws
+    }
+
+
+def calculate_risk_trajectory(user_data: Dict[str, Any], model: str = RULES_MODEL) -> Dict[str, List]:
+    """
+    The user's projected risk at every age of the comparison chart.
+
+    The form is repeated once per age with only `age` varied, so age-dependent
+    rules (e.g. no menopause after 55) switch on where they apply, all in one
+    vectorized pass.
+    """
+    ages = np.arange(CHART_AGE_MIN, CHART_AGE_MAX + 1)
+    batch = repeat_form(user_data, len(ages))
+    batch["age"] = ages
+
+    curve = _baseline_curve(user_data["ethnicity"])
+    baseline = np.full(len(ages), DEFAULT_BASELINE) if curve is None else curve[ages]
+    baseline = np.where(np.isnan(baseline), DEFAULT_BASELINE, baseline)
+    location_curve, _ = _location_curve(user_data.get("location"), user_data["ethnicity"])
+    if location_curve is not None:
+        baseline = baseline * location_curve[ages]
+
+    risk = np.clip(baseline * combined_multiplier(model_adjustment_factors(batch, model)) * 100, 0, 100)
+    return {
+        "ages": ages.tolist(),
+        "risk_percentages": np.round(risk, 2).tolist()
+    }
+
+
+def calculate_whatif(user_data: Dict[str, Any], model: str = RULES_MODEL) -> Dict[str, Any]:
+    """
+    Risk change for every single-field change of a modifiable answer.
+
+    All scenarios share the user's age and ethnicity, so one baseline lookup
+    and one vectorized factor pass cover them all.
+
+    Raises:
+        UnknownModelError: If the model version does not exist
+    """
+    scenarios = [
+        (field, option)
+        for field in MODIFIABLE_FIELDS
+        for option in FIELD_OPTIONS[field]
+        if option != user_data.get(field)
+    ]
+    refresh_if_rebuilt()
+    batch = repeat_form(user_data, len(scenarios) + 1)  # row 0 is the current answers
+    for row, (field, option) in enumerate(scenarios, start=1):
+        batch[field][row] = option
 
-def calculate_risk_score(user_data: Dict[str, Any]) -> Dict[str, Any]:
     baseline = get_baseline_risk(user_data["age"], user_data["ethnicity"])
-    factors = calculate_risk_adjustment_factors(user_data)
-    adjusted_risk = baseline * np.prod(list(factors.values()))
-    risk_percentage = min(100, max(0, adjusted_risk * 100))
-    risk_level = categorize_risk_level(risk_percentage)
+    baseline *= get_location_factor(user_data["age"], user_data["ethnicity"], user_data.get("location"))[0]
+    multipliers = combined_multiplier(model_adjustment_factors(batch, model))
+    risk = np.clip(baseline * multipliers * 100, 0, 100)
 
+    changes = [
+        {
+            "field": field,
+            "current": user_data.get(field),
+            "alternative": option,
+            "risk_percentage": round(float(risk[row]), 2),
+            "delta": round(float(risk[row] - risk[0]), 2),
+        }
+        for row, (field, option) in enumerate(scenarios, start=1)
+    ]
+    changes.sort(key=lambda change: change["delta"])
     return {
-        "risk_estimate": risk_level,
-        "risk_percentage": round(risk_percentage, 1),
-        "timestamp": pd.Timestamp.now().isoformat(),
-        "factor_breakdown": {k: round(v, 2) for k, v in factors.items()},
-        "recommendations": generate_recommendations(factors, risk_level),
-        "contextual_reasons": generate_contextual_reasons(factors, baseline, user_data),
-        "chart_data": get_age_ethnicity_comparison_data(user_data["age"], user_data["ethnicity"]),
-        "user_summary": user_data
+        "risk_percentage": round(float(risk[0]), 2),
+        "scenarios": changes
     }
@@ -0,0 +1,307 @@
+"""
+Dependency-free risk scoring core.
+
+Only the standard library is imported here so the same factor logic can
+run inside the backend and inside the Streamlit frontend (local scoring
+from a bundled baseline snapshot). Database access stays in scoring.py.
+"""
+import json
+import math
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from backend.symptom_triage import triage_symptom, symptom_reasons
+
+# 3 adds the location adjustment (location_* keys)
+SNAPSHOT_VERSION = 3
+DEFAULT_BASELINE = 0.01
+
+# Dense baseline curves hold one rate per year of age, 0..DENSE_AGE_MAX
+DENSE_AGE_MAX = 120
+# Pseudo-ethnicity holding the mean curve across ethnicities
+AVERAGE_KEY = "All"
+# Age span shown in the population comparison chart
+CHART_AGE_MIN, CHART_AGE_MAX = 18, 90
+
+# Relative-risk multipliers applied by calculate_risk_adjustment_factors
+MULTIPLIERS: Dict[str, float] = {
+    'relatives_two_plus': 3.0,
+    'relatives_one': 1.8,
+    'brca_positive': 4.0,
+    'brca_unknown': 1.2,
+    'early_menarche': 1.3,
+    'late_menopause': 1.4,
+    'premenopausal_over_55': 1.2,
+    'hormonal_use': 1.25,
+    'late_first_pregnancy': 1.15,
+    'nulliparous': 1.1,
+    'breastfeeding': 0.9,
+    'pcos': 1.2,
+    'smoking': 1.3,
+    'alcohol': 1.2,
+    'low_exercise': 1.15,
+    'daily_exercise': 0.9,
+    'dense_breasts': 1.4,
+    'benign_lumps': 1.3,
+    'prior_mammogram': 0.8,
+}
+
+# Spread of each multiplier on the log scale, used to sample plausible
+# alternatives when estimating uncertainty (0.1 is roughly a ±20% 95% range)
+MULTIPLIER_LOG_SD: Dict[str, float] = {
+    'relatives_two_plus': 0.15,
+    'relatives_one': 0.1,
+    'brca_positive': 0.25,
+    'brca_unknown': 0.1,
+    'early_menarche': 0.1,
+    'late_menopause': 0.1,
+    'premenopausal_over_55': 0.1,
+    'hormonal_use': 0.1,
+    'late_first_pregnancy': 0.1,
+    'nulliparous': 0.1,
+    'breastfeeding': 0.1,
+    'pcos': 0.15,
+    'smoking': 0.1,
+    'alcohol': 0.1,
+    'low_exercise': 0.1,
+    'daily_exercise': 0.1,
+    'dense_breasts': 0.1,
+    'benign_lumps': 0.1,
+    'prior_mammogram': 0.1,
+}
+
+# Answers for questions BCSC does not record; the reference population is
+# scored with these (see etl/population_scores.py), so a user is placed in
+# it with them too
+NEUTRAL_ANSWERS: Dict[str, Any] = {
+    "brca_known": "No",
+    "breastfeeding": "No",
+    "pcos": "No",
+    "smoking": "No",
+    "alcohol": "No",
+    "exercise": "3–5x/week",
+    "benign_lumps": "No",
+    "had_mammo": "No",
+    "age_menopause": None,
+}
+
+
+def calculate_risk_adjustment_factors(user_data: Dict[str, Any]) -> Dict[str, float]:
+    m = MULTIPLIERS
+    factors = {
+        'genetic': 1.0,
+        'hormonal': 1.0,
+        'lifestyle': 1.0,
+        'breast_health': 1.0
+    }
+
+    # Genetic factors
+    if user_data["relatives_with_cancer"] >= 2:
+        factors['genetic'] *= m['relatives_two_plus']
+    elif user_data["relatives_with_cancer"] == 1:
+        factors['genetic'] *= m['relatives_one']
+
+    if user_data["brca_known"] == "Yes":
+        factors['genetic'] *= m['brca_positive']
+    elif user_data["brca_known"] == "Not tested / Not sure":
+        factors['genetic'] *= m['brca_unknown']
+
+    # Hormonal
+    if user_data["age_menarche"] <= 11:
+        factors['hormonal'] *= m['early_menarche']
+
+    # Optional ages arrive as None when the question was not shown
+    if user_data["menopause"] == "Yes" and (user_data.get("age_menopause") or 0) > 55:
+        factors['hormonal'] *= m['late_menopause']
+    elif user_data["menopause"] == "No" and user_data["age"] > 55:
+        factors['hormonal'] *= m['premenopausal_over_55']
+
+    if user_data["hormonal_use"] == "Yes":
+        factors['hormonal'] *= m['hormonal_use']
+
+    if user_data["pregnancy"] == "Yes" and (user_data.get("pregnancy_age") or 0) >= 30:
+        factors['hormonal'] *= m['late_first_pregnancy']
+    elif user_data["pregnancy"] == "No":
+        factors['hormonal'] *= m['nulliparous']
+
+    if user_data["breastfeeding"] == "Yes":
+        factors['hormonal'] *= m['breastfeeding']
+
+    if user_data["pcos"] == "Yes":
+        factors['hormonal'] *= m['pcos']
+
+    # Lifestyle
+    if user_data["smoking"] == "Yes":
+        factors['lifestyle'] *= m['smoking']
+    if user_data["alcohol"] == "Yes":
+        factors['lifestyle'] *= m['alcohol']
+
+    if user_data["exercise"] in ["Rarely", "1–2x/week"]:
+        factors['lifestyle'] *= m['low_exercise']
+    elif user_data["exercise"] == "Daily":
+        factors['lifestyle'] *= m['daily_exercise']
+
+    # Breast Health
+    if user_data["breast_density"] == "Yes":
+        factors['breast_health'] *= m['dense_breasts']
+    if user_data["benign_lumps"] == "Yes":
+        factors['breast_health'] *= m['benign_lumps']
+    if user_data["had_mammo"] == "Yes":
+        factors['breast_health'] *= m['prior_mammogram']
+
+    return factors
+
+
+def generate_contextual_reasons(factors: Dict[str, float], baseline: float, user_data: Dict[str, Any],
+                                triage: Optional[Dict[str, Any]] = None) -> List[str]:
+    reasons = [f"Baseline risk for your demographic: {baseline*100:.1f}%"]
+
+    if triage is None:
+        triage = triage_symptom(user_data.get("symptom"))
+    reasons.extend(symptom_reasons(triage))
+
+    if factors['genetic'] > 1.5:
+        if factors['genetic'] >= 3.0:
+            reasons.append("Strong family history significantly increases risk")
+        else:
+            reasons.append("Family history moderately increases risk")
+
+    if factors['hormonal'] >= 1.2:
+        reasons.append("Hormonal history indicates elevated lifetime exposure")
+
+    if factors['lifestyle'] >= 1.2:
+        reasons.append("Lifestyle factors (smoking/alcohol/inactivity) increase risk")
+    elif factors['lifestyle'] <= 0.9:
+        reasons.append("Healthy lifestyle choices provide some protection")
+
+    if factors['breast_health'] >= 1.3:
+        reasons.append("Breast health history (density, benign lumps) may increase risk")
+
+    if user_data.get("anxiety_level") in ["High", "Debilitating"]:
+        reasons.append("You're feeling very anxious – consider consulting a healthcare professional")
+
+    return reasons
+
+
+def generate_recommendations(factors: Dict[str, float], risk_level: str,
+                             triage: Optional[Dict[str, Any]] = None) -> List[str]:
+    recs = []
+    if triage is not None and triage["red_flag"]:
+        recs.append("See a doctor promptly about the symptom you described, whatever your estimated risk")
+    if risk_level in ["Moderate", "High", "Very High"]:
+        recs.append("Consider regular breast exams and screenings")
+        recs.append("Consult with a healthcare provider for a personalized plan")
+    if factors['lifestyle'] > 1.1:
+        recs.append("Improve lifestyle: quit smoking, reduce alcohol, and exercise")
+    if factors['hormonal'] > 1.2:
+        recs.append("Discuss hormone-related medical history with your doctor")
+    return recs
+
+
+def categorize_risk_level(risk_percentage: float) -> str:
+    if risk_percentage < 5:
+        return "Very Low"
+    elif 5 <= risk_percentage < 10:
+        return "Low"
+    elif 10 <= risk_percentage < 20:
+        return "Moderate"
+    elif 20 <= risk_percentage < 30:
+        return "High"
+    else:
+        return "Very High"
+
+
+def build_risk_result(user_data: Dict[str, Any], baseline: float, factors: Dict[str, float],
+                      chart_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the /score response from a baseline rate and adjustment factors."""
+    adjusted_risk = baseline * math.prod(factors.values())
+    risk_percentage = min(100, max(0, adjusted_risk * 100))
+    risk_level = categorize_risk_level(risk_percentage)
+    triage = triage_symptom(user_data.get("symptom"))
+
+    return {
+        "risk_estimate": risk_level,
+        "risk_percentage": round(risk_percentage, 1),
+        "timestamp": datetime.now().isoformat(),
+        "factor_breakdown": {k: round(v, 2) for k, v in factors.items()},
+        "recommendations": generate_recommendations(factors, risk_level, triage),
+        "contextual_reasons": generate_contextual_reasons(factors, baseline, user_data, triage),
+        "symptom_triage": triage,
+        "chart_data": chart_data,
+        "user_summary": user_data
+    }
+
+
+# -------------------------------------------------------------------
+# Baseline snapshot (exported by backend/etl/export_snapshot.py)
+# -------------------------------------------------------------------
+def load_baseline_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a JSON baseline snapshot.
+
+    Returns:
+        The snapshot dict, or None if the file is missing or has an
+        unsupported version.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def dense_age_index(age: int) -> int:
+    return min(max(int(age), 0), DENSE_AGE_MAX)
+
+
+def snapshot_baseline_risk(snapshot: Dict[str, Any], age: int, ethnicity: str) -> float:
+    rates = snapshot["ethnicities"].get(ethnicity) or snapshot["ethnicities"].get(AVERAGE_KEY)
+    if rates:
+        return rates[dense_age_index(age)]
+    return DEFAULT_BASELINE
+
+
+def snapshot_comparison_data(snapshot: Dict[str, Any], age: int, ethnicity: str) -> Dict[str, Any]:
+    rates = snapshot["ethnicities"].get(ethnicity)
+    average = snapshot["ethnicities"].get(AVERAGE_KEY)
+    return {
+        "age_groups": list(range(CHART_AGE_MIN, CHART_AGE_MAX + 1)) if rates else [],
+        "ethnicity_rates": rates[CHART_AGE_MIN:CHART_AGE_MAX + 1] if rates else [],
+        "average_rates": average[CHART_AGE_MIN:CHART_AGE_MAX + 1] if average else [],
+        "user_age": age,
+        "user_risk": snapshot_baseline_risk(snapshot, age, ethnicity)
+    }
+
+
+def snapshot_location_factor(snapshot: Dict[str, Any], age: int, ethnicity: str,
+                             location: Optional[str]) -> Tuple[float, str]:
+    """
+    Multiplier taking the BCSC baseline to `location`, and its source
+    level; the snapshot counterpart of scoring.get_location_factor.
+    """
+    if not location or "location_index" not in snapshot:
+        return 1.0, "bcsc"
+    country = snapshot["locations"].get(location.strip().lower())
+    ethnicities = snapshot["location_ethnicities"]
+    key = ethnicity if ethnicity in ethnicities else AVERAGE_KEY
+    if country is None or key not in ethnicities:
+        return 1.0, "bcsc"
+    row = ethnicities.index(key)
+    curve = snapshot["location_index"][country][row]
+    level = snapshot["location_levels"][snapshot["location_level"][country][row]]
+    return (1.0 if curve < 0 else snapshot["location_curves"][curve][dense_age_index(age)]), level
+
+
+def score_with_snapshot(user_data: Dict[str, Any], snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Score a form entirely in-process from a baseline snapshot."""
+    baseline = snapshot_baseline_risk(snapshot, user_data["age"], user_data["ethnicity"])
+    location_factor, baseline_source = snapshot_location_factor(
+        snapshot, user_data["age"], user_data["ethnicity"], user_data.get("location"))
+    factors = calculate_risk_adjustment_factors(user_data)
+    chart_data = snapshot_comparison_data(snapshot, user_data["age"], user_data["ethnicity"])
+    result = build_risk_result(user_data, baseline * location_factor, factors, chart_data)
+    result["baseline_source"] = baseline_source
+    return result
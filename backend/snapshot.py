@@ -0,0 +1,117 @@
+"""
+Versioned binary snapshot of the scoring data.
+
+Workers map the file read-only, so with several uvicorn/gunicorn workers
+the arrays live once in the OS page cache instead of once per process,
+and scoring needs no SQLite handle.
+
+Layout (little-endian):
+
+    8 bytes   magic b"HLCSNAP\\0"
+    4 bytes   format version (uint32)
+    4 bytes   header length in bytes (uint32)
+    header    UTF-8 JSON: {"meta": {...}, "arrays": {name: {"dtype", "shape", "offset"}}}
+    data      raw C-order arrays, each starting on a 64-byte boundary
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = "backend/data/processed/scoring.snap"
+MAGIC = b"HLCSNAP\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    """
+    Write arrays and JSON metadata to `path`, replacing it atomically.
+
+    Workers that already mapped the old file keep reading the old inode
+    until they reload, so a rebuild never exposes a half-written file.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    meta = dict(meta, created_at=datetime.utcnow().isoformat())
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # iterate until the layout is stable (normally twice).
+    header_len = 0
+    while True:
+        offset = _align(_PREAMBLE.size + header_len)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _align(offset + array.nbytes)
+        header = json.dumps({"meta": meta, "arrays": layout}, separators=(",", ":")).encode("utf-8")
+        if len(header) == header_len:
+            break
+        header_len = len(header)
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(target)
+    logger.info(f"Wrote snapshot {target} ({target.stat().st_size // 1024} KiB, arrays: {', '.join(arrays)})")
+
+
+class Snapshot:
+    """Read-only view of a snapshot file; arrays are zero-copy views of the mapping."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a scoring snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self.path = path
+        self.meta: Dict[str, Any] = header["meta"]
+        self._layout: Dict[str, Dict[str, Any]] = header["arrays"]
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layout
+
+    def array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            spec = self._layout[name]
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            view = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=spec["offset"])
+            self._arrays[name] = view.reshape(spec["shape"])
+        return self._arrays[name]
+
+
+@lru_cache(maxsize=None)
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """Map the snapshot once per process, or return None if it is unavailable."""
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError) as e:
+        logger.info(f"Scoring snapshot unavailable ({e}); falling back to SQLite")
+        return None
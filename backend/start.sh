@@ -1,3 +1,25 @@
 #!/bin/bash
-uvicorn main:app --host=0.0.0.0 --port=10000
-
+# Single uvicorn process by default.
+#
+# The app is the backend package (backend.main:app) and its data paths
+# (backend/data/...) are relative to the repository root, so everything
+# runs from there whatever directory this script is started from.
+#
+# Multi-worker mode: set WEB_CONCURRENCY=N (N > 1) to run N worker
+# processes under gunicorn. All workers memory-map the same scoring
+# snapshot (backend/data/processed/scoring.snap) and score cube, so the
+# scoring data is held once in the page cache instead of once per worker
+# and no worker opens SQLite to score. Build both from the repository
+# root before starting:
+#   python -m backend.etl.build_baseline && python -m backend.score_cube --build
+# gunicorn is used instead of `uvicorn --workers` because it sets
+# TCP_NODELAY on the shared listening socket; without it every response
+# stalls ~40 ms on delayed ACKs.
+# Measure scaling with: python -m backend.benchmarks.worker_scaling --workers 1 2 4
+cd "$(dirname "$0")/.." || exit 1
+WORKERS=${WEB_CONCURRENCY:-1}
+if [ "$WORKERS" -gt 1 ]; then
+    exec gunicorn -k uvicorn.workers.UvicornWorker -w "$WORKERS" -b 0.0.0.0:10000 backend.main:app
+else
+    exec uvicorn backend.main:app --host=0.0.0.0 --port=10000
+fi
@@ -0,0 +1,348 @@
+"""
+Symptom free-text triage.
+
+The `symptom` answer is tokenized and matched against SYMPTOM_TERMS with
+a token-level Aho-Corasick automaton, so every phrase of the vocabulary is
+found in one pass over the text whatever the vocabulary size. Tokens that
+are not in the vocabulary are spelling-corrected first with symmetric
+delete lookups (edit distance 1, or 2 for long words), verified with an
+optimal-string-alignment distance and cached. Overlapping matches keep
+the longest phrase, and QUALIFIERS in the same clause turn a lump or
+discharge into its red flag. Matches shortly after a negation ("no lump")
+in the same clause are dropped, as are clauses about another part of the
+body. Bleeding and sores only count as red flags in a clause that names a
+breast site (SITE_REQUIRED), so "a blood test" or "mouth ulcer" don't.
+
+Only the standard library is used, like scoring_core, which calls this.
+The matcher is compiled once at import. See
+backend/benchmarks/symptom_matching.py for timings.
+"""
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# term -> phrasings, whether it is a red flag, and the reason shown to the user
+SYMPTOM_TERMS: Dict[str, Dict[str, Any]] = {
+    "bloody_discharge": {
+        "phrases": ("bloody nipple discharge", "bloody discharge", "discharge blood", "blood from nipple",
+                    "bleeding nipple", "nipple bleeding", "bleeding from nipple"),
+        "red_flag": True,
+        "reason": "Bloody nipple discharge should be checked by a doctor promptly",
+    },
+    "nipple_inversion": {
+        "phrases": ("inverted nipple", "nipple inverted", "nipple inversion", "nipple turned in", "nipple pulled in",
+                    "retracted nipple", "nipple retraction"),
+        "red_flag": True,
+        "reason": "A nipple that has newly turned inwards should be examined by a doctor soon",
+    },
+    "skin_dimpling": {
+        "phrases": ("dimpling", "skin dimpling", "puckering", "orange peel skin", "peau d orange"),
+        "red_flag": True,
+        "reason": "Dimpled or puckered breast skin is a warning sign that needs a prompt examination",
+    },
+    "hard_lump": {
+        "phrases": ("hard lump", "fixed lump", "immovable lump", "painless lump", "growing lump",
+                    "hard mass"),
+        "red_flag": True,
+        "reason": "A hard, fixed or growing lump should be examined by a doctor promptly",
+    },
+    "armpit_lump": {
+        "phrases": ("lump in armpit", "armpit lump", "underarm lump", "lump under arm",
+                    "swollen lymph nodes", "swollen glands", "axillary lump"),
+        "red_flag": True,
+        "reason": "A lump or swelling in the armpit should be checked by a doctor",
+    },
+    "inflammation": {
+        "phrases": ("red breast", "breast redness", "red and swollen", "hot breast", "warm breast",
+                    "inflamed breast"),
+        "red_flag": True,
+        "reason": "A red, swollen or warm breast needs prompt medical attention, "
+                  "even if it looks like an infection",
+    },
+    "nipple_skin_change": {
+        "phrases": ("nipple rash", "rash on nipple", "scaly nipple", "crusty nipple", "nipple ulcer",
+                    "ulcer on nipple", "breast ulcer", "ulcer on breast", "open sore"),
+        "red_flag": True,
+        "reason": "A rash, scaling or sore on the nipple or breast skin that does not heal "
+                  "should be seen by a doctor",
+    },
+    "weight_loss": {
+        "phrases": ("unexplained weight loss", "weight loss", "losing weight"),
+        "red_flag": True,
+        "reason": "Unexplained weight loss should be discussed with a doctor",
+    },
+    "lump": {
+        "phrases": ("lump", "mass", "bump", "knot", "thickening"),
+        "red_flag": False,
+        "reason": "Most breast lumps are benign, but any new lump should be examined by a clinician",
+    },
+    "size_change": {
+        "phrases": ("change in size", "change in shape", "one breast bigger", "asymmetry",
+                    "swollen breast", "swelling"),
+        "red_flag": False,
+        "reason": "A new change in the size, shape or swelling of one breast is worth showing to a doctor",
+    },
+    "nipple_discharge": {
+        "phrases": ("nipple discharge", "discharge", "milky discharge", "clear discharge"),
+        "red_flag": False,
+        "reason": "Clear or milky nipple discharge is usually benign, "
+                  "but new discharge from one side should be checked",
+    },
+    "breast_pain": {
+        "phrases": ("pain", "breast pain", "tenderness", "tender", "sore", "soreness", "ache", "aching"),
+        "red_flag": False,
+        "reason": "Breast pain on its own is rarely a sign of cancer and is often hormonal",
+    },
+    "cyclical_pain": {
+        "phrases": ("before my period", "during my period", "cyclical", "with my cycle"),
+        "red_flag": False,
+        "reason": "Symptoms that follow your menstrual cycle are usually hormonal",
+    },
+    "itching": {
+        "phrases": ("itch", "itchy", "itching"),
+        "red_flag": False,
+        "reason": "Itching alone is rarely a concern unless the skin of the nipple is changing",
+    },
+}
+
+# base term -> (red flag, words): the base term becomes the red flag when one
+# of the words appears in the same clause ("lump that is hard",
+# "nipple discharge with blood")
+QUALIFIERS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "lump": ("hard_lump", ("hard", "firm", "fixed", "immovable", "growing", "painless")),
+    "nipple_discharge": ("bloody_discharge", ("blood", "bloody", "bleeding")),
+}
+
+# Red flags that only count in a clause naming a breast site, and the term
+# they fall back to otherwise (None drops them)
+SITE_REQUIRED: Dict[str, Optional[str]] = {
+    "bloody_discharge": "nipple_discharge",
+    "nipple_skin_change": None,
+}
+
+# Dropped from phrases and text alike, so "lump in my armpit" matches "lump in armpit"
+STOPWORDS = frozenset(("a", "an", "the", "in", "on", "my", "of", "from", "and", "or", "to", "is",
+                       "i", "have", "has", "with", "at", "it", "its", "this", "that", "there", "some"))
+NEGATIONS = frozenset(("no", "not", "without", "never", "dont", "doesnt", "didnt", "isnt", "denies", "nor"))
+CLAUSE_BREAKS = frozenset(("but", "however", "although", "though", "except", ".", ",", ";", "!", "?"))
+# Matches in a clause about one of these, and no breast site, are dropped
+# ("pain when I pass urine", "a knot in my stomach"); breast sites are
+# spelling-corrected like vocabulary tokens
+BREAST_SITES = frozenset(("breast", "breasts", "boob", "boobs", "chest", "nipple", "nipples", "areola",
+                          "armpit", "armpits", "underarm"))
+OTHER_SITES = frozenset(("stomach", "belly", "tummy", "abdomen", "head", "headache", "throat", "urine",
+                         "urinate", "urinating", "pee", "bladder", "bowel", "knee", "leg", "legs", "foot",
+                         "feet", "tooth", "teeth", "ear", "ears", "eye", "eyes", "mouth", "gum", "gums",
+                         "lip", "lips", "tongue", "nose"))
+# A negation covers matches starting within this many tokens after it
+NEGATION_WINDOW = 3
+# Tokens shorter than this are only matched exactly
+# ("paint", "pump" and "know" are one edit from "pain", "bump" and "knot")
+MIN_FUZZY_LENGTH = 6
+# Everyday words one edit away from a vocabulary token; never corrected
+COMMON_WORDS = frozenset((
+    "height", "chance", "charge", "burned", "glance", "curing", "luring", "render", "sender",
+    "lender", "closing", "loving", "glowing", "rowing", "breath", "breathe",
+))
+# Tokens at least this long may be two edits away
+LONG_TOKEN_LENGTH = 8
+# Longer input is truncated before matching
+MAX_TEXT_LENGTH = 5000
+CORRECTION_CACHE_SIZE = 50_000
+
+_TOKEN = re.compile(r"[a-z]+|[.,;!?]")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower().replace("'", "").replace("’", ""))
+
+
+def _max_distance(token: str) -> int:
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    return 2 if len(token) >= LONG_TOKEN_LENGTH else 1
+
+
+def _deletes(token: str, distance: int) -> set:
+    """`token` with up to `distance` characters removed."""
+    variants, frontier = {token}, {token}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def _osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SymptomMatcher:
+    def __init__(self, terms: Dict[str, Dict[str, Any]] = SYMPTOM_TERMS):
+        self.terms = terms
+        self.vocabulary: Dict[str, int] = {}
+        self.patterns: List[Tuple[str, int]] = []  # (term, length in tokens)
+        self._corrections: Dict[str, int] = {}
+
+        # Trie over token ids, then Aho-Corasick failure links in BFS order
+        self._goto: List[Dict[int, int]] = [{}]
+        self._output: List[List[int]] = [[]]
+        for term, spec in terms.items():
+            for phrase in spec["phrases"]:
+                tokens = [t for t in tokenize(phrase) if t not in STOPWORDS]
+                state = 0
+                for token in tokens:
+                    token_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    if token_id not in self._goto[state]:
+                        self._goto.append({})
+                        self._output.append([])
+                        self._goto[state][token_id] = len(self._goto) - 1
+                    state = self._goto[state][token_id]
+                self._output[state].append(len(self.patterns))
+                self.patterns.append((term, len(tokens)))
+
+        # Qualifier words need ids (and spelling correction) but no trie states
+        self._qualifies: Dict[int, List[str]] = {}
+        for base, (_, words) in QUALIFIERS.items():
+            for word in words:
+                token_id = self.vocabulary.setdefault(word, len(self.vocabulary))
+                self._qualifies.setdefault(token_id, []).append(base)
+        self._sites = frozenset(self.vocabulary.setdefault(site, len(self.vocabulary)) for site in BREAST_SITES)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token_id, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token_id not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token_id, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+        # Symmetric delete index: every deletion variant -> vocabulary tokens
+        self._delete_index: Dict[str, List[str]] = {}
+        for token in self.vocabulary:
+            for variant in _deletes(token, _max_distance(token)):
+                self._delete_index.setdefault(variant, []).append(token)
+
+    def _token_id(self, token: str) -> int:
+        """Vocabulary id of the token or its closest spelling, -1 if none is close enough."""
+        token_id = self.vocabulary.get(token)
+        if token_id is not None:
+            return token_id
+        token_id = self._corrections.get(token)
+        if token_id is not None:
+            return token_id
+
+        limit = 0 if token in COMMON_WORDS else _max_distance(token)
+        best, best_distance = -1, limit + 1
+        if limit:
+            candidates = set()
+            for variant in _deletes(token, limit):
+                candidates.update(self._delete_index.get(variant, ()))
+            for candidate in sorted(candidates):
+                distance = _osa_distance(token, candidate, min(limit, _max_distance(candidate)))
+                if distance < best_distance:
+                    best, best_distance = self.vocabulary[candidate], distance
+
+        if len(self._corrections) >= CORRECTION_CACHE_SIZE:
+            self._corrections.clear()
+        self._corrections[token] = best
+        return best
+
+    def match(self, text: str) -> List[str]:
+        """Terms found in `text`, in order of appearance, longest phrase first on overlaps."""
+        terms: List[str] = []
+        clause: List[Tuple[int, int, str]] = []  # (start, length, term)
+        qualified: set = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        known, corrected = self.vocabulary, self._corrections
+        state, position, negated_at = 0, 0, None
+        on_breast = elsewhere = False
+        for token in tokenize(text[:MAX_TEXT_LENGTH]) + ["."]:
+            if token in CLAUSE_BREAKS:
+                if not elsewhere or on_breast:
+                    _add_clause(terms, clause, qualified, on_breast)
+                clause, qualified, state, negated_at = [], set(), 0, None
+                on_breast = elsewhere = False
+                continue
+            if token in STOPWORDS:
+                continue
+            if token in NEGATIONS:
+                state, negated_at = 0, position
+                position += 1
+                continue
+            if token in OTHER_SITES:
+                elsewhere = True
+
+            token_id = known.get(token)
+            if token_id is None:
+                token_id = corrected.get(token)
+                if token_id is None:
+                    token_id = self._token_id(token)
+            if token_id in self._sites:
+                on_breast = True
+            if token_id in self._qualifies and (negated_at is None or position - negated_at > NEGATION_WINDOW):
+                qualified.update(self._qualifies[token_id])
+            while state and token_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token_id, 0)
+            for pattern in output[state]:
+                term, length = self.patterns[pattern]
+                start = position - length + 1
+                if negated_at is not None and start - negated_at <= NEGATION_WINDOW:
+                    continue
+                clause.append((start, length, term))
+            position += 1
+        return terms
+
+
+def _add_clause(terms: List[str], clause: List[Tuple[int, int, str]], qualified: set, on_breast: bool) -> None:
+    """Append one clause's terms to `terms`, keeping the longest of overlapping matches."""
+    covered_until = -1
+    for start, length, term in sorted(clause, key=lambda match: (match[0], -match[1])):
+        if start <= covered_until:
+            continue
+        covered_until = start + length - 1
+        if term in qualified:
+            term = QUALIFIERS[term][0]
+        if term in SITE_REQUIRED and not on_breast:
+            term = SITE_REQUIRED[term]
+            if term is None:
+                continue
+        if term not in terms:
+            terms.append(term)
+
+
+MATCHER = SymptomMatcher()
+
+
+def triage_symptom(text: Optional[str]) -> Dict[str, Any]:
+    """Matched terms and whether any of them is a red flag."""
+    terms = MATCHER.match(text or "")
+    return {
+        "terms": terms,
+        "red_flag": any(SYMPTOM_TERMS[term]["red_flag"] for term in terms),
+    }
+
+
+def symptom_reasons(triage: Dict[str, Any]) -> List[str]:
+    """Reasons for the matched terms, red flags first."""
+    terms = sorted(triage["terms"], key=lambda term: not SYMPTOM_TERMS[term]["red_flag"])
+    return [SYMPTOM_TERMS[term]["reason"] for term in terms]
@@ -1,21 +1,30 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
+
+# Shared definitions (form options, scoring core) live in the backend package
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from components.input_form import user_input_form
-from components.risk_summary import fetch_risk_estimate, render_result
+from components.risk_summary import render_result
+from components.api_client import fetch_risk_estimate, get_client, idempotency_key, complete_submission
+from components.local_scoring import get_snapshot, local_risk_estimate
 
-API_URL = "https://how-likely-is-cancer.onrender.com/score"  # Make sure to include /score here
+def assess(user_input: dict, use_local: bool) -> dict | None:
+    """
+    Score a submission and keep its request and response in the session,
+    so other reruns can redraw the result.
+    """
+    key = idempotency_key(user_input)
+    response = local_risk_estimate(user_input) if use_local else None
+    if response is None:
+        response = fetch_risk_estimate(user_input, key)
+    if response is not None:  # failures are retried with the same key on the next submit
+        complete_submission()
+        st.session_state["assessment"] = {"key": key, "request": user_input, "response": response}
+    return response
 
-def call_backend_api(user_data):
-    import requests
-    try:
-        response = requests.post(API_URL, json=user_data, timeout=60)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Backend error: {response.status_code} - {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error connecting to backend: {e}")
-        return None
 
 def main():
     st.set_page_config(
@@ -27,13 +36,26 @@ def main():
     st.title(" How Likely Is Breast Cancer Really?")
     st.caption("A data-informed companion for moments of health anxiety.")
 
+    snapshot_available = get_snapshot() is not None
+    use_local = st.sidebar.checkbox(
+        "Compute on this device",
+        value=snapshot_available,
+        disabled=not snapshot_available,
+        help="Scores the form locally from a bundled baseline snapshot instead of waiting for the backend."
+    )
+
     # Show the form and get user input dict
     user_input = user_input_form()
 
-    # Only call backend and display if user_input is present (form submitted)
+    # Score on submit; any other rerun (downloads, widget clicks in the
+    # result) redraws the last result from the session
     if user_input:
-        response = call_backend_api(user_input)
-        render_result(response)
+        render_result(assess(user_input, use_local))
+    elif "assessment" in st.session_state:
+        render_result(st.session_state["assessment"]["response"])
+
+    with st.sidebar.expander("Connection stats"):
+        st.json(get_client().connection_stats())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,123 @@
+import os
+import time
+import uuid
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# -------------------------------------------------------------------
+# Backend Configuration
+# -------------------------------------------------------------------
+DEFAULT_BACKEND_URL = "https://how-likely-is-cancer.onrender.com"
+BACKEND_URL = os.environ.get("BACKEND_URL", DEFAULT_BACKEND_URL).rstrip("/")
+
+# (connect, read) – the read timeout is generous because the free-tier
+# backend can take close to a minute to wake up.
+REQUEST_TIMEOUT = (10, 60)
+
+# Cold starts answer with 502/503/504 until the service is up, so those
+# are retried with exponential backoff (1s, 2s, 4s).
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 1.0
+RETRY_STATUSES = (502, 503, 504)
+
+
+class BackendClient:
+    """Keep-alive HTTP client shared by every session of the Streamlit app."""
+
+    def __init__(self, base_url: str = BACKEND_URL):
+        self.base_url = base_url
+        self.session = requests.Session()
+        retry = Retry(
+            total=RETRY_TOTAL,
+            connect=RETRY_TOTAL,
+            read=RETRY_TOTAL,
+            status=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.request_count = 0
+        self.total_latency = 0.0
+
+    def post(self, path: str, payload: dict, headers: dict | None = None,
+             params: dict | None = None) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            return self.session.post(
+                f"{self.base_url}{path}", json=payload, headers=headers, params=params,
+                timeout=REQUEST_TIMEOUT
+            )
+        finally:
+            self.request_count += 1
+            self.total_latency += time.perf_counter() - started
+
+    def connection_stats(self) -> dict:
+        """
+        Report how often pooled connections were reused.
+
+        urllib3 counts the connections each host pool had to open and the
+        requests it served; the difference is the number of reused sockets.
+        """
+        opened = served = 0
+        # The same adapter is mounted for both schemes; count it once.
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                opened += pool.num_connections
+                served += pool.num_requests
+        return {
+            "requests": self.request_count,
+            "connections_opened": opened,
+            "connections_reused": max(0, served - opened),
+            "avg_latency_ms": round(1000 * self.total_latency / self.request_count, 1)
+            if self.request_count else 0.0,
+        }
+
+
+@st.cache_resource
+def get_client() -> BackendClient:
+    return BackendClient()
+
+
+def idempotency_key(payload: dict) -> str:
+    """
+    A new key per form submission. It stays in the session until the
+    submission gets a response, so a retry after a failure, or a rerun that
+    interrupted the request, replays the stored response instead of adding
+    a submission; a later submission gets a new key even with the same answers.
+    """
+    pending = st.session_state.get("pending_submission")
+    if pending is None or pending["request"] != payload:
+        pending = {"key": uuid.uuid4().hex, "request": payload}
+        st.session_state["pending_submission"] = pending
+    return pending["key"]
+
+
+def complete_submission() -> None:
+    """Forget the pending key once its submission has a response."""
+    st.session_state.pop("pending_submission", None)
+
+
+def fetch_risk_estimate(payload: dict, key: str) -> dict | None:
+    try:
+        res = get_client().post(
+            "/score", payload,
+            headers={"Idempotency-Key": key},
+            params={"include_trajectory": "true", "include_interval": "true"}
+        )
+        if res.status_code != 200:
+            st.error(f"Backend error: {res.status_code} - {res.text}")
+            return None
+        return res.json()
+    except Exception as e:
+        st.error(f"Could not reach the backend: {e}")
+        return None
@@ -1,74 +1,91 @@
 import streamlit as st
 import pycountry
+from backend.form_options import (
+    FIELD_OPTIONS, AGE_RANGE, MENARCHE_AGE_RANGE, THELARCHE_AGE_RANGE,
+    MENOPAUSE_AGE_RANGE, PREGNANCY_AGE_RANGE, RELATIVES_RANGE, DEFAULT_LOCATION
+)
+
+
+@st.cache_data
+def country_options() -> tuple[tuple[str, ...], int]:
+    """Sorted country names and the index of the default location, built once per process."""
+    names = tuple(sorted(country.name for country in pycountry.countries))
+    return names, names.index(DEFAULT_LOCATION)
+
 
 def user_input_form():
     st.header("Is it serious or are you anxious?")
     st.subheader("Answer a few questions to put your concern into data-backed context")
 
-    # -------------------------  Section 1: Symptom -------------------------
-    symptom = st.text_input("What symptom are you worried about?", placeholder="e.g. breast lump")
-
-    # -------------------------  Section 2: Context -------------------------
-    age = st.slider("Your current age", 10, 100, 22)
-    gender = st.selectbox("Your gender identity", ["Female", "Male", "Other"])
-
-    country_list = sorted([country.name for country in pycountry.countries])
-    location = st.selectbox("Where are you currently located?", country_list, index=country_list.index("Nepal"))
-
-    access_healthcare = st.selectbox("Do you have access to basic healthcare services nearby?", ["Yes", "No", "I don't know"])
-
-    # -------------------------  Section 3: Hormonal Life Events -------------------------
-    st.markdown("### Hormonal History")
-    age_menarche = st.slider("At what age did your periods start?", 4, 20, 12)
-    age_thelarche = st.slider("At what age did your breasts begin developing?", 4, 20, 12)
-
-    menopause = st.selectbox("Have you gone through menopause?", ["No", "Yes", "Not sure"])
-    age_menopause = None
-    if menopause == "Yes":
-        age_menopause = st.slider("At what age did menopause begin?", 35, 60, 48)
-
-    pregnancy = st.selectbox("Have you ever had a full-term pregnancy?", ["No", "Yes", "Prefer not to say"])
-    pregnancy_age = None
-    if pregnancy == "Yes":
-        pregnancy_age = st.slider("How old were you at your first full-term pregnancy?", 13, 50, 24)
-
-    breastfeeding = st.selectbox("Have you breastfed any children?", ["No", "Yes", "Prefer not to say"])
-    pcos = st.selectbox("Have you been diagnosed with PCOS or irregular cycles?", ["No", "Yes", "Not sure"])
-
-    hormonal_use = st.selectbox(
-        "Have you taken hormonal birth control or HRT for more than 5 years?",
-        ["No", "Yes", "Not sure"]
-    )
-
-    # -------------------------  Section 4: Family & Genetics -------------------------
-    st.markdown("### Family & Genetics")
-    relatives_with_cancer = st.number_input(
-        "How many close blood relatives (mother, sister, daughter) have had breast cancer?",
-        min_value=0, max_value=10, value=0
-    )
-
-    brca_known = st.selectbox("Have you tested positive for a BRCA mutation?", ["No", "Yes", "Not tested / Not sure"])
-    ethnicity = st.selectbox(
-        "Which race/ethnicity do you most closely identify with?",
-        ["White", "Black", "Hispanic", "Asian or Pacific Islander", "Native American", "Other"],
-        help="Used for contextualizing risk with demographic trends."
-    )
-
-    # -------------------------  Section 5: Prior Screening -------------------------
-    st.markdown("### Prior Breast Screenings")
-    had_mammo = st.selectbox("Have you ever had a mammogram or breast ultrasound?", ["No", "Yes"])
-    breast_density = st.selectbox("Have you been told you have dense breasts?", ["No", "Yes", "Don't know"])
-    benign_lumps = st.selectbox("Have you ever been diagnosed with a benign breast lump?", ["No", "Yes"])
-
-    # -------------------------  Section 6: Lifestyle -------------------------
-    st.markdown("### Lifestyle")
-    smoking = st.selectbox("Do you smoke or vape regularly?", ["No", "Yes"])
-    alcohol = st.selectbox("Do you consume alcohol weekly or more?", ["No", "Yes"])
-    exercise = st.selectbox("How often do you exercise?", ["Rarely", "1–2x/week", "3–5x/week", "Daily"])
-    anxiety_level = st.selectbox("How anxious are you feeling about your symptom?", ["Mild", "Manageable", "High", "Debilitating"])
-
-    # -------------------------  Submit -------------------------
-    if st.button("What are the odds?"):
+    # One form, so answers are sent in a single rerun on submit instead of
+    # one rerun per widget change
+    with st.form("risk_form"):
+        # -------------------------  Section 1: Symptom -------------------------
+        symptom = st.text_input("What symptom are you worried about?", placeholder="e.g. breast lump")
+
+        # -------------------------  Section 2: Context -------------------------
+        age = st.slider("Your current age", *AGE_RANGE)
+        gender = st.selectbox("Your gender identity", FIELD_OPTIONS["gender"])
+
+        country_list, default_country = country_options()
+        location = st.selectbox("Where are you currently located?", country_list, index=default_country)
+
+        access_healthcare = st.selectbox("Do you have access to basic healthcare services nearby?", FIELD_OPTIONS["access_healthcare"])
+
+        # -------------------------  Section 3: Hormonal Life Events -------------------------
+        st.markdown("### Hormonal History")
+        age_menarche = st.slider("At what age did your periods start?", *MENARCHE_AGE_RANGE)
+        age_thelarche = st.slider("At what age did your breasts begin developing?", *THELARCHE_AGE_RANGE)
+
+        # Widgets inside a form don't rerun the script, so follow-up questions
+        # are always shown and only used when their parent answer is "Yes"
+        menopause = st.selectbox("Have you gone through menopause?", FIELD_OPTIONS["menopause"])
+        age_menopause = st.slider("At what age did menopause begin?", *MENOPAUSE_AGE_RANGE,
+                                  help="Only used if you have gone through menopause.")
+
+        pregnancy = st.selectbox("Have you ever had a full-term pregnancy?", FIELD_OPTIONS["pregnancy"])
+        pregnancy_age = st.slider("How old were you at your first full-term pregnancy?", *PREGNANCY_AGE_RANGE,
+                                  help="Only used if you have had a full-term pregnancy.")
+
+        breastfeeding = st.selectbox("Have you breastfed any children?", FIELD_OPTIONS["breastfeeding"])
+        pcos = st.selectbox("Have you been diagnosed with PCOS or irregular cycles?", FIELD_OPTIONS["pcos"])
+
+        hormonal_use = st.selectbox(
+            "Have you taken hormonal birth control or HRT for more than 5 years?",
+            FIELD_OPTIONS["hormonal_use"]
+        )
+
+        # -------------------------  Section 4: Family & Genetics -------------------------
+        st.markdown("### Family & Genetics")
+        relatives_with_cancer = st.number_input(
+            "How many close blood relatives (mother, sister, daughter) have had breast cancer?",
+            min_value=RELATIVES_RANGE[0], max_value=RELATIVES_RANGE[1], value=RELATIVES_RANGE[2]
+        )
+
+        brca_known = st.selectbox("Have you tested positive for a BRCA mutation?", FIELD_OPTIONS["brca_known"])
+        ethnicity = st.selectbox(
+            "Which race/ethnicity do you most closely identify with?",
+            FIELD_OPTIONS["ethnicity"],
+            help="Used for contextualizing risk with demographic trends."
+        )
+
+        # -------------------------  Section 5: Prior Screening -------------------------
+        st.markdown("### Prior Breast Screenings")
+        had_mammo = st.selectbox("Have you ever had a mammogram or breast ultrasound?", FIELD_OPTIONS["had_mammo"])
+        breast_density = st.selectbox("Have you been told you have dense breasts?", FIELD_OPTIONS["breast_density"])
+        benign_lumps = st.selectbox("Have you ever been diagnosed with a benign breast lump?", FIELD_OPTIONS["benign_lumps"])
+
+        # -------------------------  Section 6: Lifestyle -------------------------
+        st.markdown("### Lifestyle")
+        smoking = st.selectbox("Do you smoke or vape regularly?", FIELD_OPTIONS["smoking"])
+        alcohol = st.selectbox("Do you consume alcohol weekly or more?", FIELD_OPTIONS["alcohol"])
+        exercise = st.selectbox("How often do you exercise?", FIELD_OPTIONS["exercise"])
+        anxiety_level = st.selectbox("How anxious are you feeling about your symptom?", FIELD_OPTIONS["anxiety_level"])
+
+        # -------------------------  Submit -------------------------
+        submitted = st.form_submit_button("What are the odds?")
+
+    if submitted:
         return {
             "symptom": symptom.strip(),
             "age": age,
@@ -78,9 +95,9 @@ def user_input_form():
             "age_menarche": age_menarche,
             "age_thelarche": age_thelarche,
             "menopause": menopause,
-            "age_menopause": age_menopause,
+            "age_menopause": age_menopause if menopause == "Yes" else None,
             "pregnancy": pregnancy,
-            "pregnancy_age": pregnancy_age,
+            "pregnancy_age": pregnancy_age if pregnancy == "Yes" else None,
             "breastfeeding": breastfeeding,
             "pcos": pcos,
             "hormonal_use": hormonal_use,
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import streamlit as st
+from backend.scoring_core import load_baseline_snapshot, score_with_snapshot
+
+# Written by backend/etl/export_snapshot.py
+SNAPSHOT_PATH = Path(__file__).resolve().parent.parent / "data" / "baseline_snapshot.json"
+
+
+@st.cache_resource
+def get_snapshot() -> dict | None:
+    return load_baseline_snapshot(str(SNAPSHOT_PATH))
+
+
+def local_risk_estimate(payload: dict) -> dict | None:
+    """
+    Score the form in-process; None means the caller should use the API.
+    """
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    try:
+        return score_with_snapshot(payload, snapshot)
+    except Exception as e:
+        st.caption(f"Local scoring unavailable ({e}); asking the backend instead.")
+        return None
@@ -1,33 +1,21 @@
+import json
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import requests
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import sqlite3
 from datetime import datetime
+from backend.report import render_report_pdf
 
 # -------------------------------------------------------------------
-# 1️⃣  Backend Communication
+# 1️⃣  Visualization Components
 # -------------------------------------------------------------------
-BACKEND_URL = "https://how-likely-is-cancer.onrender.com/score"
-
-def fetch_risk_estimate(payload: dict) -> dict | None:
-    try:
-        res = requests.post(BACKEND_URL, json=payload, timeout=20)
-        res.raise_for_status()
-        return res.json()
-    except Exception as e:
-        st.error(f"Could not reach the backend: {e}")
-        return None
-
-# -------------------------------------------------------------------
-# 2️⃣  Visualization Components
-# -------------------------------------------------------------------
-def _create_risk_gauge(risk_percent: float) -> go.Figure:
+# Figures are cached as plain dicts with st.cache_data, which hands every
+# caller its own copy; a cached go.Figure would be shared across sessions.
+@st.cache_data
+def _gauge_template() -> dict:
     fig = go.Figure(go.Indicator(
         mode="gauge+number",
-        value=risk_percent,
+        value=0,
         number={'suffix': "%"},
         domain={'x': [0, 1], 'y': [0, 1]},
         gauge={
@@ -43,69 +31,119 @@ def _create_risk_gauge(risk_percent: float) -> go.Figure:
         }
     ))
     fig.update_layout(margin=dict(l=20, r=20, t=30, b=20), height=300)
-    return fig
-
-def _create_factor_breakdown(factors: dict) -> go.Figure:
-    df = pd.DataFrame({
-        'factor': list(factors.keys()),
-        'multiplier': list(factors.values())
-    }).sort_values('multiplier')
-    fig = px.bar(df, x='multiplier', y='factor', orientation='h',
-                 color='multiplier', color_continuous_scale='RdYlGn_r',
-                 title="Risk Factor Multipliers")
-    fig.update_layout(xaxis_title="Risk Multiplier", yaxis_title="Factor", coloraxis_showscale=False)
-    return fig
-
-def _create_age_comparison_chart(chart_data: dict) -> go.Figure:
-    required_keys = ['age_groups', 'ethnicity_rates', 'average_rates', 'user_age', 'user_risk']
-    if not all(key in chart_data for key in required_keys):
-        st.warning("Age comparison data incomplete or missing.")
-        return go.Figure()  # return empty figure to avoid crash
+    return fig.to_dict()
+
+
+def _create_risk_gauge(risk_percent: float) -> go.Figure:
+    spec = _gauge_template()
+    spec['data'][0]['value'] = risk_percent
+    return go.Figure(spec)
+
+
+def _create_factor_breakdown(factors: tuple) -> go.Figure:
+    return go.Figure(_factor_breakdown_spec(factors))
+
+
+@st.cache_data(max_entries=256)
+def _factor_breakdown_spec(factors: tuple) -> dict:
+    """`factors` is a tuple of (name, multiplier) pairs so it can be cached."""
+    ordered = sorted(factors, key=lambda item: item[1])
+    names = [name for name, _ in ordered]
+    multipliers = [value for _, value in ordered]
+    fig = go.Figure(go.Bar(
+        x=multipliers, y=names, orientation='h',
+        marker=dict(color=multipliers, colorscale='RdYlGn_r', showscale=False)
+    ))
+    fig.update_layout(title="Risk Factor Multipliers", xaxis_title="Risk Multiplier", yaxis_title="Factor")
+    return fig.to_dict()
+
 
+@st.cache_data(max_entries=32)
+def _population_template(age_groups: tuple, ethnicity_rates: tuple, average_rates: tuple) -> dict:
+    """Population curves for one ethnicity; the user marker is filled in per response."""
     fig = make_subplots(specs=[[{"secondary_y": True}]])
-    
+
     fig.add_trace(
         go.Scatter(
-            x=chart_data['age_groups'],
-            y=[rate * 100 for rate in chart_data['ethnicity_rates']],
+            x=age_groups,
+            y=[rate * 100 for rate in ethnicity_rates],
             name="Average Risk by Ethnicity",
             line=dict(color="blue")
         ),
         secondary_y=False
     )
-    
+
     fig.add_trace(
         go.Scatter(
-            x=chart_data['age_groups'],
-            y=[rate * 100 for rate in chart_data['average_rates']],
+            x=age_groups,
+            y=[rate * 100 for rate in average_rates],
             name="Overall Average Risk",
             line=dict(color="green", dash="dot")
         ),
         secondary_y=False
     )
-    
+
     fig.add_trace(
         go.Scatter(
-            x=[chart_data['user_age']],
-            y=[chart_data['user_risk'] * 100],
+            x=[0],
+            y=[0],
             mode='markers',
             marker=dict(color="red", size=12),
             name="Your Risk"
         ),
         secondary_y=False
     )
-    
+
     fig.update_layout(
         title="Your Risk Compared to Population",
         xaxis_title="Age",
         yaxis_title="Risk Percentage",
         height=400
     )
-    return fig
+    return fig.to_dict()
+
+
+def _build_age_comparison_chart(age_groups: tuple, ethnicity_rates: tuple, average_rates: tuple,
+                                user_age: int, user_risk: float,
+                                trajectory_ages: tuple = (), trajectory_risk: tuple = ()) -> go.Figure:
+    spec = _population_template(age_groups, ethnicity_rates, average_rates)
+    spec['data'][2]['x'] = [user_age]
+    spec['data'][2]['y'] = [user_risk * 100]
+    if trajectory_ages:
+        spec['data'].append(go.Scatter(
+            x=trajectory_ages,
+            y=trajectory_risk,
+            name="Your Projected Risk",
+            line=dict(color="red", dash="dash")
+        ).to_plotly_json())
+    return go.Figure(spec)
+
+
+def _create_age_comparison_chart(chart_data: dict, trajectory: dict | None = None) -> go.Figure:
+    required_keys = ['age_groups', 'ethnicity_rates', 'average_rates', 'user_age', 'user_risk']
+    if not all(key in chart_data for key in required_keys):
+        st.warning("Age comparison data incomplete or missing.")
+        return go.Figure()  # return empty figure to avoid crash
+
+    trajectory = trajectory or {}
+    return _build_age_comparison_chart(
+        tuple(chart_data['age_groups']),
+        tuple(chart_data['ethnicity_rates']),
+        tuple(chart_data['average_rates']),
+        chart_data['user_age'],
+        chart_data['user_risk'],
+        tuple(trajectory.get('ages', ())),
+        tuple(trajectory.get('risk_percentages', ()))
+    )
+
+
+@st.cache_data(max_entries=64)
+def _report_pdf(response_json: str) -> bytes:
+    return render_report_pdf(json.loads(response_json))
 
 
 # -------------------------------------------------------------------
-# 3️⃣  Main Rendering Function
+# 2️⃣  Main Rendering Function
 # -------------------------------------------------------------------
 def render_result(response: dict) -> None:
     if not response:
@@ -126,6 +164,17 @@ def render_result(response: dict) -> None:
     with col2:
         st.metric("Risk Level", risk_label)
         st.metric("Risk %", f"{risk_percent:.1f}%")
+        interval = response.get("risk_interval")
+        if interval:
+            st.caption(f"{interval['level']:.0%} range: {interval['lower']:.1f}% – {interval['upper']:.1f}%")
+        percentile = response.get("population_percentile")
+        if percentile is not None:
+            st.caption(f"Higher than {percentile:.0f}% of women your age and ethnicity, "
+                       "comparing only the factors the population data records")
+        source = response.get("baseline_source")
+        if source and source != "bcsc":
+            level = "regional" if source.startswith("region") else "national"
+            st.caption(f"Baseline adjusted to {level} incidence for your location")
         if 'timestamp' in response:
             st.caption(f"Generated: {response['timestamp']}")
 
@@ -149,13 +198,13 @@ def render_result(response: dict) -> None:
 
         with tab1:
             if 'factor_breakdown' in response:
-                st.plotly_chart(_create_factor_breakdown(response['factor_breakdown']), use_container_width=True)
+                st.plotly_chart(_create_factor_breakdown(tuple(response['factor_breakdown'].items())), use_container_width=True)
             else:
                 st.warning("No factor data")
 
         with tab2:
             if 'chart_data' in response:
-                st.plotly_chart(_create_age_comparison_chart(response['chart_data']), use_container_width=True)
+                st.plotly_chart(_create_age_comparison_chart(response['chart_data'], response.get('trajectory')), use_container_width=True)
             else:
                 st.warning("No chart data")
 
@@ -172,11 +221,15 @@ def render_result(response: dict) -> None:
         "**Disclaimer**: This is a data-backed estimate, not a diagnosis. Always consult medical professionals."
     )
 
-    if st.button("📥 Download Report"):
-        st.info("PDF report generation coming soon!")
+    st.download_button(
+        "📥 Download Report",
+        data=_report_pdf(json.dumps(response, sort_keys=True, default=str)),
+        file_name="risk_report.pdf",
+        mime="application/pdf"
+    )
 
 # -------------------------------------------------------------------
-# 4️⃣  Example Usage (optional local test)
+# 3️⃣  Example Usage (optional local test)
 # -------------------------------------------------------------------
 if __name__ == "__main__":
     render_result({